@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User, UserProfile
+from .models import User, UserProfile, DocumentSequence
 
 
 @admin.register(User)
@@ -29,3 +29,14 @@ class UserProfileAdmin(admin.ModelAdmin):
     list_filter = ['country', 'city']
     search_fields = ['user__username', 'user__email', 'city', 'country']
     raw_id_fields = ['user']
+
+
+@admin.register(DocumentSequence)
+class DocumentSequenceAdmin(admin.ModelAdmin):
+    list_display = ['document_type', 'scope', 'last_number', 'updated_at']
+    list_filter = ['document_type']
+    search_fields = ['scope']
+    readonly_fields = ['document_type', 'scope', 'last_number', 'updated_at']
+    
+    def has_add_permission(self, request):
+        return False  # Sequences are created on first use
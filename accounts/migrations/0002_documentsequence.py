@@ -0,0 +1,27 @@
+# Generated by Django 4.2.25 on 2026-10-19 01:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('document_type', models.CharField(choices=[('SALE_RECEIPT', 'Sale Receipt'), ('VENDOR_INVOICE', 'Vendor Invoice'), ('MANUFACTURING_ORDER', 'Manufacturing Order'), ('RAW_MATERIAL_PURCHASE', 'Raw Material Purchase'), ('ORDER', 'Order'), ('PAYMENT', 'Payment Transaction')], max_length=30)),
+                ('scope', models.PositiveBigIntegerField(default=0)),
+                ('last_number', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'document_sequences',
+                'unique_together': {('document_type', 'scope')},
+            },
+        ),
+    ]
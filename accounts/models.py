@@ -44,3 +44,31 @@ class UserProfile(models.Model):
     
     def __str__(self):
         return f"{self.user.username}'s Profile"
+
+
+class DocumentSequence(models.Model):
+    """
+    Counter behind gap-free document numbers (see accounts.numbering).
+    One row per document type and scope: the vendor's user id for vendor
+    documents, 0 for platform-wide documents such as orders.
+    """
+    DOCUMENT_TYPE_CHOICES = [
+        ('SALE_RECEIPT', 'Sale Receipt'),
+        ('VENDOR_INVOICE', 'Vendor Invoice'),
+        ('MANUFACTURING_ORDER', 'Manufacturing Order'),
+        ('RAW_MATERIAL_PURCHASE', 'Raw Material Purchase'),
+        ('ORDER', 'Order'),
+        ('PAYMENT', 'Payment Transaction'),
+    ]
+    
+    document_type = models.CharField(max_length=30, choices=DOCUMENT_TYPE_CHOICES)
+    scope = models.PositiveBigIntegerField(default=0)
+    last_number = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'document_sequences'
+        unique_together = ['document_type', 'scope']
+    
+    def __str__(self):
+        return f"{self.get_document_type_display()} #{self.scope}: {self.last_number}"
@@ -0,0 +1,103 @@
+"""
+Test gap-free document numbering
+"""
+import threading
+from decimal import Decimal
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from accounts import numbering
+from accounts.models import DocumentSequence
+from orders.models import Order
+from payments.models import PaymentTransaction
+from vendors.models import SaleReceipt
+
+User = get_user_model()
+
+
+def receipt(vendor, **kwargs):
+    fields = dict(
+        customer_name='Walk-in', payment_method='CASH',
+        subtotal=Decimal('10'), total_amount=Decimal('10'), sale_date=timezone.now(),
+    )
+    fields.update(kwargs)
+    return SaleReceipt(vendor=vendor, **fields)
+
+
+@pytest.mark.unit
+class TestDocumentNumbering:
+    """Test per-vendor sequences, block allocation and rollback behaviour"""
+
+    def test_sequences_per_vendor_and_type(self, db, vendor_user):
+        """Test numbers are consecutive per vendor and independent across vendors"""
+        other = User.objects.create_user(username='vendor2', password='x', user_type='VENDOR')
+        first, second = receipt(vendor_user), receipt(vendor_user)
+        first.save()
+        second.save()
+        elsewhere = receipt(other)
+        elsewhere.save()
+
+        assert first.receipt_number == f'RCP-{vendor_user.pk}-000001'
+        assert second.receipt_number == f'RCP-{vendor_user.pk}-000002'
+        assert elsewhere.receipt_number == f'RCP-{other.pk}-000001'
+        assert numbering.next_number(numbering.VENDOR_INVOICE, vendor_user.pk) == f'INV-{vendor_user.pk}-000001'
+
+    def test_block_allocation(self, db, vendor_user):
+        """Test a bulk insert numbers every document from one allocation"""
+        numbering.allocate(numbering.SALE_RECEIPT, vendor_user.pk)
+        receipts = numbering.bulk_create_numbered(
+            SaleReceipt, [receipt(vendor_user) for _ in range(3)],
+            'receipt_number', numbering.SALE_RECEIPT, vendor_user.pk,
+        )
+        assert [r.receipt_number[-2:] for r in receipts] == ['02', '03', '04']
+        assert DocumentSequence.objects.get(document_type=numbering.SALE_RECEIPT, scope=vendor_user.pk).last_number == 4
+
+    def test_failed_save_leaves_no_gap(self, db, vendor_user):
+        """Test a rolled-back insert gives its number back"""
+        saved = receipt(vendor_user)
+        saved.save()
+        broken = receipt(vendor_user, customer_name=None)
+        with pytest.raises(IntegrityError):
+            broken.save()
+        assert broken.receipt_number == ''
+
+        retried = receipt(vendor_user)
+        retried.save()
+        assert retried.receipt_number.endswith('000002')
+
+    def test_payment_reference(self, db, customer_user):
+        """Test payments are numbered from the platform-wide sequence in one INSERT"""
+        order = Order.objects.bulk_create([Order(
+            order_number='ORD-1', customer=customer_user, subtotal=Decimal('10'), total=Decimal('10'),
+            shipping_address='1 Main St', shipping_city='Harare', shipping_phone='0771', payment_status='PENDING',
+        )])[0]
+        payment = PaymentTransaction(order=order, amount=Decimal('10'), total_amount=Decimal('10'))
+        with CaptureQueriesContext(connection) as ctx:
+            payment.save()
+        writes = [q['sql'] for q in ctx.captured_queries if q['sql'].lstrip().startswith(('INSERT', 'UPDATE'))]
+        assert len(writes) == 2  # sequence upsert + payment insert
+        assert payment.payment_reference == 'PAY-00000001'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_concurrent_allocations_never_collide(self, vendor_user):
+        """Test concurrent saves for one vendor get distinct consecutive numbers"""
+        numbers = []
+
+        def save_receipts():
+            try:
+                for _ in range(5):
+                    r = receipt(vendor_user)
+                    r.save()
+                    numbers.append(r.receipt_number)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=save_receipts) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=30)
+
+        assert sorted(numbers) == [f'RCP-{vendor_user.pk}-{n:06d}' for n in range(1, 21)]
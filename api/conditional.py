@@ -0,0 +1,66 @@
+"""
+Conditional GET for the catalog API
+
+Before any serialization, ConditionalGetMixin derives the validators of the
+response from one cheap query:
+
+- list views: the row count and latest updated_at of the filtered queryset;
+- detail views: the object's pk and updated_at.
+
+The strong ETag hashes those together with the API version and the full
+request path (filters, cursor and sparse fieldset included), and
+Last-Modified is the latest updated_at. A matching If-None-Match (or, without
+one, If-Modified-Since) gets a 304 straight away; otherwise the view runs as
+usual. Either way the response carries the validators and a public
+Cache-Control, so nginx and clients can cache and revalidate it.
+"""
+import hashlib
+from django.conf import settings
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+
+def make_etag(*parts):
+    """Strong ETag over the given parts"""
+    digest = hashlib.sha1('|'.join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest}"'
+
+
+class ConditionalGetMixin:
+    """For ListAPIView / RetrieveAPIView subclasses over models with updated_at"""
+
+    def get_validators(self):
+        """(etag, last_modified datetime) for this request, or None when the object doesn't exist"""
+        queryset = self.filter_queryset(self.get_queryset()).order_by()
+        lookup = self.lookup_url_kwarg or self.lookup_field
+        if lookup in self.kwargs:
+            row = queryset.filter(**{self.lookup_field: self.kwargs[lookup]}).values_list('pk', 'updated_at').first()
+            if row is None:
+                return None
+            state, last_modified = row
+        else:
+            row = queryset.aggregate(count=Count('pk'), last_modified=Max('updated_at'))
+            state, last_modified = row['count'], row['last_modified']
+        etag = make_etag(self.request.version, self.request.get_full_path(), state,
+                         last_modified.isoformat() if last_modified else '')
+        return etag, last_modified
+
+    def get(self, request, *args, **kwargs):
+        validators = self.get_validators()
+        if validators is None:
+            # Let the view raise its usual 404
+            return super().get(request, *args, **kwargs)
+
+        etag, last_modified = validators
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+
+        response.headers['ETag'] = etag
+        if timestamp is not None:
+            response.headers['Last-Modified'] = http_date(timestamp)
+        patch_cache_control(response, public=True, max_age=settings.API_CACHE_MAX_AGE)
+        patch_vary_headers(response, ['Accept'])
+        return response
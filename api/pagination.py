@@ -0,0 +1,17 @@
+"""
+Cursor pagination for the catalog API
+
+Cursors stay stable while rows are added and cost an index range scan at any
+depth, unlike page numbers (OFFSET). Each ordering is on a unique column.
+"""
+from rest_framework.pagination import CursorPagination
+
+
+class NewestFirstPagination(CursorPagination):
+    ordering = '-id'
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class AlphabeticalPagination(NewestFirstPagination):
+    ordering = 'name'
@@ -0,0 +1,67 @@
+"""
+Serializers for the public catalog API
+
+Representations only contain the resource's own columns and foreign key ids,
+so a resource's updated_at is enough to tell whether its representation
+changed (see conditional.py).
+"""
+from rest_framework import serializers
+from products.models import Category, Product, ProductReview
+from vendors.models import VendorProfile
+
+
+class SparseFieldsMixin:
+    """
+    Sparse fieldsets: ?fields=id,name,price limits the representation to
+    the listed fields. Unknown field names are a 400.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        requested = request.query_params.get('fields') if request else None
+        if not requested:
+            return
+        wanted = {name.strip() for name in requested.split(',') if name.strip()}
+        unknown = wanted - set(self.fields)
+        if unknown:
+            raise serializers.ValidationError({'fields': f"Unknown fields: {', '.join(sorted(unknown))}"})
+        for name in set(self.fields) - wanted:
+            self.fields.pop(name)
+
+
+class CategorySerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Category
+        fields = ['id', 'name', 'slug', 'description', 'image', 'tier', 'display_header',
+                  'display_tagline', 'updated_at']
+
+
+class ProductSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    in_stock = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Product
+        fields = ['id', 'name', 'slug', 'short_description', 'description', 'category', 'vendor', 'brand',
+                  'price', 'compare_at_price', 'in_stock', 'is_featured', 'is_made_from_local_materials',
+                  'primary_image', 'created_at', 'updated_at']
+
+    def get_in_stock(self, product):
+        return not product.track_inventory or product.stock_quantity > 0
+
+
+class VendorSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    # Products reference vendors by user id, so that is the vendor's id here too
+    id = serializers.IntegerField(source='vendor_id', read_only=True)
+
+    class Meta:
+        model = VendorProfile
+        fields = ['id', 'company_name', 'business_type', 'description', 'logo', 'is_verified',
+                  'overall_rating', 'total_reviews', 'updated_at']
+
+
+class ReviewSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = ProductReview
+        fields = ['id', 'product', 'rating', 'title', 'comment', 'is_verified_purchase', 'helpful_count',
+                  'vendor_response', 'vendor_response_date', 'created_at', 'updated_at']
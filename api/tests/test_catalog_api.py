@@ -0,0 +1,99 @@
+"""
+Test the public catalog API
+"""
+from datetime import timedelta
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import http_date
+from products.models import Product, ProductReview
+from vendors.models import VendorProfile
+
+
+def count_queries(func):
+    with CaptureQueriesContext(connection) as ctx:
+        result = func()
+    return result, len([
+        q for q in ctx.captured_queries
+        if not q['sql'].startswith(('EXPLAIN', 'SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT'))
+        and '"silk_' not in q['sql']
+    ])
+
+
+@pytest.mark.unit
+class TestCatalogAPI:
+    """Test cursor pagination, sparse fieldsets and conditional GET"""
+
+    def test_product_list_cursor_pagination(self, api_client, products):
+        """Test products come newest first, a page at a time, with cache headers"""
+        response = api_client.get('/api/v1/products/', {'page_size': 2})
+        assert response.status_code == 200
+        assert [item['slug'] for item in response.json()['results']] == ['test-product-5', 'test-product-4']
+        assert response.json()['next']
+        assert response['ETag'].startswith('"')
+        assert 'public' in response['Cache-Control'] and 'max-age=' in response['Cache-Control']
+        assert response['Last-Modified'] == http_date(int(products[-1].updated_at.timestamp()))
+
+        response = api_client.get(response.json()['next'])
+        assert [item['slug'] for item in response.json()['results']] == ['test-product-3', 'test-product-2']
+
+    def test_sparse_fieldsets(self, api_client, products):
+        """Test ?fields= limits the representation and rejects unknown names"""
+        response = api_client.get('/api/v1/products/test-product-1/', {'fields': 'slug,price'})
+        assert response.json() == {'slug': 'test-product-1', 'price': '10.00'}
+
+        response = api_client.get('/api/v1/products/', {'fields': 'slug,secret'})
+        assert response.status_code == 400
+
+    def test_unchanged_list_is_304_without_serializing(self, api_client, products):
+        """Test a matching If-None-Match costs one query, and any change produces a new ETag"""
+        etag = api_client.get('/api/v1/products/').headers['ETag']
+
+        response, queries = count_queries(lambda: api_client.get('/api/v1/products/', HTTP_IF_NONE_MATCH=etag))
+        assert response.status_code == 304
+        assert queries == 1
+        assert response['ETag'] == etag
+
+        Product.objects.filter(pk=products[0].pk).update(price=5, updated_at=timezone.now() + timedelta(seconds=1))
+        response = api_client.get('/api/v1/products/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response['ETag'] != etag
+
+    def test_detail_conditional_get(self, api_client, product):
+        """Test detail ETags and If-Modified-Since, and 404s for missing objects"""
+        response = api_client.get(f'/api/v1/products/{product.slug}/')
+        assert response.status_code == 200
+        assert response.json()['in_stock'] is True
+
+        assert api_client.get(
+            f'/api/v1/products/{product.slug}/', HTTP_IF_NONE_MATCH=response['ETag'],
+        ).status_code == 304
+        assert api_client.get(
+            f'/api/v1/products/{product.slug}/', HTTP_IF_MODIFIED_SINCE=response['Last-Modified'],
+        ).status_code == 304
+        # The ETag depends on the requested fieldset
+        assert api_client.get(
+            f'/api/v1/products/{product.slug}/', {'fields': 'name'}, HTTP_IF_NONE_MATCH=response['ETag'],
+        ).status_code == 200
+
+        assert api_client.get('/api/v1/products/missing/').status_code == 404
+        assert api_client.get(f'/api/v2/products/{product.slug}/').status_code == 404
+
+    def test_categories_vendors_and_reviews(self, api_client, customer_user, vendor_user, product, category):
+        """Test the other resources, approved reviews only"""
+        ProductReview.objects.create(product=product, customer=customer_user, rating=5, comment='Great',
+                                     is_approved=True)
+
+        assert category.slug in [item['slug'] for item in api_client.get('/api/v1/categories/').json()['results']]
+        assert api_client.get(f'/api/v1/categories/{category.slug}/').json()['name'] == category.name
+
+        response = api_client.get('/api/v1/vendors/')
+        assert response.json()['results'] == []  # Vendors without a profile aren't listed
+        VendorProfile.objects.create(vendor=vendor_user, company_name='Test Co')
+        assert api_client.get(f'/api/v1/vendors/{vendor_user.pk}/').json()['company_name'] == 'Test Co'
+
+        response = api_client.get(f'/api/v1/products/{product.slug}/reviews/')
+        assert [review['rating'] for review in response.json()['results']] == [5]
+        ProductReview.objects.update(is_approved=False)
+        assert api_client.get('/api/v1/reviews/').json()['results'] == []
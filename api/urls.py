@@ -0,0 +1,14 @@
+from django.urls import path
+from . import views
+
+# The version is part of the path (/api/v1/...); CatalogVersioning rejects unknown versions
+urlpatterns = [
+    path('<str:version>/products/', views.ProductList.as_view(), name='api_product_list'),
+    path('<str:version>/products/<slug:slug>/', views.ProductDetail.as_view(), name='api_product_detail'),
+    path('<str:version>/products/<slug:slug>/reviews/', views.ReviewList.as_view(), name='api_product_reviews'),
+    path('<str:version>/categories/', views.CategoryList.as_view(), name='api_category_list'),
+    path('<str:version>/categories/<slug:slug>/', views.CategoryDetail.as_view(), name='api_category_detail'),
+    path('<str:version>/vendors/', views.VendorList.as_view(), name='api_vendor_list'),
+    path('<str:version>/vendors/<int:vendor_id>/', views.VendorDetail.as_view(), name='api_vendor_detail'),
+    path('<str:version>/reviews/', views.ReviewList.as_view(), name='api_review_list'),
+]
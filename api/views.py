@@ -0,0 +1,88 @@
+"""
+Public read-only catalog API (v1)
+
+Anonymous, read-only and identical for every client, so responses are
+publicly cacheable: no authentication or session is consulted, and reads
+may be served from a replica.
+"""
+from django.utils.decorators import method_decorator
+from rest_framework import generics
+from rest_framework.permissions import AllowAny
+from rest_framework.renderers import JSONRenderer
+from rest_framework.versioning import URLPathVersioning
+from mushanaicore.db_router import use_replica
+from products.models import Category, Product, ProductReview
+from vendors.models import VendorProfile
+from .conditional import ConditionalGetMixin
+from .pagination import AlphabeticalPagination, NewestFirstPagination
+from .serializers import CategorySerializer, ProductSerializer, ReviewSerializer, VendorSerializer
+
+
+class CatalogVersioning(URLPathVersioning):
+    default_version = 'v1'
+    allowed_versions = ('v1',)
+
+
+@method_decorator(use_replica, name='dispatch')
+class CatalogAPIView(ConditionalGetMixin, generics.GenericAPIView):
+    authentication_classes = []
+    permission_classes = [AllowAny]
+    renderer_classes = [JSONRenderer]
+    versioning_class = CatalogVersioning
+    pagination_class = NewestFirstPagination
+
+
+class ProductList(CatalogAPIView, generics.ListAPIView):
+    """Active products; filter with ?category=<slug>, ?vendor=<id> or ?featured=1"""
+    serializer_class = ProductSerializer
+
+    def get_queryset(self):
+        products = Product.objects.filter(is_active=True)
+        params = self.request.query_params
+        if params.get('category'):
+            products = products.filter(category__slug=params['category'])
+        if params.get('vendor', '').isdigit():
+            products = products.filter(vendor_id=params['vendor'])
+        if params.get('featured') in ('1', 'true'):
+            products = products.filter(is_featured=True)
+        return products
+
+
+class ProductDetail(CatalogAPIView, generics.RetrieveAPIView):
+    serializer_class = ProductSerializer
+    queryset = Product.objects.filter(is_active=True)
+    lookup_field = 'slug'
+
+
+class CategoryList(CatalogAPIView, generics.ListAPIView):
+    serializer_class = CategorySerializer
+    queryset = Category.objects.filter(is_active=True)
+    pagination_class = AlphabeticalPagination
+
+
+class CategoryDetail(CatalogAPIView, generics.RetrieveAPIView):
+    serializer_class = CategorySerializer
+    queryset = Category.objects.filter(is_active=True)
+    lookup_field = 'slug'
+
+
+class VendorList(CatalogAPIView, generics.ListAPIView):
+    serializer_class = VendorSerializer
+    queryset = VendorProfile.objects.filter(vendor__is_active=True)
+
+
+class VendorDetail(CatalogAPIView, generics.RetrieveAPIView):
+    serializer_class = VendorSerializer
+    queryset = VendorProfile.objects.filter(vendor__is_active=True)
+    lookup_field = 'vendor_id'
+
+
+class ReviewList(CatalogAPIView, generics.ListAPIView):
+    """Approved reviews, of one product when reached through /products/<slug>/reviews/"""
+    serializer_class = ReviewSerializer
+
+    def get_queryset(self):
+        reviews = ProductReview.objects.filter(is_approved=True, product__is_active=True)
+        if 'slug' in self.kwargs:
+            reviews = reviews.filter(product__slug=self.kwargs['slug'])
+        return reviews
@@ -287,6 +287,12 @@ def clear_cache():
     cache.clear()
 
 
+@pytest.fixture(autouse=True)
+def enforce_query_budgets(settings):
+    """Fail views that exceed their @query_budget"""
+    settings.QUERY_BUDGET_RAISE = True
+
+
 # ============================================================================
 # MOCK FIXTURES
 # ============================================================================
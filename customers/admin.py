@@ -14,7 +14,6 @@ class CustomerDashboardAdmin(admin.ModelAdmin):
     list_display = ['customer', 'default_project', 'show_abandoned_carts', 'updated_at']
     search_fields = ['customer__username', 'customer__email']
     raw_id_fields = ['customer', 'default_project']
-    filter_horizontal = ['last_viewed_products']
 
 
 @admin.register(CustomerImpactMetrics)
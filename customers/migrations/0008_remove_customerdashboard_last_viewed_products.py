@@ -0,0 +1,62 @@
+# Generated by Django 4.2.25 on 2026-10-19 01:01
+
+from django.db import migrations
+from django.db.models import Max
+
+RECENT_LIMIT = 20  # products.recently_viewed.RECENT_LIMIT when this migration was written
+
+
+def seed_recently_viewed(apps, schema_editor):
+    """
+    Carry each customer's history over to RecentlyViewedProduct before the
+    dashboard M2M is dropped: their latest RECENT_LIMIT distinct products from
+    ProductView, topped up from the M2M (dated by the dashboard's last update)
+    for customers with fewer tracked views
+    """
+    ProductView = apps.get_model('products', 'ProductView')
+    RecentlyViewedProduct = apps.get_model('products', 'RecentlyViewedProduct')
+    CustomerDashboard = apps.get_model('customers', 'CustomerDashboard')
+    LastViewed = CustomerDashboard.last_viewed_products.through
+
+    recent = {}
+    views = ProductView.objects.filter(customer__isnull=False).order_by().values(
+        'customer_id', 'product_id'
+    ).annotate(viewed_at=Max('viewed_at')).order_by('customer_id', '-viewed_at')
+    for row in views.iterator():
+        products = recent.setdefault(row['customer_id'], {})
+        if len(products) < RECENT_LIMIT:
+            products[row['product_id']] = row['viewed_at']
+
+    legacy = LastViewed.objects.values_list(
+        'customerdashboard__customer_id', 'product_id', 'customerdashboard__updated_at'
+    )
+    for customer_id, product_id, viewed_at in legacy.iterator():
+        products = recent.setdefault(customer_id, {})
+        if len(products) < RECENT_LIMIT:
+            products.setdefault(product_id, viewed_at)
+
+    RecentlyViewedProduct.objects.bulk_create(
+        [
+            RecentlyViewedProduct(customer_id=customer_id, product_id=product_id, viewed_at=viewed_at)
+            for customer_id, products in recent.items()
+            for product_id, viewed_at in products.items()
+        ],
+        ignore_conflicts=True,
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0007_alter_notificationlog_customer'),
+        ('products', '0008_recentlyviewedproduct'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_recently_viewed, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='customerdashboard',
+            name='last_viewed_products',
+        ),
+    ]
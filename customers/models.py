@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models import Count, Sum, F, Q, Value, DecimalField
+from django.db.models.functions import Coalesce
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from decimal import Decimal
@@ -16,9 +18,6 @@ class CustomerDashboard(models.Model):
     default_project = models.ForeignKey('projects.CommunityProject', on_delete=models.SET_NULL, null=True, blank=True, related_name='default_for_customers')
     show_abandoned_carts = models.BooleanField(default=True)
     
-    # Last viewed
-    last_viewed_products = models.ManyToManyField('products.Product', blank=True, related_name='viewed_by_customers')
-    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -278,6 +277,26 @@ class SocialShare(models.Model):
         return f"{self.get_platform_display()} share of {self.get_share_type_display()} by {self.user.username if self.user else 'Anonymous'}"
 
 
+class WishlistQuerySet(models.QuerySet):
+    def with_totals(self):
+        """Annotate item count and value so list pages don't query per wishlist"""
+        return self.annotate(
+            num_items=Count('items'),
+            items_value=Coalesce(
+                Sum('items__product__price', filter=Q(items__product__is_active=True)),
+                Value(Decimal('0')), output_field=DecimalField(max_digits=12, decimal_places=2)
+            ),
+        )
+    
+    def with_items(self):
+        """Prefetch items with their products, vendors and active promotions"""
+        from products.models import active_promotion_prefetch
+        return self.prefetch_related(
+            models.Prefetch('items', queryset=WishlistItem.objects.select_related('product', 'product__vendor')),
+            active_promotion_prefetch('items__product__promotion_links'),
+        )
+
+
 class Wishlist(models.Model):
     """
     Customer wishlists for saving products
@@ -292,6 +311,8 @@ class Wishlist(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = WishlistQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-is_default', '-created_at']
         indexes = [
@@ -312,12 +333,17 @@ class Wishlist(models.Model):
             self.share_token = token
         super().save(*args, **kwargs)
     
+    # Totals use the with_totals() annotations when present
     @property
     def item_count(self):
+        if hasattr(self, 'num_items'):
+            return self.num_items
         return self.items.count()
     
     @property
     def total_value(self):
+        if hasattr(self, 'items_value'):
+            return self.items_value
         return sum(item.product.price for item in self.items.all() if item.product.is_active)
 
 
@@ -447,6 +473,30 @@ class PriceAlert(models.Model):
         self.save(update_fields=['notification_sent', 'notified_at'])
 
 
+class GiftRegistryQuerySet(models.QuerySet):
+    def with_totals(self):
+        """Annotate item, value and purchase totals so list pages don't query per registry"""
+        return self.annotate(
+            num_items=Count('items'),
+            items_value=Coalesce(
+                Sum(F('items__product__price') * F('items__quantity'), filter=Q(items__product__is_active=True)),
+                Value(Decimal('0')), output_field=DecimalField(max_digits=12, decimal_places=2)
+            ),
+            quantity_purchased_total=Coalesce(Sum('items__quantity_purchased'), 0),
+            quantity_needed_total=Coalesce(Sum('items__quantity'), 0),
+        )
+    
+    def with_items(self):
+        """Prefetch items with their products, vendors, purchasers and active promotions"""
+        from products.models import active_promotion_prefetch
+        return self.prefetch_related(
+            models.Prefetch('items', queryset=GiftRegistryItem.objects.select_related(
+                'product', 'product__vendor', 'purchased_by'
+            )),
+            active_promotion_prefetch('items__product__promotion_links'),
+        )
+
+
 class GiftRegistry(models.Model):
     """
     Gift registry for customers
@@ -472,6 +522,8 @@ class GiftRegistry(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = GiftRegistryQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-created_at']
         indexes = [
@@ -492,21 +544,31 @@ class GiftRegistry(models.Model):
             self.share_token = token
         super().save(*args, **kwargs)
     
+    # Totals use the with_totals() annotations when present
     @property
     def item_count(self):
+        if hasattr(self, 'num_items'):
+            return self.num_items
         return self.items.count()
     
     @property
     def total_value(self):
+        if hasattr(self, 'items_value'):
+            return self.items_value
         return sum(item.product.price * item.quantity for item in self.items.all() if item.product.is_active)
     
     @property
     def purchased_count(self):
+        if hasattr(self, 'quantity_purchased_total'):
+            return self.quantity_purchased_total
         return sum(item.quantity_purchased for item in self.items.all())
     
     @property
     def completion_percentage(self):
-        total_needed = sum(item.quantity for item in self.items.all())
+        if hasattr(self, 'quantity_needed_total'):
+            total_needed = self.quantity_needed_total
+        else:
+            total_needed = sum(item.quantity for item in self.items.all())
         if total_needed == 0:
             return 0
         return (self.purchased_count / total_needed) * 100
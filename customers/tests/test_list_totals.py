@@ -0,0 +1,96 @@
+"""
+Test annotated wishlist and gift registry totals
+"""
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from customers.models import Wishlist, WishlistItem, GiftRegistry, GiftRegistryItem
+from vendors.models import ProductPromotion
+
+
+def count_queries(func):
+    with CaptureQueriesContext(connection) as ctx:
+        result = func()
+    # Ignore django-silk's profiling queries (DEBUG only)
+    return result, len([
+        q for q in ctx.captured_queries
+        if not q['sql'].startswith(('EXPLAIN', 'SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT'))
+        and '"silk_' not in q['sql']
+    ])
+
+
+@pytest.fixture
+def wishlists(customer_user, products):
+    """Three wishlists; one inactive product in the first"""
+    lists = [Wishlist.objects.create(customer=customer_user, name=f'List {i}', is_default=i == 0) for i in range(3)]
+    for wishlist in lists:
+        WishlistItem.objects.bulk_create([WishlistItem(wishlist=wishlist, product=p) for p in products[:3]])
+    products[0].is_active = False
+    products[0].save()
+    return lists
+
+
+@pytest.fixture
+def registries(customer_user, products):
+    """Two registries with quantities and purchases"""
+    registries = [GiftRegistry.objects.create(customer=customer_user, name=f'Registry {i}') for i in range(2)]
+    for registry in registries:
+        GiftRegistryItem.objects.bulk_create([
+            GiftRegistryItem(registry=registry, product=products[1], quantity=2, quantity_purchased=1),
+            GiftRegistryItem(registry=registry, product=products[2], quantity=2, quantity_purchased=0),
+        ])
+    return registries
+
+
+@pytest.mark.unit
+class TestListTotals:
+    """Test annotations match the per-instance properties"""
+
+    def test_wishlist_totals(self, wishlists):
+        """Test with_totals() loads every wishlist's totals in one query"""
+        plain = Wishlist.objects.get(pk=wishlists[0].pk)
+
+        annotated, queries = count_queries(lambda: [
+            (w.item_count, w.total_value) for w in Wishlist.objects.with_totals()
+        ])
+
+        assert queries == 1
+        assert annotated[0] == (plain.item_count, plain.total_value) == (3, 50)
+
+    def test_gift_registry_totals(self, registries):
+        """Test with_totals() matches the computed registry totals"""
+        plain = GiftRegistry.objects.get(pk=registries[0].pk)
+        annotated = GiftRegistry.objects.with_totals().get(pk=registries[0].pk)
+
+        for registry in (plain, annotated):
+            assert registry.item_count == 2
+            assert registry.total_value == 100  # 2 x 20 + 2 x 30
+            assert registry.purchased_count == 1
+            assert registry.completion_percentage == 25
+
+    def test_with_items_prefetches_promotions(self, wishlists, products, promotion):
+        """Test item products and their active promotions load without per-item queries"""
+        ProductPromotion.objects.create(promotion=promotion, product=products[1])
+
+        def render_items():
+            wishlist = Wishlist.objects.with_items().get(pk=wishlists[1].pk)
+            return [(item.product.vendor_display_name, item.product.promotion_price) for item in wishlist.items.all()]
+
+        items, queries = count_queries(render_items)
+
+        assert queries == 3  # wishlist, items with products and vendors, active promotion links
+        assert sorted(price for _, price in items) == [10, 15, 30]
+
+    def test_list_pages_do_not_query_per_row(self, client, customer_user, wishlists, registries):
+        """Test list pages cost the same number of queries with more lists"""
+        client.force_login(customer_user)
+        client.get(reverse('wishlist_list'))  # warm per-customer caches (navbar cart badge)
+
+        _, wishlist_queries = count_queries(lambda: client.get(reverse('wishlist_list')))
+        _, registry_queries = count_queries(lambda: client.get(reverse('gift_registry_list')))
+        Wishlist.objects.create(customer=customer_user, name='Another')
+        GiftRegistry.objects.create(customer=customer_user, name='Another')
+
+        assert count_queries(lambda: client.get(reverse('wishlist_list')))[1] == wishlist_queries
+        assert count_queries(lambda: client.get(reverse('gift_registry_list')))[1] == registry_queries
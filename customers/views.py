@@ -1,5 +1,6 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
+from mushanaicore.db_router import use_replica
 from django.contrib import messages
 from django.db.models import Sum, Count, Q, Avg
 from django.contrib.auth import get_user_model
@@ -366,6 +367,7 @@ def notifications_dashboard(request):
 
 
 @login_required
+@use_replica
 def gamification_dashboard(request):
     """
     Show gamification status, achievements, leaderboards, and challenges
@@ -582,17 +584,17 @@ def wishlist_list(request):
         messages.error(request, 'Access denied. Customer access required.')
         return redirect('home')
     
-    wishlists = Wishlist.objects.filter(customer=request.user).order_by('-is_default', '-created_at')
+    wishlists = Wishlist.objects.filter(customer=request.user).with_totals().order_by('-is_default', '-created_at')
     
     # Get or create default wishlist
-    default_wishlist = wishlists.filter(is_default=True).first()
+    default_wishlist = next((w for w in wishlists if w.is_default), None)
     if not default_wishlist:
         default_wishlist = Wishlist.objects.create(
             customer=request.user,
             name='My Wishlist',
             is_default=True
         )
-        wishlists = Wishlist.objects.filter(customer=request.user).order_by('-is_default', '-created_at')
+        wishlists = Wishlist.objects.filter(customer=request.user).with_totals().order_by('-is_default', '-created_at')
     
     context = {
         'wishlists': wishlists,
@@ -610,8 +612,8 @@ def wishlist_detail(request, wishlist_id):
         messages.error(request, 'Access denied. Customer access required.')
         return redirect('home')
     
-    wishlist = get_object_or_404(Wishlist, id=wishlist_id, customer=request.user)
-    items = WishlistItem.objects.filter(wishlist=wishlist).select_related('product', 'product__vendor').order_by('-priority', '-added_at')
+    wishlist = get_object_or_404(Wishlist.objects.with_totals().with_items(), id=wishlist_id, customer=request.user)
+    items = wishlist.items.all()
     
     context = {
         'wishlist': wishlist,
@@ -739,8 +741,8 @@ def wishlist_share(request, share_token):
     """
     Public view of a shared wishlist
     """
-    wishlist = get_object_or_404(Wishlist, share_token=share_token, is_public=True)
-    items = WishlistItem.objects.filter(wishlist=wishlist).select_related('product', 'product__vendor').order_by('-priority', '-added_at')
+    wishlist = get_object_or_404(Wishlist.objects.with_totals().with_items(), share_token=share_token, is_public=True)
+    items = wishlist.items.all()
     
     context = {
         'wishlist': wishlist,
@@ -843,7 +845,7 @@ def gift_registry_list(request):
         messages.error(request, 'Access denied. Customer access required.')
         return redirect('home')
     
-    registries = GiftRegistry.objects.filter(customer=request.user).order_by('-created_at')
+    registries = GiftRegistry.objects.filter(customer=request.user).with_totals().order_by('-created_at')
     
     context = {
         'registries': registries,
@@ -860,8 +862,8 @@ def gift_registry_detail(request, registry_id):
         messages.error(request, 'Access denied. Customer access required.')
         return redirect('home')
     
-    registry = get_object_or_404(GiftRegistry, id=registry_id, customer=request.user)
-    items = GiftRegistryItem.objects.filter(registry=registry).select_related('product', 'product__vendor', 'purchased_by').order_by('-priority', '-added_at')
+    registry = get_object_or_404(GiftRegistry.objects.with_totals().with_items(), id=registry_id, customer=request.user)
+    items = registry.items.all()
     
     context = {
         'registry': registry,
@@ -874,8 +876,8 @@ def gift_registry_public(request, share_token):
     """
     Public view of a shared gift registry
     """
-    registry = get_object_or_404(GiftRegistry, share_token=share_token, is_public=True, status='ACTIVE')
-    items = GiftRegistryItem.objects.filter(registry=registry).select_related('product', 'product__vendor').order_by('-priority', '-added_at')
+    registry = get_object_or_404(GiftRegistry.objects.with_totals().with_items(), share_token=share_token, is_public=True, status='ACTIVE')
+    items = registry.items.all()
     
     context = {
         'registry': registry,
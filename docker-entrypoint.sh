@@ -23,10 +23,27 @@ else:
     print('ℹ️  Superuser already exists')
 EOF
 
+# SERVER_MODE=asgi serves mushanaicore.asgi with Uvicorn workers: async views
+# (e.g. social media posting) wait on remote APIs without holding a worker
+SERVER_MODE=${SERVER_MODE:-wsgi}
+WEB_CONCURRENCY=${WEB_CONCURRENCY:-3}
+
+if [ "$SERVER_MODE" = "asgi" ]; then
+    echo "🚀 Starting Gunicorn (ASGI, Uvicorn workers)..."
+    exec gunicorn mushanaicore.asgi:application \
+        --worker-class uvicorn_worker.UvicornWorker \
+        --bind 0.0.0.0:8000 \
+        --workers "$WEB_CONCURRENCY" \
+        --timeout 120 \
+        --access-logfile - \
+        --error-logfile - \
+        --log-level info
+fi
+
 echo "🚀 Starting Gunicorn..."
 exec gunicorn mushanaicore.wsgi:application \
     --bind 0.0.0.0:8000 \
-    --workers 3 \
+    --workers "$WEB_CONCURRENCY" \
     --timeout 120 \
     --access-logfile - \
     --error-logfile - \
@@ -0,0 +1,254 @@
+"""
+Loyalty points ledger
+
+Every change to a LoyaltyAccount balance goes through post_points(), which
+locks the account row, writes one LoyaltyPointsTransaction with the new
+balance_after snapshot and updates the account totals in the same
+transaction. Balance reads are then a single row lookup.
+"""
+from datetime import timedelta
+from decimal import Decimal, ROUND_DOWN
+from django.conf import settings
+from django.db import transaction, IntegrityError
+from django.db.models import Sum, Q, F, Value, IntegerField
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from .models import LoyaltyAccount, LoyaltyPointsTransaction, RewardRedemption
+
+
+POINTS_PER_DOLLAR = getattr(settings, 'LOYALTY_POINTS_PER_DOLLAR', 1)
+POINTS_EXPIRY_DAYS = getattr(settings, 'LOYALTY_POINTS_EXPIRY_DAYS', 365)
+
+
+class InsufficientPointsError(Exception):
+    """Raised when a debit would take an account below zero"""
+
+
+def get_account(customer):
+    """Get or create the loyalty account for a customer"""
+    account, _ = LoyaltyAccount.objects.get_or_create(customer=customer)
+    return account
+
+
+def get_balance(customer):
+    """Available points for a customer (single row read)"""
+    return LoyaltyAccount.objects.filter(customer=customer).values_list(
+        'available_points', flat=True
+    ).first() or 0
+
+
+def post_points(account, points, transaction_type, source, idempotency_key=None,
+                description=None, expires_at=None, **related):
+    """
+    Post a credit (points > 0) or debit (points < 0) to an account.
+
+    The account row is locked for the duration of the posting so concurrent
+    redemptions are serialized. If idempotency_key has already been posted
+    the existing transaction is returned and nothing changes.
+    """
+    if idempotency_key:
+        existing = LoyaltyPointsTransaction.objects.filter(idempotency_key=idempotency_key).first()
+        if existing:
+            return existing
+
+    try:
+        with transaction.atomic():
+            account = LoyaltyAccount.objects.select_for_update().get(pk=account.pk)
+
+            # Re-check under the lock in case another worker posted the same key
+            if idempotency_key:
+                existing = LoyaltyPointsTransaction.objects.filter(idempotency_key=idempotency_key).first()
+                if existing:
+                    return existing
+
+            new_balance = account.available_points + points
+            if new_balance < 0:
+                raise InsufficientPointsError(
+                    f"Account {account.pk} has {account.available_points} points, cannot debit {abs(points)}"
+                )
+
+            account.available_points = new_balance
+            account.total_points = max(account.total_points + points, 0)
+            update_fields = ['available_points', 'total_points', 'updated_at']
+            if points > 0 and transaction_type == 'EARNED':
+                account.lifetime_points += points
+                update_fields.append('lifetime_points')
+            account.save(update_fields=update_fields)
+
+            return LoyaltyPointsTransaction.objects.create(
+                loyalty_account=account,
+                transaction_type=transaction_type,
+                source=source,
+                points=points,
+                balance_after=new_balance,
+                idempotency_key=idempotency_key,
+                expires_at=expires_at,
+                description=description,
+                **related
+            )
+    except IntegrityError:
+        # Unique idempotency_key raced with a posting on another account row
+        if idempotency_key:
+            existing = LoyaltyPointsTransaction.objects.filter(idempotency_key=idempotency_key).first()
+            if existing:
+                return existing
+        raise
+
+
+def points_for_amount(amount):
+    """Points earned for a purchase amount"""
+    points = (Decimal(amount or 0) * POINTS_PER_DOLLAR).quantize(Decimal('1'), rounding=ROUND_DOWN)
+    return int(points)
+
+
+def award_purchase_points(order):
+    """
+    Award points for a paid order. Safe to call repeatedly for the same order.
+    """
+    points = points_for_amount(order.total)
+    if points <= 0:
+        return None
+
+    account = get_account(order.customer)
+    return post_points(
+        account,
+        points,
+        transaction_type='EARNED',
+        source='PURCHASE',
+        idempotency_key=f"order:{order.pk}:earned",
+        description=f"Points for order {order.order_number}",
+        expires_at=timezone.now() + timedelta(days=POINTS_EXPIRY_DAYS),
+        order=order,
+    )
+
+
+def redeem_reward(customer, reward):
+    """
+    Redeem a reward with loyalty points.
+    Raises InsufficientPointsError when the balance is too low.
+    """
+    account = get_account(customer)
+    with transaction.atomic():
+        redemption = RewardRedemption.objects.create(
+            customer=customer,
+            reward=reward,
+            points_used=reward.points_required,
+        )
+        post_points(
+            account,
+            -reward.points_required,
+            transaction_type='REDEEMED',
+            source='REDEMPTION',
+            idempotency_key=f"redemption:{redemption.pk}",
+            description=f"Redeemed {reward.name}",
+            reward_redemption=redemption,
+        )
+        type(reward).objects.filter(pk=reward.pk).update(total_redemptions=F('total_redemptions') + 1)
+    return redemption
+
+
+def _expiry_candidates(now):
+    """
+    Accounts that may have points to expire: expired credits not yet fully
+    written off by EXPIRED debits. An upper bound (redemptions may already
+    have used the credits), computed for every account in one grouped query.
+    """
+    zero = Value(0, output_field=IntegerField())
+    return LoyaltyAccount.objects.annotate(
+        expired_credits=Coalesce(Sum(
+            'transactions__points',
+            filter=Q(transactions__points__gt=0, transactions__expires_at__lte=now)
+        ), zero),
+        written_off=Coalesce(Sum(
+            'transactions__points',
+            filter=Q(transactions__transaction_type='EXPIRED')
+        ), zero),
+    ).annotate(
+        outstanding=F('expired_credits') + F('written_off')
+    ).filter(outstanding__gt=0)
+
+
+def _points_to_expire(transactions, now):
+    """
+    Points left on an account's expired credits, given its transactions in
+    posting order.
+
+    Credits are lots; each redemption or adjustment uses up the oldest lots
+    first (FIFO), whether or not they expire. EXPIRED debits write off the
+    lots that expire soonest.
+    """
+    lots = []  # [expires_at, points remaining], oldest first
+    for txn in transactions:
+        if txn.points > 0:
+            lots.append([txn.expires_at, txn.points])
+            continue
+        owed = -txn.points
+        if txn.transaction_type == 'EXPIRED':
+            consumed = sorted((lot for lot in lots if lot[0] is not None), key=lambda lot: lot[0])
+        else:
+            consumed = lots
+        for lot in consumed:
+            if not owed:
+                break
+            used = min(lot[1], owed)
+            lot[1] -= used
+            owed -= used
+    return sum(remaining for expires_at, remaining in lots if expires_at is not None and expires_at <= now)
+
+
+def expire_points(now=None, batch_size=500):
+    """
+    Expire outstanding points for all accounts in bulk.
+    Returns the number of accounts and points expired.
+    """
+    now = now or timezone.now()
+    account_ids = list(_expiry_candidates(now).order_by('pk').values_list('pk', flat=True))
+
+    accounts_expired = 0
+    points_expired = 0
+    for start in range(0, len(account_ids), batch_size):
+        batch_ids = account_ids[start:start + batch_size]
+        with transaction.atomic():
+            # Lock in pk order so we never deadlock with post_points()
+            accounts = {
+                account.pk: account
+                for account in LoyaltyAccount.objects.select_for_update().filter(pk__in=batch_ids).order_by('pk')
+            }
+            # Walk the ledgers under the lock; balances may have moved since the scan
+            ledgers = {account_id: [] for account_id in accounts}
+            for txn in LoyaltyPointsTransaction.objects.filter(
+                loyalty_account_id__in=batch_ids
+            ).order_by('loyalty_account_id', 'created_at', 'pk').only(
+                'loyalty_account_id', 'transaction_type', 'points', 'expires_at'
+            ):
+                ledgers[txn.loyalty_account_id].append(txn)
+            due = {account_id: _points_to_expire(ledger, now) for account_id, ledger in ledgers.items()}
+
+            expired_transactions = []
+            for account_id, points in due.items():
+                account = accounts[account_id]
+                points = min(points, account.available_points)
+                if points <= 0:
+                    continue
+                account.available_points -= points
+                account.total_points = max(account.total_points - points, 0)
+                account.updated_at = now
+                expired_transactions.append(LoyaltyPointsTransaction(
+                    loyalty_account=account,
+                    transaction_type='EXPIRED',
+                    source='EXPIRATION',
+                    points=-points,
+                    balance_after=account.available_points,
+                    idempotency_key=f"expiry:{account_id}:{now.isoformat()}",
+                    description='Points expired',
+                ))
+                points_expired += points
+
+            LoyaltyPointsTransaction.objects.bulk_create(expired_transactions)
+            LoyaltyAccount.objects.bulk_update(
+                [t.loyalty_account for t in expired_transactions],
+                ['available_points', 'total_points', 'updated_at']
+            )
+            accounts_expired += len(expired_transactions)
+
+    return accounts_expired, points_expired
@@ -0,0 +1,16 @@
+"""
+Management command to expire loyalty points (run daily from cron)
+"""
+from django.core.management.base import BaseCommand
+from loyalty.ledger import expire_points
+
+
+class Command(BaseCommand):
+    help = 'Expire loyalty points past their expiry date (FIFO) for all accounts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Accounts locked per transaction')
+
+    def handle(self, *args, **options):
+        accounts, points = expire_points(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Expired {points} points across {accounts} accounts'))
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.25 on 2026-10-19 00:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loyalty', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='loyaltypointstransaction',
+            name='expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='loyaltypointstransaction',
+            name='idempotency_key',
+            field=models.CharField(blank=True, max_length=100, null=True, unique=True),
+        ),
+        migrations.AddIndex(
+            model_name='loyaltypointstransaction',
+            index=models.Index(fields=['transaction_type', 'expires_at'], name='loyalty_loy_transac_644a72_idx'),
+        ),
+    ]
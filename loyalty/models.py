@@ -89,12 +89,18 @@ class LoyaltyPointsTransaction(models.Model):
     reward_redemption = models.ForeignKey('RewardRedemption', on_delete=models.SET_NULL, null=True, blank=True, related_name='transactions')
     
     description = models.TextField(blank=True, null=True)
+    
+    # Ledger bookkeeping
+    idempotency_key = models.CharField(max_length=100, unique=True, blank=True, null=True)  # e.g. order:<id>:earned
+    expires_at = models.DateTimeField(blank=True, null=True)  # Only set on EARNED rows
+    
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['loyalty_account', 'created_at']),
+            models.Index(fields=['transaction_type', 'expires_at']),
         ]
     
     def __str__(self):
@@ -0,0 +1,14 @@
+"""
+Loyalty Signals
+Award points when orders are paid
+"""
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from .ledger import award_purchase_points
+
+
+@receiver(post_save, sender='orders.Order')
+def on_order_paid(sender, instance, **kwargs):
+    """Award purchase points once an order is paid (idempotent per order)"""
+    if instance.payment_status == 'PAID' and instance.customer_id:
+        award_purchase_points(instance)
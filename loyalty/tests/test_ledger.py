@@ -0,0 +1,109 @@
+"""
+Test loyalty points ledger
+"""
+import pytest
+from decimal import Decimal
+from datetime import timedelta
+from django.utils import timezone
+from loyalty.ledger import (
+    get_account,
+    get_balance,
+    post_points,
+    redeem_reward,
+    expire_points,
+    InsufficientPointsError,
+)
+from loyalty.models import LoyaltyPointsTransaction, Reward
+
+
+@pytest.fixture
+def paid_order(db, customer_user):
+    """Create a paid order"""
+    from orders.models import Order
+    # bulk_create skips post_save so the test controls when the signal fires
+    order, = Order.objects.bulk_create([Order(
+        order_number='ORD-TEST-1',
+        customer=customer_user,
+        subtotal=Decimal('120.50'),
+        total=Decimal('120.50'),
+        shipping_address='1 Test Street',
+        shipping_city='Harare',
+        shipping_phone='0771234567',
+        payment_status='PAID',
+    )])
+    return order
+
+
+@pytest.mark.unit
+class TestLoyaltyLedger:
+    """Test point postings, redemptions and expiry"""
+
+    def test_paid_order_awards_points_once(self, customer_user, paid_order):
+        """Test purchase points are idempotent per order"""
+        paid_order.save()
+        paid_order.save()  # Saving again must not award twice
+
+        assert get_balance(customer_user) == 120
+        assert LoyaltyPointsTransaction.objects.filter(order=paid_order).count() == 1
+        account = get_account(customer_user)
+        assert account.lifetime_points == 120
+
+    def test_debit_cannot_overdraw(self, customer_user):
+        """Test redemptions cannot take the balance below zero"""
+        account = get_account(customer_user)
+        post_points(account, 50, 'EARNED', 'ADMIN')
+
+        with pytest.raises(InsufficientPointsError):
+            post_points(account, -60, 'REDEEMED', 'REDEMPTION')
+
+        assert get_balance(customer_user) == 50
+
+    def test_redeem_reward(self, customer_user):
+        """Test reward redemption debits points with a balance snapshot"""
+        account = get_account(customer_user)
+        post_points(account, 100, 'EARNED', 'ADMIN')
+        reward = Reward.objects.create(name='Discount', description='10% off', reward_type='DISCOUNT', points_required=80)
+
+        redemption = redeem_reward(customer_user, reward)
+
+        assert redemption.points_used == 80
+        assert get_balance(customer_user) == 20
+        assert redemption.transactions.get().balance_after == 20
+
+    def test_expire_points_fifo(self, customer_user):
+        """Test expiry only removes unspent points from expired credits"""
+        account = get_account(customer_user)
+        now = timezone.now()
+        post_points(account, 100, 'EARNED', 'ADMIN', expires_at=now - timedelta(days=1))
+        post_points(account, 50, 'EARNED', 'ADMIN', expires_at=now + timedelta(days=30))
+        post_points(account, -30, 'REDEEMED', 'REDEMPTION')
+
+        accounts, points = expire_points(now=now)
+
+        # 30 redeemed points came out of the expired 100 credit first
+        assert (accounts, points) == (1, 70)
+        assert get_balance(customer_user) == 50
+        expired = LoyaltyPointsTransaction.objects.get(transaction_type='EXPIRED')
+        assert expired.points == -70
+        assert expired.balance_after == 50
+
+        # Running again expires nothing
+        assert expire_points(now=now) == (0, 0)
+
+    def test_expire_points_fifo_with_older_non_expiring_credit(self, customer_user):
+        """Test redemptions use up an older non-expiring credit before later expiring ones"""
+        account = get_account(customer_user)
+        now = timezone.now()
+        post_points(account, 100, 'ADJUSTED', 'ADMIN')
+        post_points(account, 100, 'EARNED', 'PURCHASE', expires_at=now - timedelta(days=1))
+        post_points(account, -30, 'REDEEMED', 'REDEMPTION')
+
+        # The redemption came out of the bonus, so the whole expired credit is still unspent
+        assert expire_points(now=now) == (1, 100)
+        assert get_balance(customer_user) == 70
+        assert expire_points(now=now) == (0, 0)
+
+        # Later credits expire on their own; the written-off lot is not counted again
+        post_points(account, 40, 'EARNED', 'PURCHASE', expires_at=now + timedelta(days=1))
+        assert expire_points(now=now + timedelta(days=2)) == (1, 40)
+        assert get_balance(customer_user) == 70
@@ -4,6 +4,7 @@ from .models import (
     BillOfMaterials, BOMItem, ManufacturingOrder,
     QualityCheck, ProductionWorker, ManufacturingAnalytics
 )
+from .costing import recalculate_bom_costs
 
 
 class BOMItemInline(admin.TabularInline):
@@ -41,10 +42,7 @@ class BillOfMaterialsAdmin(admin.ModelAdmin):
     actions = ['recalculate_costs']
     
     def recalculate_costs(self, request, queryset):
-        count = 0
-        for bom in queryset:
-            bom.calculate_costs()
-            count += 1
+        count = recalculate_bom_costs(bom_ids=list(queryset.values_list('pk', flat=True)))
         self.message_user(request, f'Costs recalculated for {count} BOM(s).', messages.SUCCESS)
     recalculate_costs.short_description = "Recalculate costs for selected BOMs"
 
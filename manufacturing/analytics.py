@@ -0,0 +1,150 @@
+"""
+Monthly manufacturing analytics rollup
+
+refresh_manufacturing_analytics() (run nightly from cron) recomputes the
+ManufacturingAnalytics rows of every vendor for recent months with two
+grouped queries - completed manufacturing orders by completion month and
+production work by work month - and upserts them. Analytics pages then read
+a handful of precomputed rows instead of aggregating orders and workers
+live, and cross-vendor (ministry) figures are a sum over the same rows.
+"""
+from datetime import date
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Avg, Count, DecimalField, ExpressionWrapper, F, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+from .models import ManufacturingAnalytics, ManufacturingOrder, ProductionWorker
+
+COMMUNITY_CONTRIBUTION_RATE = Decimal('0.01')  # 1% of production value
+MONEY = Decimal('0.01')
+
+ZERO = Decimal('0')
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def add_months(month, count):
+    """First day of the month `count` months after (or before) `month`"""
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def recent_months(count, today=None):
+    """The first days of the last `count` months, oldest first, ending with this month"""
+    this_month = month_start(today or timezone.localdate())
+    return [add_months(this_month, -offset) for offset in range(count - 1, -1, -1)]
+
+
+def _as_date(value):
+    # TruncMonth over a DateTimeField returns an aware datetime
+    return value.date() if hasattr(value, 'date') else value
+
+
+def refresh_manufacturing_analytics(months=2, today=None):
+    """
+    Recompute the last `months` months (this month included) for all vendors.
+    Returns the number of vendor-month rows written.
+    """
+    periods = recent_months(months, today)
+    since, until = periods[0], add_months(periods[-1], 1)
+
+    orders = ManufacturingOrder.objects.filter(
+        status='COMPLETED',
+        completed_at__date__gte=since,
+        completed_at__date__lt=until,
+    ).annotate(month=TruncMonth('completed_at')).order_by().values('vendor_id', 'month').annotate(
+        orders=Count('id'),
+        units=Sum('quantity_produced'),
+        production_cost=Sum('actual_cost'),
+        material_cost=Sum(ExpressionWrapper(
+            F('bom__total_material_cost') * F('quantity_produced'),
+            output_field=DecimalField(max_digits=24, decimal_places=4),
+        )),
+        local_percentage=Avg('local_materials_percentage'),
+    )
+    work = ProductionWorker.objects.filter(
+        work_date__gte=since,
+        work_date__lt=until,
+    ).annotate(month=TruncMonth('work_date')).order_by().values('vendor_id', 'month').annotate(
+        workers=Count('worker_name', distinct=True),
+        hours=Sum('hours_worked'),
+        wages=Sum('total_payment'),
+    )
+
+    rows = {}
+    for row in orders:
+        rollup = rows.setdefault((row['vendor_id'], _as_date(row['month'])), {})
+        rollup.update(row)
+    for row in work:
+        rollup = rows.setdefault((row['vendor_id'], _as_date(row['month'])), {})
+        rollup.update(row)
+
+    now = timezone.now()
+    analytics = []
+    for (vendor_id, month), row in rows.items():
+        production_cost = row.get('production_cost') or ZERO
+        analytics.append(ManufacturingAnalytics(
+            vendor_id=vendor_id,
+            month=month,
+            total_orders=row.get('orders', 0),
+            total_units_produced=row.get('units') or ZERO,
+            total_production_cost=production_cost,
+            local_materials_percentage=Decimal(row.get('local_percentage') or 0).quantize(MONEY),
+            total_material_cost=Decimal(row.get('material_cost') or 0).quantize(MONEY),
+            total_workers=row.get('workers', 0),
+            total_hours_worked=row.get('hours') or ZERO,
+            total_wages_paid=row.get('wages') or ZERO,
+            community_contribution=(production_cost * COMMUNITY_CONTRIBUTION_RATE).quantize(MONEY),
+            created_at=now,
+            updated_at=now,
+        ))
+
+    with transaction.atomic():
+        ManufacturingAnalytics.objects.bulk_create(
+            analytics,
+            update_conflicts=True,
+            unique_fields=['vendor', 'month'],
+            update_fields=['total_orders', 'total_units_produced', 'total_production_cost',
+                           'local_materials_percentage', 'total_material_cost', 'total_workers',
+                           'total_hours_worked', 'total_wages_paid', 'community_contribution', 'updated_at'],
+            batch_size=1000,
+        )
+        # Vendor-months whose activity was deleted or moved drop out
+        ManufacturingAnalytics.objects.filter(month__in=periods, updated_at__lt=now).delete()
+    return len(analytics)
+
+
+def vendor_monthly_trend(vendor, months=12, today=None):
+    """
+    The vendor's rollup rows for the last `months` months, oldest first, with
+    unsaved zero rows filling months without activity (one query).
+    """
+    periods = recent_months(months, today)
+    stored = {row.month: row for row in ManufacturingAnalytics.objects.filter(vendor=vendor, month__in=periods)}
+    return [stored.get(month) or ManufacturingAnalytics(vendor=vendor, month=month) for month in periods]
+
+
+def job_creation_summary(months=12, today=None):
+    """
+    Cross-vendor production and job-creation figures per month, oldest first
+    (one grouped query over the rollup).
+    """
+    periods = recent_months(months, today)
+    stored = {
+        row['month']: row
+        for row in ManufacturingAnalytics.objects.filter(month__in=periods).order_by().values('month').annotate(
+            vendors=Count('vendor', distinct=True),
+            workers=Sum('total_workers'),
+            hours=Sum('total_hours_worked'),
+            wages=Sum('total_wages_paid'),
+            units=Sum('total_units_produced'),
+            production_cost=Sum('total_production_cost'),
+            community_contribution=Sum('community_contribution'),
+        )
+    }
+    empty = {'vendors': 0, 'workers': 0, 'hours': ZERO, 'wages': ZERO, 'units': ZERO,
+             'production_cost': ZERO, 'community_contribution': ZERO}
+    return [stored.get(month) or dict(empty, month=month) for month in periods]
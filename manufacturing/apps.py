@@ -6,3 +6,6 @@ class ManufacturingConfig(AppConfig):
     name = 'manufacturing'
     verbose_name = 'Manufacturing'
 
+
+    def ready(self):
+        import manufacturing.signals  # noqa
@@ -0,0 +1,103 @@
+"""
+BOM cost propagation
+
+recalculate_bom_costs() recomputes bill-of-materials costs set-wise: one
+aggregate query sums quantity * unit_price per BOM, the derived per-unit
+cost and suggested selling price are written back with one bulk_update, and
+one UPDATE refreshes the estimated cost of the affected BOMs' open
+manufacturing orders from the new per-unit cost.
+
+It runs after a raw material's unit_price changes (see signals.py), for a
+whole supplier price list via update_material_prices(), and from the
+recalculate_bom_costs management command.
+"""
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from .models import BillOfMaterials, BOMItem, ManufacturingOrder
+
+OPEN_ORDER_STATUSES = ('DRAFT', 'READY', 'IN_PROGRESS', 'QUALITY_CHECK')
+
+COST_FIELDS = ['total_material_cost', 'total_cost_per_unit', 'suggested_selling_price', 'updated_at']
+
+MONEY = Decimal('0.01')
+
+
+def _material_cost():
+    """Sum of quantity * unit_price over a BOM's items (0 for an empty BOM)"""
+    return Coalesce(
+        Sum(ExpressionWrapper(
+            F('items__quantity') * F('items__raw_material__unit_price'),
+            output_field=DecimalField(max_digits=24, decimal_places=4),
+        )),
+        Value(Decimal('0')),
+        output_field=DecimalField(max_digits=24, decimal_places=4),
+    )
+
+
+def apply_costs(bom, material_cost):
+    """Set a BOM's derived cost fields from the cost of one batch of materials"""
+    per_unit = material_cost / bom.batch_size if bom.batch_size else material_cost
+    bom.total_material_cost = per_unit.quantize(MONEY)
+    bom.total_cost_per_unit = bom.total_material_cost + bom.labor_cost_per_unit + bom.overhead_cost_per_unit
+    bom.suggested_selling_price = (bom.total_cost_per_unit * (1 + bom.markup_percentage / 100)).quantize(MONEY)
+    return bom
+
+
+def recalculate_bom_costs(material_ids=None, bom_ids=None):
+    """
+    Recompute BOMs using any of material_ids, or the given bom_ids, or every
+    BOM when neither is passed. Returns the number of BOMs updated.
+    """
+    boms = BillOfMaterials.objects.all()
+    if material_ids is not None:
+        boms = boms.filter(pk__in=BOMItem.objects.filter(raw_material_id__in=material_ids).values('bom_id'))
+    if bom_ids is not None:
+        boms = boms.filter(pk__in=bom_ids)
+
+    now = timezone.now()
+    updated = [
+        apply_costs(bom, bom.batch_material_cost)
+        for bom in boms.annotate(batch_material_cost=_material_cost()).only(
+            'id', 'batch_size', 'labor_cost_per_unit', 'overhead_cost_per_unit', 'markup_percentage',
+        )
+    ]
+    if not updated:
+        return 0
+    for bom in updated:
+        bom.updated_at = now
+
+    with transaction.atomic():
+        BillOfMaterials.objects.bulk_update(updated, COST_FIELDS, batch_size=500)
+        ManufacturingOrder.objects.filter(
+            bom_id__in=[bom.pk for bom in updated],
+            status__in=OPEN_ORDER_STATUSES,
+        ).update(
+            estimated_cost=ExpressionWrapper(
+                Subquery(BillOfMaterials.objects.filter(pk=OuterRef('bom_id')).values('total_cost_per_unit')[:1])
+                * F('quantity_to_produce'),
+                output_field=DecimalField(max_digits=12, decimal_places=2),
+            ),
+            updated_at=now,
+        )
+    return len(updated)
+
+
+def update_material_prices(prices):
+    """
+    Apply a supplier price list ({material_id: unit_price}) with one
+    bulk_update and propagate it to BOMs and open orders in one pass.
+    Returns the number of BOMs updated.
+    """
+    from suppliers.models import RawMaterial
+
+    now = timezone.now()
+    materials = [
+        RawMaterial(pk=material_id, unit_price=Decimal(str(price)), updated_at=now)
+        for material_id, price in prices.items()
+    ]
+    with transaction.atomic():
+        RawMaterial.objects.bulk_update(materials, ['unit_price', 'updated_at'], batch_size=1000)
+        return recalculate_bom_costs(material_ids=list(prices))
@@ -0,0 +1,17 @@
+"""
+Management command to recalculate BOM costs from current material prices (run after bulk price imports, or nightly from cron)
+"""
+from django.core.management.base import BaseCommand
+from manufacturing.costing import recalculate_bom_costs
+
+
+class Command(BaseCommand):
+    help = 'Recompute material and unit costs of bills of materials and the estimated cost of open manufacturing orders'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--material', type=int, action='append', dest='materials',
+                            help='Only BOMs using this raw material id (repeatable)')
+
+    def handle(self, *args, **options):
+        count = recalculate_bom_costs(material_ids=options['materials'])
+        self.stdout.write(self.style.SUCCESS(f'Recalculated costs for {count} BOMs'))
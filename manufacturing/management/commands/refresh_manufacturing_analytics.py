@@ -0,0 +1,17 @@
+"""
+Management command to roll up monthly manufacturing analytics (run nightly from cron)
+"""
+from django.core.management.base import BaseCommand
+from manufacturing.analytics import refresh_manufacturing_analytics
+
+
+class Command(BaseCommand):
+    help = 'Recompute ManufacturingAnalytics for all vendors for recent months'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months', type=int, default=2,
+                            help='Months to recompute, this month included (use a larger value to backfill)')
+
+    def handle(self, *args, **options):
+        count = refresh_manufacturing_analytics(months=max(options['months'], 1))
+        self.stdout.write(self.style.SUCCESS(f'Rolled up {count} vendor-months of manufacturing analytics'))
@@ -1,7 +1,7 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator
-from decimal import Decimal
+from accounts import numbering
 
 User = get_user_model()
 
@@ -43,32 +43,21 @@ class BillOfMaterials(models.Model):
         return f"BOM: {self.product.name}"
     
     def calculate_costs(self):
-        """Calculate all costs based on materials"""
-        # Material costs
-        material_cost = sum(
-            item.quantity * (item.raw_material.unit_price if item.raw_material else 0)
-            for item in self.items.all()
-        )
-        self.total_material_cost = material_cost / self.batch_size if self.batch_size else material_cost
+        """Recalculate all costs from current material prices (and open orders' estimates)"""
+        from .costing import recalculate_bom_costs, COST_FIELDS
         
-        # Total cost per unit
-        self.total_cost_per_unit = self.total_material_cost + self.labor_cost_per_unit + self.overhead_cost_per_unit
-        
-        # Suggested selling price
-        markup_multiplier = 1 + (self.markup_percentage / 100)
-        self.suggested_selling_price = self.total_cost_per_unit * Decimal(str(markup_multiplier))
-        
-        self.save()
+        recalculate_bom_costs(bom_ids=[self.pk])
+        self.refresh_from_db(fields=COST_FIELDS)
         return self.total_cost_per_unit
     
     def check_materials_available(self, quantity=1):
-        """Check if enough materials are available for production"""
-        batches_needed = quantity / self.batch_size if self.batch_size else quantity
+        """Check if enough materials are in stock to produce `quantity` units"""
+        from .mrp import item_requirement
         
-        for item in self.items.all():
-            required_qty = item.quantity * Decimal(str(batches_needed))
-            # Here you would check against inventory
-            # For now, just return True
+        for item in self.items.select_related('raw_material'):
+            in_stock = item.raw_material.stock_quantity or 0
+            if item_requirement(item, self, quantity) > in_stock:
+                return False
         return True
 
 
@@ -155,16 +144,12 @@ class ManufacturingOrder(models.Model):
         return f"{self.mo_number} - {self.product.name}"
     
     def save(self, *args, **kwargs):
-        if not self.mo_number:
-            from django.utils import timezone
-            timestamp = timezone.now().strftime('%Y%m%d%H%M%S')
-            self.mo_number = f"MO-{self.vendor.id}-{timestamp}"
-        
         # Calculate estimated cost
         if self.bom:
             self.estimated_cost = self.bom.total_cost_per_unit * self.quantity_to_produce
         
-        super().save(*args, **kwargs)
+        with numbering.numbered(self, 'mo_number', numbering.MANUFACTURING_ORDER, self.vendor_id):
+            super().save(*args, **kwargs)
     
     def start_production(self):
         """Start the manufacturing order"""
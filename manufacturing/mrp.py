@@ -0,0 +1,105 @@
+"""
+Material requirements planning (MRP)
+
+plan_material_requirements() explodes a vendor's open manufacturing orders
+(READY / IN_PROGRESS) through their bills of materials, nets the gross
+requirement of each raw material against stock on hand
+(RawMaterial.stock_quantity) and quantities already on order (the vendor's
+undelivered RawMaterialPurchases), and suggests purchase quantities for
+any shortage, rounded up to the material's minimum order quantity.
+
+Everything is loaded in one prefetching pass: orders with their products
+and BOMs, BOM items with their raw materials, and one grouped query for
+open purchases.
+"""
+from decimal import Decimal, ROUND_CEILING
+from django.db.models import Prefetch, Sum
+from .models import BOMItem, ManufacturingOrder
+
+OPEN_ORDER_STATUSES = ('READY', 'IN_PROGRESS')
+OPEN_PURCHASE_STATUSES = ('PENDING', 'CONFIRMED', 'PROCESSING', 'SHIPPED')
+
+QUANTITY = Decimal('0.01')
+
+
+def remaining_quantity(order):
+    """Units of an order still to be produced"""
+    if order.status == 'IN_PROGRESS':
+        return max(order.quantity_to_produce - order.quantity_produced, Decimal('0'))
+    return order.quantity_to_produce
+
+
+def item_requirement(item, bom, units):
+    """Quantity of the item's material needed to make `units` with the BOM"""
+    batches = Decimal(units) / bom.batch_size if bom.batch_size else Decimal(units)
+    return item.quantity * batches
+
+
+def suggest_purchase_quantity(shortage, min_order_quantity):
+    """The shortage rounded up to a whole number of minimum order quantities"""
+    if shortage <= 0:
+        return Decimal('0')
+    if not min_order_quantity or min_order_quantity <= 0:
+        return shortage.quantize(QUANTITY, rounding=ROUND_CEILING)
+    lots = (shortage / min_order_quantity).to_integral_value(rounding=ROUND_CEILING)
+    return (lots * min_order_quantity).quantize(QUANTITY)
+
+
+def open_orders(vendor):
+    """The vendor's open orders with products, BOMs, BOM items and raw materials prefetched"""
+    return ManufacturingOrder.objects.filter(
+        vendor=vendor,
+        status__in=OPEN_ORDER_STATUSES,
+    ).select_related('product', 'bom').prefetch_related(
+        Prefetch('bom__items', queryset=BOMItem.objects.select_related('raw_material', 'raw_material__supplier')),
+    ).order_by('scheduled_date', 'created_at')
+
+
+def open_purchase_quantities(vendor, material_ids):
+    """{material_id: quantity} the vendor has ordered but not yet received"""
+    from suppliers.models import RawMaterialPurchase
+
+    return dict(RawMaterialPurchase.objects.filter(
+        vendor=vendor,
+        material_id__in=material_ids,
+        status__in=OPEN_PURCHASE_STATUSES,
+    ).order_by().values('material_id').annotate(total=Sum('quantity')).values_list('material_id', 'total'))
+
+
+def plan_material_requirements(vendor):
+    """
+    Net material requirements for the vendor's open manufacturing orders.
+
+    Returns a list of dicts (shortages first, then by material name) with:
+    material, required, on_hand, on_order, available, shortage,
+    suggested_purchase, products and orders.
+    """
+    requirements = {}
+    for order in open_orders(vendor):
+        units = remaining_quantity(order)
+        if units <= 0:
+            continue
+        for item in order.bom.items.all():
+            material = item.raw_material
+            row = requirements.setdefault(material.pk, {
+                'material': material,
+                'required': Decimal('0'),
+                'products': [],
+                'orders': [],
+            })
+            row['required'] += item_requirement(item, order.bom, units)
+            if order.product.name not in row['products']:
+                row['products'].append(order.product.name)
+            row['orders'].append(order.mo_number)
+
+    on_order = open_purchase_quantities(vendor, list(requirements))
+    for material_id, row in requirements.items():
+        material = row['material']
+        row['required'] = row['required'].quantize(QUANTITY)
+        row['on_hand'] = material.stock_quantity or Decimal('0')
+        row['on_order'] = on_order.get(material_id) or Decimal('0')
+        row['available'] = row['on_hand'] + row['on_order']
+        row['shortage'] = max(row['required'] - row['available'], Decimal('0'))
+        row['suggested_purchase'] = suggest_purchase_quantity(row['shortage'], material.min_order_quantity)
+
+    return sorted(requirements.values(), key=lambda row: (row['shortage'] == 0, row['material'].name))
@@ -0,0 +1,26 @@
+"""
+Manufacturing Signals
+Propagate raw material price changes to bills of materials and open orders
+"""
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save
+from django.dispatch import receiver
+from .costing import recalculate_bom_costs
+
+
+@receiver(pre_save, sender='suppliers.RawMaterial')
+def on_raw_material_saving(sender, instance, update_fields=None, **kwargs):
+    """Remember whether this save changes the unit price"""
+    instance._unit_price_changed = False
+    if instance.pk is None or (update_fields is not None and 'unit_price' not in update_fields):
+        return
+    previous = sender.objects.filter(pk=instance.pk).values_list('unit_price', flat=True).first()
+    instance._unit_price_changed = previous is not None and previous != instance.unit_price
+
+
+@receiver(post_save, sender='suppliers.RawMaterial')
+def on_raw_material_saved(sender, instance, created, **kwargs):
+    """Recost the BOMs using the material once the price change commits"""
+    if getattr(instance, '_unit_price_changed', False):
+        material_id = instance.pk
+        transaction.on_commit(lambda: recalculate_bom_costs(material_ids=[material_id]))
@@ -0,0 +1,124 @@
+"""
+Test the monthly manufacturing analytics rollup
+"""
+from datetime import date, datetime
+from decimal import Decimal
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from manufacturing.analytics import (
+    refresh_manufacturing_analytics, vendor_monthly_trend, job_creation_summary, recent_months,
+)
+from manufacturing.models import BillOfMaterials, ManufacturingAnalytics, ManufacturingOrder, ProductionWorker
+
+User = get_user_model()
+
+TODAY = date(2026, 3, 15)
+
+
+def completed_order(vendor, bom, number, units, cost, completed, local=0):
+    return ManufacturingOrder.objects.create(
+        mo_number=f'MO-{vendor.pk}-{number}', vendor=vendor, product=bom.product, bom=bom,
+        quantity_to_produce=Decimal(units), quantity_produced=Decimal(units), status='COMPLETED',
+        actual_cost=Decimal(cost), local_materials_percentage=Decimal(local),
+        completed_at=timezone.make_aware(datetime.combine(completed, datetime.min.time().replace(hour=12))),
+    )
+
+
+def work(order, name, hours, rate, day):
+    return ProductionWorker.objects.create(
+        manufacturing_order=order, vendor=order.vendor, worker_name=name,
+        hours_worked=Decimal(hours), hourly_rate=Decimal(rate), work_date=day,
+    )
+
+
+@pytest.fixture
+def second_vendor(db):
+    return User.objects.create_user(username='vendor2', password='x', user_type='VENDOR')
+
+
+@pytest.fixture
+def activity(vendor_user, second_vendor, products):
+    bom = BillOfMaterials.objects.create(
+        product=products[0], vendor=vendor_user, batch_size=1, total_material_cost=Decimal('2'),
+    )
+    other_bom = BillOfMaterials.objects.create(product=products[1], vendor=second_vendor, batch_size=1)
+    march = completed_order(vendor_user, bom, 1, 10, 100, date(2026, 3, 2), local=80)
+    completed_order(vendor_user, bom, 2, 5, 50, date(2026, 3, 9), local=40)
+    february = completed_order(vendor_user, bom, 3, 4, 40, date(2026, 2, 20))
+    completed_order(vendor_user, bom, 4, 99, 999, date(2025, 12, 1))  # outside the window
+    other = completed_order(second_vendor, other_bom, 1, 1, 10, date(2026, 3, 3))
+    work(march, 'Tendai', 8, 5, date(2026, 3, 2))
+    work(march, 'Tendai', 4, 5, date(2026, 3, 3))
+    work(march, 'Rudo', 6, 5, date(2026, 3, 3))
+    work(february, 'Rudo', 2, 5, date(2026, 2, 20))
+    work(other, 'Farai', 10, 3, date(2026, 3, 3))
+
+
+@pytest.mark.unit
+class TestManufacturingAnalyticsRollup:
+    """Test the rollup job and the pages reading it"""
+
+    def test_rollup_per_vendor_month(self, vendor_user, second_vendor, activity):
+        """Test orders and work are rolled up per vendor and month in a few queries"""
+        with CaptureQueriesContext(connection) as ctx:
+            assert refresh_manufacturing_analytics(months=2, today=TODAY) == 3
+        queries = [
+            q for q in ctx.captured_queries
+            if not q['sql'].startswith(('EXPLAIN', 'SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT'))
+            and '"silk_' not in q['sql']
+        ]
+        assert len(queries) == 4  # orders, work, upsert, stale-row delete
+
+        march = ManufacturingAnalytics.objects.get(vendor=vendor_user, month=date(2026, 3, 1))
+        assert (march.total_orders, march.total_units_produced, march.total_production_cost) == (2, 15, 150)
+        assert march.total_material_cost == Decimal('30.00')
+        assert march.local_materials_percentage == Decimal('60.00')
+        assert (march.total_workers, march.total_hours_worked, march.total_wages_paid) == (2, 18, 90)
+        assert march.community_contribution == Decimal('1.50')
+
+        february = ManufacturingAnalytics.objects.get(vendor=vendor_user, month=date(2026, 2, 1))
+        assert (february.total_orders, february.total_workers) == (1, 1)
+        assert not ManufacturingAnalytics.objects.filter(month=date(2025, 12, 1)).exists()
+
+    def test_rerun_updates_and_drops_rows(self, vendor_user, second_vendor, activity):
+        """Test re-running upserts in place and removes vendor-months without activity"""
+        refresh_manufacturing_analytics(months=2, today=TODAY)
+        row = ManufacturingAnalytics.objects.get(vendor=second_vendor)
+
+        ManufacturingOrder.objects.filter(vendor=second_vendor).delete()
+        ManufacturingOrder.objects.filter(mo_number=f'MO-{vendor_user.pk}-2').update(actual_cost=Decimal('150'))
+        assert refresh_manufacturing_analytics(months=2, today=TODAY) == 2
+
+        assert not ManufacturingAnalytics.objects.filter(pk=row.pk).exists()
+        march = ManufacturingAnalytics.objects.get(vendor=vendor_user, month=date(2026, 3, 1))
+        assert march.total_production_cost == 250
+
+    def test_trends_fill_empty_months(self, vendor_user, second_vendor, activity):
+        """Test vendor and cross-vendor trends cover every month, oldest first"""
+        refresh_manufacturing_analytics(months=2, today=TODAY)
+
+        trend = vendor_monthly_trend(vendor_user, months=3, today=TODAY)
+        assert [row.month for row in trend] == recent_months(3, TODAY)
+        assert [row.total_orders for row in trend] == [0, 1, 2]
+
+        summary = job_creation_summary(months=2, today=TODAY)
+        assert [(row['vendors'], row['workers'], row['hours']) for row in summary] == [(1, 1, 2), (2, 3, 28)]
+
+    def test_pages_read_rollup(self, client, vendor_user, activity):
+        """Test the vendor and ministry pages render from the rollup"""
+        refresh_manufacturing_analytics(months=2)
+        client.force_login(vendor_user)
+        assert client.get(reverse('manufacturing_analytics')).status_code == 200
+
+        ministry = User.objects.create_user(username='ministry', password='x', user_type='MINISTRY')
+        client.force_login(ministry)
+        response = client.get(reverse('ministry_manufacturing_jobs'))
+        assert response.status_code == 200
+        assert len(response.context['summary']) == 12
+
+        client.force_login(vendor_user)
+        assert client.get(reverse('ministry_manufacturing_jobs')).status_code == 302
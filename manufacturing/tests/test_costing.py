@@ -0,0 +1,112 @@
+"""
+Test BOM cost propagation
+"""
+from decimal import Decimal
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from manufacturing.costing import recalculate_bom_costs, update_material_prices
+from manufacturing.models import BillOfMaterials, BOMItem, ManufacturingOrder
+from suppliers.models import SupplierProfile, RawMaterial
+
+User = get_user_model()
+
+
+def count_queries(func):
+    with CaptureQueriesContext(connection) as ctx:
+        result = func()
+    return result, len([
+        q for q in ctx.captured_queries
+        if not q['sql'].startswith(('EXPLAIN', 'SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT'))
+        and '"silk_' not in q['sql']
+    ])
+
+
+@pytest.fixture
+def materials(db):
+    supplier_user = User.objects.create_user(username='supplier', password='x', user_type='SUPPLIER')
+    supplier = SupplierProfile.objects.create(supplier=supplier_user, company_name='Raw Co', contact_number='0771')
+    return [
+        RawMaterial.objects.create(name=name, slug=name.lower(), description=name, supplier=supplier, unit_price=price)
+        for name, price in (('Ilala', Decimal('2.00')), ('Dye', Decimal('6.00')), ('Wire', Decimal('1.00')))
+    ]
+
+
+@pytest.fixture
+def boms(vendor_user, products, materials):
+    """A basket (2 per batch) using ilala and dye, and a mat using ilala; wire is unused"""
+    ilala, dye, _ = materials
+    basket = BillOfMaterials.objects.create(
+        product=products[0], vendor=vendor_user, batch_size=2,
+        labor_cost_per_unit=Decimal('1'), markup_percentage=Decimal('50'),
+    )
+    BOMItem.objects.create(bom=basket, raw_material=ilala, quantity=Decimal('3'), unit='kg')
+    BOMItem.objects.create(bom=basket, raw_material=dye, quantity=Decimal('1'), unit='l')
+    mat = BillOfMaterials.objects.create(product=products[1], vendor=vendor_user, batch_size=1)
+    BOMItem.objects.create(bom=mat, raw_material=ilala, quantity=Decimal('1'), unit='kg')
+    return basket, mat
+
+
+def make_order(bom, number, status):
+    return ManufacturingOrder.objects.create(
+        mo_number=f'MO-{bom.pk}-{number}', vendor=bom.vendor, product=bom.product, bom=bom,
+        quantity_to_produce=Decimal('10'), status=status,
+    )
+
+
+@pytest.mark.unit
+class TestBOMCostPropagation:
+    """Test set-wise BOM recosting and price change propagation"""
+
+    def test_recalculate_costs(self, boms):
+        """Test material, unit and selling prices come from one aggregate"""
+        basket, mat = boms
+        (count, queries) = count_queries(recalculate_bom_costs)
+        assert count == 2
+        assert queries == 3  # aggregate, bulk update, open orders update
+
+        basket.refresh_from_db()
+        assert basket.total_material_cost == Decimal('6.00')  # (3 * 2 + 1 * 6) / 2
+        assert basket.total_cost_per_unit == Decimal('7.00')
+        assert basket.suggested_selling_price == Decimal('10.50')
+        assert mat.calculate_costs() == Decimal('2.00')
+
+    def test_price_change_refreshes_boms_and_open_orders(self, boms, materials, django_capture_on_commit_callbacks):
+        """Test saving a new unit price recosts affected BOMs and open order estimates"""
+        basket, mat = boms
+        recalculate_bom_costs()
+        basket.refresh_from_db()
+        draft = make_order(basket, 1, 'DRAFT')
+        done = make_order(basket, 2, 'COMPLETED')
+        assert draft.estimated_cost == Decimal('70.00')
+
+        dye = materials[1]
+        dye.unit_price = Decimal('10.00')
+        with django_capture_on_commit_callbacks(execute=True) as callbacks:
+            dye.save()
+        assert len(callbacks) == 1
+
+        basket.refresh_from_db()
+        draft.refresh_from_db()
+        done.refresh_from_db()
+        assert basket.total_cost_per_unit == Decimal('9.00')
+        assert draft.estimated_cost == Decimal('90.00')
+        assert done.estimated_cost == Decimal('70.00')
+
+        # Saves that leave the price alone do no recosting
+        with django_capture_on_commit_callbacks() as callbacks:
+            dye.save()
+        assert callbacks == []
+
+    def test_price_list_update(self, boms, materials):
+        """Test a whole price list is applied and propagated in a fixed number of queries"""
+        basket, mat = boms
+        ilala, dye, wire = materials
+        (count, queries) = count_queries(lambda: update_material_prices({ilala.pk: '4', wire.pk: '3'}))
+        assert count == 2
+        assert queries == 4
+
+        mat.refresh_from_db()
+        wire.refresh_from_db()
+        assert (mat.total_material_cost, wire.unit_price) == (Decimal('4.00'), Decimal('3.00'))
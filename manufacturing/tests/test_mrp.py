@@ -0,0 +1,91 @@
+"""
+Test material requirements planning
+"""
+from decimal import Decimal
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from manufacturing.models import BillOfMaterials, BOMItem, ManufacturingOrder
+from manufacturing.mrp import plan_material_requirements, suggest_purchase_quantity
+from products.models import Product
+from suppliers.models import SupplierProfile, RawMaterial, RawMaterialPurchase
+
+User = get_user_model()
+
+
+@pytest.fixture
+def materials(db):
+    """Ilala palm (bought in 5 kg lots) and dye"""
+    supplier_user = User.objects.create_user(username='supplier', password='x', user_type='SUPPLIER')
+    supplier = SupplierProfile.objects.create(supplier=supplier_user, company_name='Raw Co', contact_number='0771')
+    return {
+        name: RawMaterial.objects.create(
+            name=name, slug=name.lower(), description=name, supplier=supplier,
+            unit_price=Decimal('2'), min_order_quantity=moq, stock_quantity=stock,
+        )
+        for name, moq, stock in (('Ilala', Decimal('5'), Decimal('4')), ('Dye', Decimal('1'), None))
+    }
+
+
+@pytest.fixture
+def boms(vendor_user, products, materials):
+    """A basket BOM (2 baskets per batch) and a mat BOM"""
+    basket = BillOfMaterials.objects.create(product=products[0], vendor=vendor_user, batch_size=2)
+    BOMItem.objects.create(bom=basket, raw_material=materials['Ilala'], quantity=Decimal('3'), unit='kg')
+    BOMItem.objects.create(bom=basket, raw_material=materials['Dye'], quantity=Decimal('0.5'), unit='l')
+    mat = BillOfMaterials.objects.create(product=products[1], vendor=vendor_user, batch_size=1)
+    BOMItem.objects.create(bom=mat, raw_material=materials['Ilala'], quantity=Decimal('1'), unit='kg')
+    return basket, mat
+
+
+def make_order(vendor, bom, quantity, status, produced=0):
+    return ManufacturingOrder.objects.create(
+        mo_number=f'MO-{bom.pk}-{status}-{quantity}', vendor=vendor, product=bom.product, bom=bom,
+        quantity_to_produce=Decimal(quantity), quantity_produced=Decimal(produced), status=status,
+    )
+
+
+@pytest.mark.unit
+class TestMaterialRequirements:
+    """Test explosion, netting and purchase suggestions"""
+
+    def test_plan_nets_stock_and_open_purchases(self, vendor_user, boms, materials):
+        """Test requirements are summed over open orders and netted"""
+        basket, mat = boms
+        make_order(vendor_user, basket, 4, 'READY')                   # 2 batches: 6 kg ilala, 1 l dye
+        make_order(vendor_user, mat, 5, 'IN_PROGRESS', produced=2)    # 3 left: 3 kg ilala
+        make_order(vendor_user, mat, 100, 'COMPLETED')                # ignored
+        make_order(vendor_user, mat, 100, 'DRAFT')                    # ignored
+        RawMaterialPurchase.objects.create(
+            vendor=vendor_user, material=materials['Ilala'], supplier=materials['Ilala'].supplier,
+            quantity=Decimal('2'), unit='kg', unit_price=Decimal('2'), total_amount=Decimal('4'),
+            delivery_address='x', delivery_city='Harare', delivery_phone='0771', status='SHIPPED',
+        )
+
+        with CaptureQueriesContext(connection) as ctx:
+            plan = {row['material'].name: row for row in plan_material_requirements(vendor_user)}
+        queries = [q for q in ctx.captured_queries if not q['sql'].startswith('EXPLAIN')]
+        assert len(queries) == 3  # orders + BOM items with materials + open purchases
+
+        ilala = plan['Ilala']
+        assert (ilala['required'], ilala['on_hand'], ilala['on_order']) == (Decimal('9'), Decimal('4'), Decimal('2'))
+        assert ilala['shortage'] == Decimal('3')
+        assert ilala['suggested_purchase'] == Decimal('5')  # one 5 kg lot
+        assert sorted(ilala['products']) == sorted([basket.product.name, mat.product.name])
+
+        dye = plan['Dye']
+        assert (dye['required'], dye['shortage'], dye['suggested_purchase']) == (Decimal('1'), Decimal('1'), Decimal('1'))
+
+    def test_check_materials_available(self, boms):
+        """Test the BOM check compares requirements with stock"""
+        basket, mat = boms
+        assert mat.check_materials_available(4)
+        assert not mat.check_materials_available(5)
+        assert not basket.check_materials_available(2)  # no dye in stock
+
+    def test_suggest_purchase_quantity(self):
+        """Test shortages round up to whole minimum order lots"""
+        assert suggest_purchase_quantity(Decimal('0'), Decimal('5')) == 0
+        assert suggest_purchase_quantity(Decimal('5.01'), Decimal('5')) == Decimal('10')
+        assert suggest_purchase_quantity(Decimal('1.234'), None) == Decimal('1.24')
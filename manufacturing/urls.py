@@ -24,5 +24,6 @@ urlpatterns = [
     
     # Analytics
     path('analytics/', views.manufacturing_analytics, name='manufacturing_analytics'),
+    path('analytics/jobs/', views.ministry_manufacturing_jobs, name='ministry_manufacturing_jobs'),
 ]
 
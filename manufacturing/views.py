@@ -1,5 +1,6 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
+from mushanaicore.db_router import use_replica
 from django.contrib import messages
 from django.db.models import Sum, Count, Q, Avg
 from django.utils import timezone
@@ -10,6 +11,8 @@ from .models import (
     BillOfMaterials, BOMItem, ManufacturingOrder,
     QualityCheck, ProductionWorker, ManufacturingAnalytics
 )
+from .analytics import vendor_monthly_trend, job_creation_summary
+from .mrp import plan_material_requirements
 from products.models import Product
 from suppliers.models import RawMaterial
 
@@ -367,24 +370,12 @@ def manufacturing_materials(request):
         messages.error(request, 'Access denied.')
         return redirect('home')
     
-    # Get all materials used in vendor's BOMs
-    boms = BillOfMaterials.objects.filter(vendor=request.user, is_active=True)
-    
-    materials_needed = {}
-    for bom in boms:
-        for item in bom.items.all():
-            material = item.raw_material
-            if material.id not in materials_needed:
-                materials_needed[material.id] = {
-                    'material': material,
-                    'total_quantity': 0,
-                    'products': []
-                }
-            materials_needed[material.id]['total_quantity'] += item.quantity
-            materials_needed[material.id]['products'].append(bom.product.name)
+    # Net requirements of open manufacturing orders against stock and open purchases
+    requirements = plan_material_requirements(request.user)
     
     context = {
-        'materials_needed': materials_needed.values(),
+        'requirements': requirements,
+        'shortage_count': sum(1 for row in requirements if row['shortage'] > 0),
     }
     
     return render(request, 'manufacturing/materials.html', context)
@@ -400,56 +391,46 @@ def request_materials(request):
 
 
 @login_required
+@use_replica
 def manufacturing_analytics(request):
     """
-    Manufacturing analytics and community impact
+    Manufacturing analytics and community impact (from the monthly rollup)
     """
     if request.user.user_type != 'VENDOR':
         messages.error(request, 'Access denied.')
         return redirect('home')
     
-    # This month
-    today = timezone.now().date()
-    first_day = today.replace(day=1)
-    
-    orders_this_month = ManufacturingOrder.objects.filter(
-        vendor=request.user,
-        created_at__gte=first_day
-    )
-    
-    completed_orders = orders_this_month.filter(status='COMPLETED')
-    
-    stats = completed_orders.aggregate(
-        total_units=Sum('quantity_produced'),
-        total_cost=Sum('actual_cost'),
-        avg_local_percentage=Avg('local_materials_percentage')
-    )
+    trend = vendor_monthly_trend(request.user, months=12)
+    this_month = trend[-1]
     
-    # Workers
-    workers = ProductionWorker.objects.filter(
-        vendor=request.user,
-        work_date__gte=first_day
-    )
+    context = {
+        'this_month': this_month,
+        'trend': list(reversed(trend)),
+        'max_units': max(row.total_units_produced for row in trend) or 1,
+    }
     
-    worker_stats = workers.aggregate(
-        total_workers=Count('worker_name', distinct=True),
-        total_hours=Sum('hours_worked'),
-        total_wages=Sum('total_payment')
-    )
+    return render(request, 'manufacturing/analytics.html', context)
+
+
+@login_required
+@use_replica
+def ministry_manufacturing_jobs(request):
+    """
+    Cross-vendor production and job-creation figures for ministries
+    """
+    if request.user.user_type != 'MINISTRY':
+        messages.error(request, 'Access denied.')
+        return redirect('home')
     
-    # Community contribution (1% of production value)
-    if stats['total_cost']:
-        community_contribution = Decimal(str(stats['total_cost'])) * Decimal('0.01')
-    else:
-        community_contribution = 0
+    summary = job_creation_summary(months=12)
     
     context = {
-        'stats': stats,
-        'worker_stats': worker_stats,
-        'community_contribution': community_contribution,
-        'orders_this_month': orders_this_month,
-        'completed_orders': completed_orders,
+        'summary': list(reversed(summary)),
+        'totals': {
+            key: sum(row[key] for row in summary)
+            for key in ('workers', 'hours', 'wages', 'units', 'community_contribution')
+        },
     }
     
-    return render(request, 'manufacturing/analytics.html', context)
+    return render(request, 'manufacturing/ministry_jobs.html', context)
 
@@ -3,6 +3,10 @@ ASGI config for mushanaicore project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Django 4.2 doesn't handle lifespan events, so ``application`` answers them
+itself: each worker opens the shared social media HTTP client on startup and
+closes it on shutdown. Every other scope goes to Django.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 """
@@ -13,4 +17,20 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mushanaicore.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from social_media import http  # noqa: E402  (needs the app registry)
+
+
+async def application(scope, receive, send):
+    if scope['type'] != 'lifespan':
+        return await django_application(scope, receive, send)
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            http.open_shared_client()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await http.close_shared_client()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
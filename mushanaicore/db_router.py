@@ -0,0 +1,148 @@
+"""
+Read-replica routing for Mushanai
+
+All writes and ordinary reads go to the 'default' (primary) database.
+Views decorated with @use_replica read from a configured replica instead,
+unless the client wrote something recently (read-your-writes stickiness)
+or no replica is currently reachable. The replica is picked (and its
+connection checked) once when the view is entered, so every read of the
+request goes to the same replica without a probe per query.
+
+Replicas are configured with DB_REPLICA_URLS in settings, which adds
+DATABASES['replica_0'], DATABASES['replica_1'], ...
+"""
+import random
+import time
+from contextvars import ContextVar
+from functools import wraps
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections, DEFAULT_DB_ALIAS
+from django.db.utils import DatabaseError
+
+# Alias chosen for the current @use_replica view, None outside one
+_replica_alias = ContextVar('mushanai_replica_alias', default=None)
+_pin_primary = ContextVar('mushanai_pin_primary', default=False)
+
+# alias -> timestamp until which the replica is considered down
+_unhealthy_until = {}
+
+STICKY_COOKIE_NAME = 'mushanai_pin_primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+
+def get_replica_aliases():
+    return [alias for alias in settings.DATABASES if alias.startswith('replica_')]
+
+
+def _is_healthy(alias):
+    """Check a replica connection, remembering failures for a short while"""
+    now = time.monotonic()
+    if _unhealthy_until.get(alias, 0) > now:
+        return False
+    try:
+        connections[alias].ensure_connection()
+    except DatabaseError:
+        _unhealthy_until[alias] = now + getattr(settings, 'DB_REPLICA_RETRY_SECONDS', 30)
+        return False
+    _unhealthy_until.pop(alias, None)
+    return True
+
+
+def mark_replica_unhealthy(alias):
+    """Take a replica out of rotation (e.g. after a query error)"""
+    _unhealthy_until[alias] = time.monotonic() + getattr(settings, 'DB_REPLICA_RETRY_SECONDS', 30)
+
+
+def choose_replica():
+    """Pick a healthy replica, or fall back to the primary"""
+    replicas = get_replica_aliases()
+    random.shuffle(replicas)
+    for alias in replicas:
+        if _is_healthy(alias):
+            return alias
+    return DEFAULT_DB_ALIAS
+
+
+class ReplicaRouter:
+    """
+    Route hinted reads to replicas; everything else to the primary
+    """
+
+    def db_for_read(self, model, **hints):
+        return _replica_alias.get() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        databases = {DEFAULT_DB_ALIAS, *get_replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive schema changes through replication
+        return db == DEFAULT_DB_ALIAS
+
+
+def use_replica(view_func):
+    """
+    Decorator for read-only views that may be served from a replica. The
+    replica is chosen on entry; nested views keep the outer choice.
+    """
+    @wraps(view_func)
+    def _wrapped_view(request, *args, **kwargs):
+        alias = _replica_alias.get()
+        if alias is None and request.method in SAFE_METHODS and not _pin_primary.get():
+            alias = choose_replica()
+        token = _replica_alias.set(alias)
+        try:
+            return view_func(request, *args, **kwargs)
+        finally:
+            _replica_alias.reset(token)
+    return _wrapped_view
+
+
+class ReplicaStickinessMiddleware:
+    """
+    Pin a client to the primary for a few seconds after it writes, so it
+    never reads stale data from a lagging replica (sync and async capable)
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _pin_primary.set(STICKY_COOKIE_NAME in request.COOKIES)
+        try:
+            response = self.get_response(request)
+        finally:
+            _pin_primary.reset(token)
+        return self._set_sticky_cookie(request, response)
+
+    async def __acall__(self, request):
+        token = _pin_primary.set(STICKY_COOKIE_NAME in request.COOKIES)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _pin_primary.reset(token)
+        return self._set_sticky_cookie(request, response)
+
+    def _set_sticky_cookie(self, request, response):
+        if request.method not in SAFE_METHODS and get_replica_aliases():
+            response.set_cookie(
+                STICKY_COOKIE_NAME,
+                '1',
+                max_age=getattr(settings, 'DB_REPLICA_STICKY_SECONDS', 10),
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
@@ -0,0 +1,32 @@
+"""
+View decorators for async views
+
+Django 4.2's login_required and require_POST only wrap sync views, so async
+views (served natively under the ASGI deployment) use these instead.
+"""
+from functools import wraps
+from asgiref.sync import sync_to_async
+from django.contrib.auth.views import redirect_to_login
+from django.http import HttpResponseNotAllowed
+
+
+def async_login_required(view_func):
+    """login_required for async views"""
+    @wraps(view_func)
+    async def _wrapped_view(request, *args, **kwargs):
+        # Resolving the lazy user hits the session and user tables
+        is_authenticated = await sync_to_async(lambda: request.user.is_authenticated)()
+        if not is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        return await view_func(request, *args, **kwargs)
+    return _wrapped_view
+
+
+def async_require_POST(view_func):
+    """require_POST for async views"""
+    @wraps(view_func)
+    async def _wrapped_view(request, *args, **kwargs):
+        if request.method != 'POST':
+            return HttpResponseNotAllowed(['POST'])
+        return await view_func(request, *args, **kwargs)
+    return _wrapped_view
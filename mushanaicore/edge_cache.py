@@ -0,0 +1,148 @@
+"""
+Edge (nginx) micro-caching of anonymous storefront pages
+
+Views decorated with @edge_cache(...) are marked publicly cacheable when the
+response is identical for every anonymous visitor: an anonymous GET/HEAD
+answered with a 200 that sets no cookie, touches no session and embeds no
+per-visitor CSRF token. Those responses get
+
+    Cache-Control: public, max-age=0, s-maxage=EDGE_CACHE_MAX_AGE,
+                   stale-while-revalidate=EDGE_CACHE_STALE_WHILE_REVALIDATE
+    Surrogate-Key: storefront product-12 vendor-3
+
+so nginx (nginx/nginx.conf) serves them from its micro-cache while browsers
+always revalidate; everything else is marked private. nginx bypasses the
+cache for visitors with a session or flash messages.
+
+Open-source nginx cannot purge by surrogate key, so the keys are resolved
+here: each cacheable miss records its path under its keys in Redis, and
+purge_surrogate_keys() (called from model save signals, see
+store/signals.py) re-fetches the recorded paths through nginx's internal
+refresh listener (EDGE_CACHE_PURGE_URL), which bypasses and replaces the
+cached copies. Purging is off while EDGE_CACHE_PURGE_URL is empty.
+"""
+import logging
+import threading
+from functools import wraps
+from urllib.request import Request, urlopen
+from django.conf import settings
+from django.db import transaction
+from django.utils.cache import patch_cache_control
+from django_redis import get_redis_connection
+
+logger = logging.getLogger(__name__)
+
+SURROGATE_KEY_HEADER = 'Surrogate-Key'
+SURROGATE_KEY_PATHS = 'mushanai:edgecache:{}'
+PURGE_TIMEOUT = 5
+
+
+def _redis():
+    return get_redis_connection('default')
+
+
+def purging_enabled():
+    return bool(settings.EDGE_CACHE_PURGE_URL)
+
+
+def add_surrogate_keys(response, *keys):
+    """Tag a response with more surrogate keys (e.g. the product it shows)"""
+    existing = response.headers.get(SURROGATE_KEY_HEADER, '').split()
+    response.headers[SURROGATE_KEY_HEADER] = ' '.join(dict.fromkeys(existing + [str(key) for key in keys]))
+    return response
+
+
+def is_edge_cacheable(request, response):
+    """True when the response is the same for every anonymous visitor"""
+    session = getattr(request, 'session', None)
+    return (
+        request.method in ('GET', 'HEAD')
+        and response.status_code == 200
+        and not request.user.is_authenticated
+        and not response.cookies
+        # get_token() was called: the page embeds this visitor's CSRF token
+        and not request.META.get('CSRF_COOKIE_NEEDS_UPDATE')
+        and not (session is not None and session.modified)
+    )
+
+
+def edge_cache(*keys):
+    """
+    Let nginx cache the view's anonymous responses, tagged with the given
+    surrogate keys (views add object keys with add_surrogate_keys()).
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def _wrapped_view(request, *args, **kwargs):
+            response = view_func(request, *args, **kwargs)
+            if not is_edge_cacheable(request, response):
+                del response[SURROGATE_KEY_HEADER]
+                patch_cache_control(response, private=True)
+                return response
+
+            add_surrogate_keys(response, *keys)
+            patch_cache_control(
+                response,
+                public=True,
+                max_age=0,
+                s_maxage=settings.EDGE_CACHE_MAX_AGE,
+                stale_while_revalidate=settings.EDGE_CACHE_STALE_WHILE_REVALIDATE,
+            )
+            if purging_enabled():
+                record_cached_path(request.get_full_path(), response.headers[SURROGATE_KEY_HEADER].split())
+            return response
+        return _wrapped_view
+    return decorator
+
+
+def record_cached_path(path, keys):
+    """Remember that nginx may hold `path` under each of `keys`"""
+    pipe = _redis().pipeline(transaction=False)
+    for key in keys:
+        redis_key = SURROGATE_KEY_PATHS.format(key)
+        pipe.sadd(redis_key, path)
+        pipe.expire(redis_key, settings.EDGE_CACHE_REGISTRY_TTL)
+    pipe.execute()
+
+
+def pop_cached_paths(keys):
+    """The paths cached under any of `keys`, forgetting them"""
+    redis_keys = [SURROGATE_KEY_PATHS.format(key) for key in keys]
+    pipe = _redis().pipeline()
+    pipe.sunion(redis_keys)
+    pipe.delete(*redis_keys)
+    paths, _ = pipe.execute()
+    return sorted(path.decode() if isinstance(path, bytes) else path for path in paths)
+
+
+def refresh_paths(paths):
+    """Re-fetch paths through nginx's refresh listener, replacing the cached copies"""
+    for path in paths:
+        request = Request(settings.EDGE_CACHE_PURGE_URL.rstrip('/') + path,
+                          headers={'Host': settings.EDGE_CACHE_HOST})
+        try:
+            with urlopen(request, timeout=PURGE_TIMEOUT) as response:
+                response.read()
+        except Exception as e:
+            logger.warning('Edge cache refresh of %s failed: %s', path, e)
+
+
+def purge_now(keys):
+    paths = pop_cached_paths(keys)
+    if paths:
+        refresh_paths(paths)
+    return paths
+
+
+def purge_surrogate_keys(*keys):
+    """
+    Refresh every cached page tagged with any of `keys` once the current
+    transaction commits. The requests run in a background thread so saving
+    a product never waits for pages to render.
+    """
+    if not purging_enabled() or not keys:
+        return
+    keys = sorted({str(key) for key in keys})
+    transaction.on_commit(
+        lambda: threading.Thread(target=purge_now, args=(keys,), daemon=True).start()
+    )
@@ -0,0 +1,321 @@
+"""
+Lightweight request instrumentation for Mushanai
+
+RequestMetricsMiddleware records, per view: latency, number of SQL queries,
+time spent in the database and cache hits/misses. Values are aggregated in
+Redis counters/histograms shared by every worker and exported in Prometheus
+text format at /metrics. Views can declare a query budget with
+@query_budget(n); going over it is logged, and raises QueryBudgetExceeded
+when QUERY_BUDGET_RAISE is on (as in the test suite).
+
+The endpoint sits behind nginx, so the client address is always the
+proxy's: scrapers authenticate with "Authorization: Bearer METRICS_TOKEN"
+instead (staff users may also view it).
+"""
+import hmac
+import json
+import logging
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden
+from django_redis import get_redis_connection
+from django_redis.cache import RedisCache
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+_current_stats = ContextVar('mushanai_request_stats', default=None)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 35, 50, 100, 200, 500)
+NOT_COUNTED = ('EXPLAIN', 'SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+METRICS_KEY_PREFIX = 'mushanai:metrics'
+
+
+class QueryBudgetExceeded(Exception):
+    """Raised when a view runs more queries than its declared budget"""
+
+
+class RequestStats:
+    __slots__ = ('queries', 'db_time', 'cache_hits', 'cache_misses')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+
+def _label_string(labels):
+    if not labels:
+        return ''
+    parts = []
+    for key, value in labels:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        parts.append(f'{key}="{value}"')
+    return '{' + ','.join(parts) + '}'
+
+
+class Counter:
+    """A counter kept in one Redis hash: field = JSON labels, value = count"""
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+
+    def inc(self, pipe, key, labels, amount=1):
+        pipe.hincrby(key, json.dumps(labels), amount)
+
+    def render(self, values):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        for field, value in sorted(values.items()):
+            lines.append(f'{self.name}{_label_string(json.loads(field))} {int(value)}')
+        return lines
+
+
+class Histogram:
+    """
+    A histogram kept in one Redis hash: field = JSON [labels, bucket index]
+    (len(buckets) is +Inf) or [labels, "sum"]
+    """
+
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+
+    def observe(self, pipe, key, labels, value):
+        pipe.hincrby(key, json.dumps([labels, bisect_left(self.buckets, value)]), 1)
+        pipe.hincrbyfloat(key, json.dumps([labels, 'sum']), value)
+
+    def render(self, values):
+        series = {}  # labels -> [per-bucket counts..., +Inf count], sum
+        for field, value in values.items():
+            labels, slot = json.loads(field)
+            counts_total = series.setdefault(tuple(map(tuple, labels)), [[0] * (len(self.buckets) + 1), 0.0])
+            if slot == 'sum':
+                counts_total[1] = float(value)
+            else:
+                counts_total[0][slot] = int(value)
+
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        for labels, (counts, total) in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{_label_string(labels + (("le", bound),))} {cumulative}')
+            lines.append(f'{self.name}_sum{_label_string(labels)} {total}')
+            lines.append(f'{self.name}_count{_label_string(labels)} {cumulative}')
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Metrics shared by every worker: each request adds to Redis hashes with
+    one pipelined round trip, and a scrape renders the totals, so whichever
+    worker answers /metrics reports the whole deployment.
+    """
+
+    def __init__(self, prefix=METRICS_KEY_PREFIX):
+        self.prefix = prefix
+        self.requests = Counter('mushanai_http_requests_total', 'HTTP requests by view, method and status.')
+        self.latency = Histogram('mushanai_http_request_duration_seconds', 'Request latency in seconds.', LATENCY_BUCKETS)
+        self.queries = Histogram('mushanai_db_queries_per_request', 'SQL queries per request.', QUERY_COUNT_BUCKETS)
+        self.db_time = Histogram('mushanai_db_time_seconds', 'Time spent in SQL per request.', LATENCY_BUCKETS)
+        self.cache_hits = Counter('mushanai_cache_hits_total', 'Cache hits by view.')
+        self.cache_misses = Counter('mushanai_cache_misses_total', 'Cache misses by view.')
+        self.budget_exceeded = Counter('mushanai_query_budget_exceeded_total', 'Requests that exceeded their query budget.')
+        self.metrics = (self.requests, self.latency, self.queries, self.db_time,
+                        self.cache_hits, self.cache_misses, self.budget_exceeded)
+
+    def _key(self, metric):
+        return f'{self.prefix}:{metric.name}'
+
+    def _write(self, update):
+        """Run update(pipe) in one pipeline; metrics never fail a request"""
+        try:
+            pipe = get_redis_connection('default').pipeline(transaction=False)
+            update(pipe)
+            pipe.execute()
+        except RedisError as e:
+            logger.warning('Recording request metrics failed: %s', e)
+
+    def record(self, view, method, status, duration, stats):
+        labels = [['view', view]]
+
+        def update(pipe):
+            self.requests.inc(pipe, self._key(self.requests), labels + [['method', method], ['status', status]])
+            self.latency.observe(pipe, self._key(self.latency), labels, duration)
+            self.queries.observe(pipe, self._key(self.queries), labels, stats.queries)
+            self.db_time.observe(pipe, self._key(self.db_time), labels, stats.db_time)
+            if stats.cache_hits:
+                self.cache_hits.inc(pipe, self._key(self.cache_hits), labels, stats.cache_hits)
+            if stats.cache_misses:
+                self.cache_misses.inc(pipe, self._key(self.cache_misses), labels, stats.cache_misses)
+        self._write(update)
+
+    def record_budget_exceeded(self, view):
+        self._write(lambda pipe: self.budget_exceeded.inc(pipe, self._key(self.budget_exceeded), [['view', view]]))
+
+    def render(self):
+        pipe = get_redis_connection('default').pipeline(transaction=False)
+        for metric in self.metrics:
+            pipe.hgetall(self._key(metric))
+        lines = []
+        for metric, values in zip(self.metrics, pipe.execute()):
+            lines.extend(metric.render({
+                field.decode(): value.decode() for field, value in values.items()
+            }))
+        return '\n'.join(lines) + '\n'
+
+    def clear(self):
+        get_redis_connection('default').delete(*(self._key(metric) for metric in self.metrics))
+
+
+registry = MetricsRegistry()
+
+
+def query_budget(max_queries):
+    """
+    Declare the maximum number of SQL queries a view may run per request
+    """
+    def decorator(view_func):
+        view_func.query_budget = max_queries
+        return view_func
+    return decorator
+
+
+def _query_wrapper(execute, sql, params, many, context):
+    stats = _current_stats.get()
+    # django-silk (DEBUG only) runs EXPLAINs and writes its own tables; don't count profiler noise.
+    # Savepoints depend on the transaction the view runs in, not on what it does
+    if stats is None or sql.startswith(NOT_COUNTED) or '"silk_' in sql:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.db_time += time.perf_counter() - start
+
+
+def _install_query_wrapper(connection, **kwargs):
+    """
+    Keep _query_wrapper on the connection for good; it only counts while a
+    request's stats are set. Async views run their queries through
+    sync_to_async on another thread's connections, which a wrapper entered
+    around the request would not reach, so new connections get it on connect.
+    """
+    if _query_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_query_wrapper)
+
+
+connection_created.connect(_install_query_wrapper, dispatch_uid='mushanai_request_metrics')
+
+
+@contextmanager
+def _measure():
+    """Count the queries the request runs while the block runs"""
+    for connection in connections.all():
+        _install_query_wrapper(connection)
+    stats = RequestStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+def record_cache_lookup(hits, misses):
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.cache_hits += hits
+        stats.cache_misses += misses
+
+
+class RequestMetricsMiddleware:
+    """
+    Record latency, query count, DB time and cache hits/misses per view
+
+    Sync and async capable, so async views served under ASGI don't pay a
+    thread hop for it.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        start = time.perf_counter()
+        with _measure() as stats:
+            response = self.get_response(request)
+        return self._record(request, response, stats, start)
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        with _measure() as stats:
+            response = await self.get_response(request)
+        return self._record(request, response, stats, start)
+
+    def _record(self, request, response, stats, start):
+        duration = time.perf_counter() - start
+
+        match = getattr(request, 'resolver_match', None)
+        view = (match.view_name if match else None) or 'unresolved'
+        registry.record(view, request.method, response.status_code, duration, stats)
+
+        # Read off the resolved view rather than in process_view, which
+        # Django would run through sync_to_async for an async request
+        budget = getattr(match.func, 'query_budget', None) if match else None
+        if budget is not None and stats.queries > budget:
+            registry.record_budget_exceeded(view)
+            message = f'{view} ran {stats.queries} queries, budget is {budget}'
+            if getattr(settings, 'QUERY_BUDGET_RAISE', False):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint
+    """
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    supplied = request.headers.get('Authorization', '').removeprefix('Bearer ')
+    if not (token and hmac.compare_digest(supplied.encode(), token.encode())) and not request.user.is_staff:
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+_MISSING = object()
+
+
+class InstrumentedRedisCache(RedisCache):
+    """
+    django-redis cache backend that reports hits/misses to the request metrics
+    """
+
+    def get(self, key, default=None, version=None, client=None):
+        value = super().get(key, default=_MISSING, version=version, client=client)
+        if value is _MISSING:
+            record_cache_lookup(0, 1)
+            return default
+        record_cache_lookup(1, 0)
+        return value
+
+    def get_many(self, keys, version=None, client=None):
+        keys = list(keys)
+        values = super().get_many(keys, version=version, client=client)
+        record_cache_lookup(len(values), len(keys) - len(values))
+        return values
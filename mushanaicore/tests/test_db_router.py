@@ -0,0 +1,102 @@
+"""
+Test read-replica routing
+"""
+import pytest
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.http import HttpResponse
+from django.test import AsyncRequestFactory, RequestFactory
+from mushanaicore import db_router
+from mushanaicore.db_router import (
+    ReplicaRouter,
+    ReplicaStickinessMiddleware,
+    use_replica,
+    STICKY_COOKIE_NAME,
+)
+from products.models import Product
+
+
+@pytest.fixture
+def replicas(monkeypatch):
+    """Pretend one healthy replica is configured"""
+    monkeypatch.setattr(db_router, 'get_replica_aliases', lambda: ['replica_0'])
+    monkeypatch.setattr(db_router, '_is_healthy', lambda alias: True)
+
+
+@pytest.mark.unit
+class TestReplicaRouter:
+    """Test replica hints, stickiness and fallback"""
+
+    def route(self, request):
+        """Run a hinted view through the stickiness middleware and return the read alias"""
+        used = {}
+
+        @use_replica
+        def view(request):
+            used['alias'] = ReplicaRouter().db_for_read(Product)
+            return HttpResponse()
+
+        response = ReplicaStickinessMiddleware(view)(request)
+        return used['alias'], response
+
+    def test_reads_default_without_hint(self, replicas):
+        """Test unhinted reads stay on the primary"""
+        assert ReplicaRouter().db_for_read(Product) == 'default'
+        assert ReplicaRouter().db_for_write(Product) == 'default'
+
+    def test_hinted_view_reads_replica(self, replicas):
+        """Test decorated views read from the replica"""
+        alias, _ = self.route(RequestFactory().get('/'))
+        assert alias == 'replica_0'
+
+    def test_post_pins_client_to_primary(self, replicas):
+        """Test read-your-writes stickiness after a POST"""
+        _, response = self.route(RequestFactory().post('/'))
+        assert STICKY_COOKIE_NAME in response.cookies
+
+        request = RequestFactory().get('/')
+        request.COOKIES[STICKY_COOKIE_NAME] = '1'
+        alias, _ = self.route(request)
+        assert alias == 'default'
+
+    def test_unhealthy_replica_falls_back(self, replicas, monkeypatch):
+        """Test reads fall back to the primary when no replica is reachable"""
+        monkeypatch.setattr(db_router, '_is_healthy', lambda alias: False)
+        alias, _ = self.route(RequestFactory().get('/'))
+        assert alias == 'default'
+
+    def test_replica_chosen_once_per_view(self, monkeypatch):
+        """Test every read of a request goes to one replica, probed once on entry"""
+        monkeypatch.setattr(db_router, 'get_replica_aliases', lambda: ['replica_0', 'replica_1', 'replica_2'])
+        probes = []
+        monkeypatch.setattr(db_router, '_is_healthy', lambda alias: probes.append(alias) or True)
+        aliases = []
+
+        @use_replica
+        def view(request):
+            aliases.extend(ReplicaRouter().db_for_read(Product) for _ in range(5))
+            return HttpResponse()
+
+        ReplicaStickinessMiddleware(view)(RequestFactory().get('/'))
+
+        assert len(probes) == 1
+        assert aliases == [probes[0]] * 5
+        assert ReplicaRouter().db_for_read(Product) == 'default'
+
+    def test_async_middleware_pins_client(self, replicas):
+        """Test the middleware stays async for async views and still pins after a POST"""
+        seen = {}
+
+        async def view(request):
+            seen['pinned'] = db_router._pin_primary.get()
+            return HttpResponse()
+
+        middleware = ReplicaStickinessMiddleware(view)
+        assert iscoroutinefunction(middleware)
+
+        response = async_to_sync(middleware)(AsyncRequestFactory().post('/'))
+        assert STICKY_COOKIE_NAME in response.cookies
+
+        request = AsyncRequestFactory().get('/')
+        request.COOKIES[STICKY_COOKIE_NAME] = '1'
+        async_to_sync(middleware)(request)
+        assert seen['pinned'] is True
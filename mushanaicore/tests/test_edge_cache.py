@@ -0,0 +1,105 @@
+"""
+Test edge cache headers, surrogate keys and purging
+"""
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from mushanaicore import edge_cache
+from products.models import ProductView
+
+
+class ImmediateThread:
+    """Run purge threads synchronously"""
+
+    def __init__(self, target, args=(), daemon=None):
+        self.target, self.args = target, args
+
+    def start(self):
+        self.target(*self.args)
+
+
+@pytest.fixture
+def purging(settings, monkeypatch):
+    """Enable purging and capture refreshed paths instead of calling nginx"""
+    settings.EDGE_CACHE_PURGE_URL = 'http://nginx:8081'
+    refreshed = []
+    monkeypatch.setattr(edge_cache, 'refresh_paths', refreshed.extend)
+    monkeypatch.setattr(edge_cache.threading, 'Thread', ImmediateThread)
+    return refreshed
+
+
+@pytest.mark.unit
+class TestEdgeCache:
+    """Test which responses nginx may cache and how they are purged"""
+
+    def test_anonymous_product_page_is_public(self, client, product):
+        """Test anonymous product pages are cacheable, tagged and set no cookies"""
+        response = client.get(reverse('product_detail', args=[product.slug]))
+
+        assert response.status_code == 200
+        assert 'public' in response['Cache-Control']
+        assert 's-maxage=' in response['Cache-Control']
+        assert 'max-age=0' in response['Cache-Control']
+        keys = response[edge_cache.SURROGATE_KEY_HEADER].split()
+        assert {'products', f'product-{product.pk}', f'vendor-{product.vendor_id}'} <= set(keys)
+        assert not response.cookies
+        # Views are recorded by the page's beacon instead
+        assert not ProductView.objects.exists()
+
+    def test_home_page_is_public(self, client, products):
+        """Test the home page embeds no per-visitor CSRF token"""
+        response = client.get(reverse('home'))
+        assert 'public' in response['Cache-Control']
+        assert response[edge_cache.SURROGATE_KEY_HEADER] == 'storefront'
+
+    def test_home_page_rendered_on_every_refresh(self, client, products):
+        """Test a purge re-renders the home page instead of getting a Django-cached copy"""
+        client.get(reverse('home'))
+        with CaptureQueriesContext(connection) as queries:
+            client.get(reverse('home'))
+        assert any('products_product' in query['sql'] for query in queries.captured_queries)
+
+    def test_personalized_responses_are_private(self, customer_client, client, product):
+        """Test logged-in pages and pages setting a session are never shared"""
+        response = customer_client.get(reverse('product_detail', args=[product.slug]))
+        assert 'private' in response['Cache-Control']
+        assert edge_cache.SURROGATE_KEY_HEADER not in response
+
+        client.post(reverse('add_to_cart', args=[product.pk]))  # Guest cart session
+        client.cookies.pop('sessionid', None)
+        response = client.get(reverse('product_detail', args=[product.slug]))
+        assert 'public' in response['Cache-Control']
+
+    def test_beacon_and_csrf_cookie(self, client, product):
+        """Test anonymous views are recorded by the beacon, and cached pages can get a CSRF cookie"""
+        response = client.post(reverse('product_viewed', args=[product.pk]))
+        assert response.status_code == 204
+        assert ProductView.objects.filter(product=product, customer__isnull=True).count() == 1
+
+        response = client.get(reverse('csrf_cookie'))
+        assert response.status_code == 204
+        assert 'csrftoken' in response.cookies
+        assert 'no-cache' in response['Cache-Control']
+
+    def test_save_purges_tagged_pages(self, client, product, products, purging, django_capture_on_commit_callbacks):
+        """Test saving a product refreshes exactly the cached pages tagged with it"""
+        client.get(reverse('product_detail', args=[product.slug]))
+        client.get(reverse('product_detail', args=[products[0].slug]))
+
+        with django_capture_on_commit_callbacks(execute=True):
+            product.price = 50
+            product.save()
+
+        # Both pages carry the vendor's key
+        assert sorted(purging) == sorted([f'/product/{product.slug}/', f'/product/{products[0].slug}/'])
+        assert edge_cache.pop_cached_paths([f'product-{product.pk}']) == []
+
+    def test_purging_disabled_without_url(self, client, product, django_capture_on_commit_callbacks):
+        """Test nothing is recorded or scheduled while EDGE_CACHE_PURGE_URL is empty"""
+        client.get(reverse('product_detail', args=[product.slug]))
+        assert edge_cache.pop_cached_paths([f'product-{product.pk}']) == []
+
+        with django_capture_on_commit_callbacks() as callbacks:
+            product.save()
+        assert not [callback for callback in callbacks if 'purge' in getattr(callback, '__qualname__', '')]
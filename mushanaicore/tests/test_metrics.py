@@ -0,0 +1,116 @@
+"""
+Test request metrics and query budgets
+"""
+import pytest
+from asgiref.sync import async_to_sync, iscoroutinefunction, sync_to_async
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+from django.test import AsyncRequestFactory, RequestFactory
+from django.urls import ResolverMatch
+from mushanaicore import metrics
+from mushanaicore.metrics import RequestMetricsMiddleware, QueryBudgetExceeded, query_budget
+from products.models import Product
+
+
+@pytest.fixture
+def fresh_registry(monkeypatch):
+    """Isolate metrics from other tests under their own Redis keys"""
+    registry = metrics.MetricsRegistry(prefix='mushanai:metrics:test')
+    registry.clear()
+    monkeypatch.setattr(metrics, 'registry', registry)
+    yield registry
+    registry.clear()
+
+
+@pytest.mark.unit
+class TestRequestMetrics:
+    """Test per-view query counting, budgets and the scrape endpoint"""
+
+    def run_view(self, view):
+        def get_response(request):
+            request.resolver_match = ResolverMatch(view, (), {}, url_name='view')
+            return view(request)
+
+        return RequestMetricsMiddleware(get_response)(RequestFactory().get('/'))
+
+    def test_counts_queries(self, fresh_registry, products):
+        """Test queries run by the view are counted"""
+        def view(request):
+            list(Product.objects.all())
+            Product.objects.count()
+            return HttpResponse('ok')
+
+        self.run_view(view)
+
+        output = fresh_registry.render()
+        assert 'mushanai_http_requests_total{view="view",method="GET",status="200"} 1' in output
+        assert 'mushanai_db_queries_per_request_sum{view="view"} 2' in output
+
+    def test_counts_async_view_queries(self, fresh_registry, products):
+        """Test the middleware stays async for async views and still counts their queries"""
+        async def get_response(request):
+            await sync_to_async(list)(Product.objects.all())
+            await Product.objects.acount()
+            return HttpResponse('ok')
+
+        # The queries run on this thread's connection, opened before the test
+        connection_created.send(sender=connection.__class__, connection=connection)
+        middleware = RequestMetricsMiddleware(get_response)
+        assert iscoroutinefunction(middleware)
+        async_to_sync(middleware)(AsyncRequestFactory().get('/'))
+
+        output = fresh_registry.render()
+        assert 'mushanai_http_requests_total{view="unresolved",method="GET",status="200"} 1' in output
+        assert 'mushanai_db_queries_per_request_sum{view="unresolved"} 2' in output
+
+    def test_budget_exceeded_raises(self, fresh_registry, products):
+        """Test a view over its budget fails when QUERY_BUDGET_RAISE is on"""
+        @query_budget(1)
+        def view(request):
+            for product in Product.objects.all():
+                Product.objects.filter(pk=product.pk).exists()
+            return HttpResponse('ok')
+
+        with pytest.raises(QueryBudgetExceeded):
+            self.run_view(view)
+        assert 'mushanai_query_budget_exceeded_total{view="view"} 1' in fresh_registry.render()
+
+    def test_budget_exceeded_logs_in_production(self, settings, fresh_registry, products):
+        """Test going over budget only logs when QUERY_BUDGET_RAISE is off"""
+        settings.QUERY_BUDGET_RAISE = False
+
+        @query_budget(0)
+        def view(request):
+            Product.objects.count()
+            return HttpResponse('ok')
+
+        assert self.run_view(view).status_code == 200
+
+    def test_workers_share_totals(self, fresh_registry, products):
+        """Test a scrape answered by any worker reports requests served by every worker"""
+        def view(request):
+            Product.objects.count()
+            return HttpResponse('ok')
+
+        self.run_view(view)
+        other_worker = metrics.MetricsRegistry(prefix=fresh_registry.prefix)
+        other_worker.record('view', 'GET', 200, 0.2, metrics.RequestStats())
+
+        output = other_worker.render()
+        assert 'mushanai_http_requests_total{view="view",method="GET",status="200"} 2' in output
+        assert 'mushanai_http_request_duration_seconds_count{view="view"} 2' in output
+        assert 'mushanai_db_queries_per_request_sum{view="view"} 1.0' in output
+
+    def test_metrics_endpoint_requires_token(self, client, settings, fresh_registry):
+        """Test /metrics needs the bearer token, whatever address the request comes from"""
+        settings.METRICS_TOKEN = 'scrape-secret'
+        assert client.get('/metrics').status_code == 403
+        assert client.get('/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code == 403
+
+        response = client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape-secret')
+        assert response.status_code == 200
+        assert b'# TYPE mushanai_http_request_duration_seconds histogram' in response.content
+
+        settings.METRICS_TOKEN = ''
+        assert client.get('/metrics', HTTP_AUTHORIZATION='Bearer ').status_code == 403
@@ -0,0 +1,107 @@
+"""
+Test storefront views stay within their query budgets as data grows
+"""
+import pytest
+from decimal import Decimal
+from django.core.cache import cache
+from django.urls import reverse
+from mushanaicore import metrics
+from orders.models import Cart, CartItem
+from products.models import Category, Product, ProductReview
+from products.similarity import refresh_similar_products
+from vendors.models import VendorPaymentOption, VendorProfile
+
+
+@pytest.fixture
+def view_queries(monkeypatch):
+    """Queries per request as counted by RequestMetricsMiddleware"""
+    counts = []
+
+    def record(view, method, status, duration, stats):
+        counts.append(stats.queries)
+
+    monkeypatch.setattr(metrics.registry, 'record', record)
+    return counts
+
+
+def add_products(vendor, category, count, start):
+    return Product.objects.bulk_create([
+        Product(
+            vendor=vendor, category=category, name=f'Woven basket {i}', slug=f'woven-basket-{i}',
+            description='Handwoven basket from Binga', price=Decimal('10') * i, stock_quantity=5,
+        )
+        for i in range(start, start + count)
+    ])
+
+
+def add_reviews(product, customers):
+    ProductReview.objects.bulk_create([
+        ProductReview(product=product, customer=customer, rating=4, comment='Good', is_approved=True)
+        for customer in customers
+    ])
+
+
+def add_customers(django_user_model, count, start):
+    return [
+        django_user_model.objects.create_user(
+            username=f'reviewer{i}', email=f'reviewer{i}@example.com', password='x', user_type='CUSTOMER',
+        )
+        for i in range(start, start + count)
+    ]
+
+
+@pytest.mark.unit
+class TestQueryBudgets:
+    """Test budgeted views run a constant number of queries"""
+
+    def test_home_constant_queries(self, client, view_queries, vendor_user, category, products):
+        """Test the home page runs as many queries with more products and categories"""
+        for _ in range(2):
+            cache.clear()
+            client.get(reverse('home'))
+        add_products(vendor_user, category, 20, start=6)
+        for i in range(3):
+            other = Category.objects.create(name=f'Pottery {i}', slug=f'pottery-{i}')
+            add_products(vendor_user, other, 2, start=30 + 2 * i)
+        cache.clear()
+        client.get(reverse('home'))
+
+        assert view_queries[1] == view_queries[2]
+
+    def test_product_detail_constant_queries(self, customer_client, view_queries, django_user_model,
+                                             vendor_user, category, product):
+        """Test product detail runs as many queries with more reviews and similar products"""
+        add_products(vendor_user, category, 2, start=1)
+        add_reviews(product, add_customers(django_user_model, 2, start=1))
+        refresh_similar_products(full=True)
+        url = reverse('product_detail', kwargs={'slug': product.slug})
+        # The first view also refreshes the vendor's rating metrics
+        customer_client.get(url)
+        customer_client.get(url)
+
+        add_products(vendor_user, category, 10, start=3)
+        add_reviews(product, add_customers(django_user_model, 10, start=3))
+        refresh_similar_products(full=True)
+        customer_client.get(url)
+
+        assert view_queries[1] == view_queries[2]
+
+    def test_checkout_constant_queries(self, customer_client, view_queries, django_user_model,
+                                       customer_user, category, products):
+        """Test checkout runs as many queries with more cart items and vendors"""
+        cart = Cart.objects.create(customer=customer_user)
+        CartItem.objects.create(cart=cart, product=products[0])
+        # The first checkout also sets up the vendor's default payment option
+        customer_client.get(reverse('checkout'))
+        customer_client.get(reverse('checkout'))
+
+        other_vendor = django_user_model.objects.create_user(
+            username='potter', email='potter@example.com', password='x', user_type='VENDOR',
+        )
+        VendorProfile.objects.create(vendor=other_vendor, company_name='Potter')
+        VendorPaymentOption.objects.create(vendor=other_vendor, payment_type='CASH_ON_DELIVERY', is_enabled=True)
+        other_products = add_products(other_vendor, category, 2, start=6)
+        CartItem.objects.bulk_create([CartItem(cart=cart, product=p) for p in products[1:] + other_products])
+        customer_client.get(reverse('checkout'))
+
+        assert view_queries[1] == view_queries[2]
@@ -18,6 +18,7 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from mushanaicore.metrics import metrics_view
 
 # Custom error handlers
 handler404 = 'mushanaicore.error_handlers.handler404'
@@ -27,6 +28,7 @@ handler400 = 'mushanaicore.error_handlers.handler400'
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),
     path('', include('store.urls')),
     path('accounts/', include('accounts.urls')),
     path('accounts/', include('allauth.urls')),  # Django-allauth URLs (Google OAuth)
@@ -35,8 +37,8 @@ urlpatterns = [
     path('customer/', include('customers.urls')),
     path('notifications/', include('notifications.urls')),
     path('manufacturing/', include('manufacturing.urls')),
-    # API routes will be added here
-    # path('api/', include('api.urls')),
+    path('social-media/', include('social_media.urls')),
+    path('api/', include('api.urls')),
 ]
 
 # Serve media files in development
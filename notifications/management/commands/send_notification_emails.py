@@ -0,0 +1,13 @@
+"""
+Management command to send queued notification emails (run every minute from cron)
+"""
+from django.core.management.base import BaseCommand
+from notifications.utils import send_pending_email_notifications
+
+
+class Command(BaseCommand):
+    help = 'Send notification emails queued by create_notification'
+
+    def handle(self, *args, **options):
+        sent = send_pending_email_notifications()
+        self.stdout.write(self.style.SUCCESS(f'Sent {sent} notification emails'))
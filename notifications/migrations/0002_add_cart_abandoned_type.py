@@ -0,0 +1,23 @@
+# Generated by Django 4.2.25 on 2026-10-19 01:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='notification',
+            name='notification_type',
+            field=models.CharField(choices=[('NEW_ORDER', '🛒 New Order'), ('ORDER_CANCELLED', '❌ Order Cancelled'), ('PAYMENT_RECEIVED', '💰 Payment Received'), ('NEW_REVIEW', '⭐ New Review'), ('LOW_STOCK', '📦 Low Stock Alert'), ('NEW_SUPPLIER', '🏭 New Supplier Available'), ('SUPPLIER_APPROVED', '✅ Supplier Material Approved'), ('EVENT_CREATED', '📅 New Event Created'), ('PROMOTION_ENDING', '⏰ Promotion Ending Soon'), ('NEW_MESSAGE', '💬 New Message'), ('DISCUSSION_REPLY', '💭 Discussion Reply'), ('ACCOUNT_VERIFIED', '✅ Account Verified'), ('BADGE_EARNED', '🏆 Badge Earned'), ('MANUFACTURING_COMPLETE', '🏭 Manufacturing Complete'), ('QUALITY_CHECK_FAILED', '⚠️ Quality Check Failed'), ('ORDER_CONFIRMED', '✅ Order Confirmed'), ('ORDER_SHIPPED', '🚚 Order Shipped'), ('ORDER_DELIVERED', '📦 Order Delivered'), ('PAYMENT_PROCESSED', '💳 Payment Processed'), ('NEW_PRODUCT_RECOMMENDATION', '✨ New Product You May Like'), ('PRICE_DROP', '💰 Price Drop Alert'), ('BACK_IN_STOCK', '📦 Back in Stock'), ('NEW_PROJECT', '🌍 New Community Project'), ('WISHLIST_SALE', '🎉 Wishlist Item on Sale'), ('LOYALTY_REWARD', '🎁 Loyalty Reward Earned'), ('VENDOR_RESPONSE', '💬 Vendor Responded'), ('REVIEW_HELPFUL', '👍 Review Marked Helpful'), ('NEW_FOLLOWER', '👤 New Follower'), ('CART_ABANDONED', '🛒 Items Left in Cart')], max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='notificationbatch',
+            name='notification_type',
+            field=models.CharField(choices=[('NEW_ORDER', '🛒 New Order'), ('ORDER_CANCELLED', '❌ Order Cancelled'), ('PAYMENT_RECEIVED', '💰 Payment Received'), ('NEW_REVIEW', '⭐ New Review'), ('LOW_STOCK', '📦 Low Stock Alert'), ('NEW_SUPPLIER', '🏭 New Supplier Available'), ('SUPPLIER_APPROVED', '✅ Supplier Material Approved'), ('EVENT_CREATED', '📅 New Event Created'), ('PROMOTION_ENDING', '⏰ Promotion Ending Soon'), ('NEW_MESSAGE', '💬 New Message'), ('DISCUSSION_REPLY', '💭 Discussion Reply'), ('ACCOUNT_VERIFIED', '✅ Account Verified'), ('BADGE_EARNED', '🏆 Badge Earned'), ('MANUFACTURING_COMPLETE', '🏭 Manufacturing Complete'), ('QUALITY_CHECK_FAILED', '⚠️ Quality Check Failed'), ('ORDER_CONFIRMED', '✅ Order Confirmed'), ('ORDER_SHIPPED', '🚚 Order Shipped'), ('ORDER_DELIVERED', '📦 Order Delivered'), ('PAYMENT_PROCESSED', '💳 Payment Processed'), ('NEW_PRODUCT_RECOMMENDATION', '✨ New Product You May Like'), ('PRICE_DROP', '💰 Price Drop Alert'), ('BACK_IN_STOCK', '📦 Back in Stock'), ('NEW_PROJECT', '🌍 New Community Project'), ('WISHLIST_SALE', '🎉 Wishlist Item on Sale'), ('LOYALTY_REWARD', '🎁 Loyalty Reward Earned'), ('VENDOR_RESPONSE', '💬 Vendor Responded'), ('REVIEW_HELPFUL', '👍 Review Marked Helpful'), ('NEW_FOLLOWER', '👤 New Follower'), ('CART_ABANDONED', '🛒 Items Left in Cart')], max_length=50),
+        ),
+    ]
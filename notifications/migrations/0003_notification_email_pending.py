@@ -0,0 +1,18 @@
+# Generated by Django 4.2.25 on 2026-10-19 02:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0002_add_cart_abandoned_type'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='email_pending',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+    ]
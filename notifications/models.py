@@ -50,6 +50,7 @@ class Notification(models.Model):
         ('VENDOR_RESPONSE', '💬 Vendor Responded'),
         ('REVIEW_HELPFUL', '👍 Review Marked Helpful'),
         ('NEW_FOLLOWER', '👤 New Follower'),
+        ('CART_ABANDONED', '🛒 Items Left in Cart'),
     ]
     
     # Combine all types
@@ -96,6 +97,8 @@ class Notification(models.Model):
     
     # Email sent flag
     email_sent = models.BooleanField(default=False)
+    # Queued for send_notification_emails, so SMTP never runs in a request
+    email_pending = models.BooleanField(default=False, db_index=True)
     
     class Meta:
         ordering = ['-created_at']
@@ -161,6 +164,7 @@ class Notification(models.Model):
             'VENDOR_RESPONSE': '💬',
             'REVIEW_HELPFUL': '👍',
             'NEW_FOLLOWER': '👤',
+            'CART_ABANDONED': '🛒',
         }
         return icons.get(self.notification_type, '🔔')
     
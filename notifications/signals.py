@@ -5,6 +5,7 @@ Automatically create notifications when events occur
 from django.db.models.signals import post_save, pre_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
+from vendors.promotion_scheduler import promotion_ending_soon
 from .utils import *
 
 User = get_user_model()
@@ -106,11 +107,10 @@ def on_event_created(sender, instance, created, **kwargs):
 
 # Promotion Signals
 
-@receiver(post_save, sender='vendors.Promotion')
-def on_promotion_ending_soon(sender, instance, **kwargs):
-    """Notify vendor when promotion is ending soon"""
-    if instance.is_currently_active and instance.days_remaining <= 3 and instance.days_remaining > 0:
-        notify_vendor_promotion_ending(instance.vendor, instance)
+@receiver(promotion_ending_soon)
+def on_promotion_ending_soon(sender, promotion, **kwargs):
+    """Notify vendor when promotion is ending soon (sent once by the promotion scheduler)"""
+    notify_vendor_promotion_ending(promotion.vendor, promotion)
 
 
 # Manufacturing Signals
@@ -7,7 +7,8 @@ from notifications.utils import (
     create_notification,
     notify_vendor_new_order,
     notify_customer_order_confirmed,
-    get_unread_count
+    get_unread_count,
+    send_pending_email_notifications,
 )
 
 
@@ -109,8 +110,8 @@ class TestNotificationUtils:
         # Should return None because preference is disabled
         assert notif is None
     
-    def test_email_notification_sent(self, customer_user, mock_email_send):
-        """Test email notification is sent"""
+    def test_email_notification_sent(self, customer_user, mailoutbox):
+        """Test email notification is queued, then sent by the email job"""
         notif = create_notification(
             recipient=customer_user,
             notification_type='PAYMENT_PROCESSED',
@@ -119,8 +120,16 @@ class TestNotificationUtils:
             send_email=True
         )
         
-        # Check email was attempted
-        assert mock_email_send.called
+        # Nothing is sent while the request runs
+        assert notif.email_pending
+        assert mailoutbox == []
+        
+        assert send_pending_email_notifications() == 1
+        assert len(mailoutbox) == 1
+        assert mailoutbox[0].to == [customer_user.email]
+        notif.refresh_from_db()
+        assert notif.email_sent and not notif.email_pending
+        assert send_pending_email_notifications() == 0
 
 
 @pytest.mark.integration
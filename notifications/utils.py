@@ -2,6 +2,7 @@
 Notification Utility Functions
 Helper functions to create and send notifications
 """
+import logging
 from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.models import ContentType
 from .models import Notification, NotificationPreference
@@ -10,6 +11,10 @@ from django.utils import timezone
 
 User = get_user_model()
 
+logger = logging.getLogger(__name__)
+
+EMAIL_BATCH_SIZE = 200
+
 
 def create_notification(
     recipient,
@@ -36,7 +41,8 @@ def create_notification(
         action_text: Text for action button
         related_object: Related Django model instance
         expires_in_days: Days until notification expires
-        send_email: Whether to send email notification
+        send_email: Whether to send email notification (queued for the
+            send_notification_emails job rather than sent in the request)
     
     Returns:
         Notification object
@@ -62,6 +68,9 @@ def create_notification(
         content_type = ContentType.objects.get_for_model(related_object)
         object_id = related_object.pk
     
+    # Send email if requested and user allows
+    email_pending = send_email and prefs.send_email_notifications and prefs.email_frequency == 'INSTANT'
+    
     # Create notification
     notification = Notification.objects.create(
         recipient=recipient,
@@ -74,25 +83,19 @@ def create_notification(
         content_type=content_type,
         object_id=object_id,
         expires_at=expires_at,
+        email_pending=email_pending,
     )
     
-    # Send email if requested and user allows
-    if send_email and prefs.send_email_notifications and prefs.email_frequency == 'INSTANT':
-        send_email_notification(notification)
-    
     return notification
 
 
-def send_email_notification(notification):
+def build_notification_email(notification):
     """
-    Send email notification to user
+    The email for a notification
     """
-    from django.core.mail import send_mail
+    from django.core.mail import EmailMessage
     from django.conf import settings
     
-    if notification.email_sent:
-        return
-    
     subject = f"{notification.icon} {notification.title}"
     message = f"""
 Hello {notification.recipient.get_full_name() or notification.recipient.username},
@@ -105,21 +108,56 @@ Hello {notification.recipient.get_full_name() or notification.recipient.username
 This is an automated notification from Mushanai.
 To manage your notification preferences, visit: {settings.SITE_URL}/notifications/preferences/
     """
+    return EmailMessage(subject, message, settings.DEFAULT_FROM_EMAIL, [notification.recipient.email])
+
+
+def send_email_notification(notification):
+    """
+    Send email notification to user
+    """
+    if notification.email_sent:
+        return
     
     try:
-        send_mail(
-            subject,
-            message,
-            settings.DEFAULT_FROM_EMAIL,
-            [notification.recipient.email],
-            fail_silently=False,
-        )
+        build_notification_email(notification).send()
         notification.email_sent = True
-        notification.save(update_fields=['email_sent'])
+        notification.email_pending = False
+        notification.save(update_fields=['email_sent', 'email_pending'])
     except Exception as e:
         print(f"Failed to send email notification: {e}")
 
 
+def send_pending_email_notifications(batch_size=EMAIL_BATCH_SIZE):
+    """
+    Send queued notification emails over one SMTP connection.
+    Failed ones stay queued for the next run. Returns the number sent.
+    """
+    from django.core.mail import get_connection
+    
+    pending = list(
+        Notification.objects.filter(email_pending=True)
+        .select_related('recipient')
+        .order_by('created_at')[:batch_size]
+    )
+    if not pending:
+        return 0
+    
+    sent_ids = []
+    with get_connection() as connection:
+        for notification in pending:
+            email = build_notification_email(notification)
+            email.connection = connection
+            try:
+                email.send()
+            except Exception:
+                logger.exception('Failed to send email for notification %s', notification.pk)
+                continue
+            sent_ids.append(notification.pk)
+    
+    Notification.objects.filter(pk__in=sent_ids).update(email_sent=True, email_pending=False)
+    return len(sent_ids)
+
+
 # Vendor Notification Helpers
 
 def notify_vendor_new_order(vendor, order):
@@ -0,0 +1,165 @@
+"""
+Abandoned cart detection
+
+detect_abandoned_carts() (run hourly from cron) works set-wise:
+
+- one UPDATE flags carts with items and no activity - neither on the cart
+  nor on any of its items - for ABANDONED_AFTER as abandoned, returning the
+  newly flagged carts;
+- one UPDATE clears the flag on carts that were touched again or emptied
+  (by checkout or removal) since they were flagged;
+- one grouped query rolls up abandoned carts and their value per vendor into
+  VendorAnalytics, which the vendor dashboard reads instead of counting
+  cart items on every load;
+- one bulk insert queues a recovery notification for each newly abandoned
+  cart's customer.
+"""
+from datetime import timedelta
+from decimal import Decimal
+from django.db import connection, transaction
+from django.db.models import Count, DecimalField, F, Sum
+from django.urls import reverse
+from django.utils import timezone
+from .models import Cart, CartItem
+
+ABANDONED_AFTER = timedelta(hours=24)
+NOTIFICATION_EXPIRY = timedelta(days=7)
+
+MARK_ABANDONED_SQL = """
+    UPDATE {carts} AS c
+    SET is_abandoned = TRUE, abandoned_at = %(now)s
+    WHERE NOT c.is_abandoned
+      AND c.updated_at < %(cutoff)s
+      AND EXISTS (SELECT 1 FROM {cart_items} AS i WHERE i.cart_id = c.id)
+      AND NOT EXISTS (
+          SELECT 1 FROM {cart_items} AS i WHERE i.cart_id = c.id AND i.updated_at >= %(cutoff)s
+      )
+    RETURNING c.id, c.customer_id
+"""
+
+CLEAR_RECOVERED_SQL = """
+    UPDATE {carts} AS c
+    SET is_abandoned = FALSE, abandoned_at = NULL
+    WHERE c.is_abandoned
+      AND (
+          c.updated_at > c.abandoned_at
+          OR NOT EXISTS (SELECT 1 FROM {cart_items} AS i WHERE i.cart_id = c.id)
+          OR EXISTS (SELECT 1 FROM {cart_items} AS i WHERE i.cart_id = c.id AND i.updated_at > c.abandoned_at)
+      )
+"""
+
+
+def _execute(sql, params):
+    with connection.cursor() as cursor:
+        cursor.execute(sql.format(carts=Cart._meta.db_table, cart_items=CartItem._meta.db_table), params)
+        return cursor.fetchall() if cursor.description else cursor.rowcount
+
+
+def mark_abandoned_carts(idle_for=ABANDONED_AFTER, now=None):
+    """Flag idle carts; returns [(cart_id, customer_id)] of the newly abandoned ones"""
+    now = now or timezone.now()
+    return _execute(MARK_ABANDONED_SQL, {'now': now, 'cutoff': now - idle_for})
+
+
+def clear_recovered_carts():
+    """Unflag abandoned carts that were used again or emptied; returns how many"""
+    return _execute(CLEAR_RECOVERED_SQL, {})
+
+
+def refresh_vendor_abandoned_rollups():
+    """
+    Store each vendor's abandoned cart count and value (at current prices) on
+    VendorAnalytics, zeroing vendors with none. Returns the number of vendors
+    with abandoned carts.
+    """
+    from vendors.models import VendorAnalytics
+
+    rollups = CartItem.objects.filter(cart__is_abandoned=True).order_by().values('product__vendor_id').annotate(
+        carts=Count('cart', distinct=True),
+        value=Sum(F('quantity') * F('product__price'), output_field=DecimalField(max_digits=12, decimal_places=2)),
+    )
+    now = timezone.now()
+    analytics = [
+        VendorAnalytics(
+            vendor_id=row['product__vendor_id'],
+            total_abandoned_carts=row['carts'],
+            abandoned_cart_value=row['value'] or Decimal('0'),
+            created_at=now,
+            last_calculated=now,
+        )
+        for row in rollups
+    ]
+    with transaction.atomic():
+        VendorAnalytics.objects.bulk_create(
+            analytics,
+            update_conflicts=True,
+            unique_fields=['vendor'],
+            update_fields=['total_abandoned_carts', 'abandoned_cart_value', 'last_calculated'],
+            batch_size=1000,
+        )
+        VendorAnalytics.objects.exclude(
+            vendor_id__in=[row.vendor_id for row in analytics],
+        ).exclude(total_abandoned_carts=0, abandoned_cart_value=0).update(
+            total_abandoned_carts=0,
+            abandoned_cart_value=0,
+            last_calculated=now,
+        )
+    return len(analytics)
+
+
+def queue_recovery_notifications(abandoned, now=None):
+    """
+    Bulk-create one CART_ABANDONED notification per newly abandoned cart,
+    skipping customers who turned off abandoned cart reminders.
+    """
+    from django.contrib.contenttypes.models import ContentType
+    from customers.models import CustomerDashboard
+    from notifications.models import Notification
+
+    if not abandoned:
+        return 0
+    now = now or timezone.now()
+    # Customers who chose not to be reminded of abandoned carts
+    muted = set(CustomerDashboard.objects.filter(
+        customer_id__in={customer_id for _, customer_id in abandoned},
+        show_abandoned_carts=False,
+    ).values_list('customer_id', flat=True))
+    cart_type = ContentType.objects.get_for_model(Cart)
+    cart_url = reverse('view_cart')
+    notifications = [
+        Notification(
+            recipient_id=customer_id,
+            notification_type='CART_ABANDONED',
+            title='You left items in your cart',
+            message='The products in your cart are still waiting for you. Complete your order before they sell out.',
+            priority='LOW',
+            action_url=cart_url,
+            action_text='View Cart',
+            content_type=cart_type,
+            object_id=cart_id,
+            expires_at=now + NOTIFICATION_EXPIRY,
+        )
+        for cart_id, customer_id in abandoned
+        if customer_id not in muted
+    ]
+    Notification.objects.bulk_create(notifications, batch_size=1000)
+    return len(notifications)
+
+
+def detect_abandoned_carts(idle_for=ABANDONED_AFTER, notify=True, now=None):
+    """
+    Run the whole batch. Returns a dict of counts: abandoned (newly flagged),
+    recovered, vendors and notified.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        recovered = clear_recovered_carts()
+        abandoned = mark_abandoned_carts(idle_for, now)
+    vendors = refresh_vendor_abandoned_rollups()
+    notified = queue_recovery_notifications(abandoned, now) if notify else 0
+    return {
+        'abandoned': len(abandoned),
+        'recovered': recovered,
+        'vendors': vendors,
+        'notified': notified,
+    }
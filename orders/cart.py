@@ -0,0 +1,74 @@
+"""
+Cart summary
+
+The navbar badge and every cart AJAX response need the cart's item count
+and total. get_cart_summary() computes them with one aggregate query -
+including the promotion-adjusted total, using each product's active
+promotion price - and caches the result per customer. Cart and CartItem
+signals invalidate the cached summary on every mutation; the short timeout
+covers price and promotion changes.
+"""
+from decimal import Decimal
+from django.core.cache import cache
+from django.db.models import Count, DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+CART_SUMMARY_CACHE_KEY = 'cart:{}:summary'
+CART_SUMMARY_TIMEOUT = 60 * 5
+
+EMPTY_SUMMARY = {
+    'item_count': 0,
+    'units': 0,
+    'total': Decimal('0.00'),
+    'promotional_total': Decimal('0.00'),
+    'savings': Decimal('0.00'),
+}
+
+MONEY = DecimalField(max_digits=12, decimal_places=2)
+
+
+def active_promotion_price(product_ref='product_id'):
+    """Discounted price of the referenced product under its active promotion (None without one)"""
+    from vendors.models import ProductPromotion
+
+    now = timezone.now()
+    return Subquery(ProductPromotion.objects.filter(
+        product=OuterRef(product_ref),
+        promotion__is_active=True,
+        promotion__status='ACTIVE',
+        promotion__start_date__lte=now,
+        promotion__end_date__gte=now,
+    ).order_by('-added_at').values('discounted_price')[:1], output_field=MONEY)
+
+
+def compute_cart_summary(customer_id):
+    """Line count, units, total and promotion-adjusted total in one query"""
+    from .models import CartItem
+
+    row = CartItem.objects.filter(cart__customer_id=customer_id).aggregate(
+        item_count=Count('id'),
+        units=Coalesce(Sum('quantity'), 0),
+        total=Coalesce(Sum(F('quantity') * F('product__price'), output_field=MONEY), Value(Decimal('0')), output_field=MONEY),
+        promotional_total=Coalesce(
+            Sum(F('quantity') * Coalesce(active_promotion_price(), F('product__price')), output_field=MONEY),
+            Value(Decimal('0')),
+            output_field=MONEY,
+        ),
+    )
+    row['savings'] = row['total'] - row['promotional_total']
+    return row
+
+
+def get_cart_summary(customer_id, refresh=False):
+    """Cached summary of the customer's cart; refresh=True recomputes it"""
+    key = CART_SUMMARY_CACHE_KEY.format(customer_id)
+    summary = None if refresh else cache.get(key)
+    if summary is None:
+        summary = compute_cart_summary(customer_id)
+        cache.set(key, summary, CART_SUMMARY_TIMEOUT)
+    return summary
+
+
+def invalidate_cart_summary(customer_id):
+    cache.delete(CART_SUMMARY_CACHE_KEY.format(customer_id))
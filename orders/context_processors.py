@@ -0,0 +1,19 @@
+"""
+Template context for the navbar cart badge
+"""
+from django.utils.functional import SimpleLazyObject
+from . import guest_cart
+from .cart import get_cart_summary, EMPTY_SUMMARY
+
+
+def cart_summary(request):
+    """Lazy cart summary for customers and guests: pages that don't render the badge pay nothing"""
+    user = getattr(request, 'user', None)
+    if user and not user.is_authenticated and hasattr(request, 'session'):
+        if not request.session.get(guest_cart.SESSION_TOKEN_KEY):
+            return {'cart_summary': EMPTY_SUMMARY}
+        # The badge only needs the line count: one Redis call, no query
+        return {'cart_summary': SimpleLazyObject(lambda: dict(EMPTY_SUMMARY, item_count=guest_cart.item_count(request)))}
+    if not user or not user.is_authenticated or user.user_type != 'CUSTOMER':
+        return {'cart_summary': EMPTY_SUMMARY}
+    return {'cart_summary': SimpleLazyObject(lambda: get_cart_summary(user.pk))}
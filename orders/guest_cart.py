@@ -0,0 +1,165 @@
+"""
+Guest carts
+
+Anonymous shoppers keep their cart in a Redis hash (product id -> quantity)
+instead of Cart/CartItem rows, so browsing and cart changes never write to
+the primary database. The hash is keyed by a random token stored in the
+session; the token survives the session key change at login, when
+merge_guest_cart() moves the items into the customer's Cart with one bulk
+upsert (quantities of products already in the cart are added together) and
+drops the hash.
+"""
+import uuid
+from django.db import connection, transaction
+from django.db.models import F
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django_redis import get_redis_connection
+from .cart import EMPTY_SUMMARY, active_promotion_price, invalidate_cart_summary
+
+GUEST_CART_KEY = 'mushanai:guestcart:{}'
+GUEST_CART_TTL = 60 * 60 * 24 * 14
+SESSION_TOKEN_KEY = 'guest_cart'
+
+MERGE_SQL = """
+    INSERT INTO {cart_items} (cart_id, product_id, quantity, created_at, updated_at)
+    SELECT %s, p.id, v.quantity, %s, %s
+    FROM (VALUES {values}) AS v (product_id, quantity)
+    JOIN {products} AS p ON p.id = v.product_id AND p.is_active
+    ON CONFLICT (cart_id, product_id)
+    DO UPDATE SET quantity = {cart_items}.quantity + EXCLUDED.quantity,
+                  updated_at = EXCLUDED.updated_at
+"""
+
+
+class GuestCartItem:
+    """Template stand-in for a CartItem; the product id doubles as the item id"""
+
+    def __init__(self, product, quantity):
+        self.id = product.pk
+        self.product = product
+        self.quantity = quantity
+
+    @property
+    def subtotal(self):
+        return self.product.price * self.quantity
+
+
+def _redis():
+    return get_redis_connection('default')
+
+
+def _key(request, create=False):
+    token = request.session.get(SESSION_TOKEN_KEY)
+    if not token and create:
+        token = request.session[SESSION_TOKEN_KEY] = uuid.uuid4().hex
+    return GUEST_CART_KEY.format(token) if token else None
+
+
+def get_quantities(request):
+    """{product_id: quantity} in the guest cart"""
+    key = _key(request)
+    if not key:
+        return {}
+    return {int(product_id): int(quantity) for product_id, quantity in _redis().hgetall(key).items()}
+
+
+def get_quantity(request, product_id):
+    key = _key(request)
+    quantity = _redis().hget(key, product_id) if key else None
+    return int(quantity) if quantity else 0
+
+
+def item_count(request):
+    """Number of distinct products (one Redis call, no database query)"""
+    key = _key(request)
+    return _redis().hlen(key) if key else 0
+
+
+def add_item(request, product_id, quantity):
+    """Add to the product's quantity; returns the new quantity"""
+    key = _key(request, create=True)
+    pipe = _redis().pipeline()
+    pipe.hincrby(key, product_id, quantity)
+    pipe.expire(key, GUEST_CART_TTL)
+    new_quantity, _ = pipe.execute()
+    return new_quantity
+
+
+def set_quantity(request, product_id, quantity):
+    key = _key(request, create=True)
+    pipe = _redis().pipeline()
+    pipe.hset(key, product_id, quantity)
+    pipe.expire(key, GUEST_CART_TTL)
+    pipe.execute()
+
+
+def remove_item(request, product_id):
+    """Returns True if the product was in the cart"""
+    key = _key(request)
+    return bool(key and _redis().hdel(key, product_id))
+
+
+def get_items(request):
+    """GuestCartItems for the active products in the guest cart"""
+    from products.models import Product
+
+    quantities = get_quantities(request)
+    if not quantities:
+        return []
+    products = Product.objects.filter(pk__in=quantities, is_active=True).select_related('vendor', 'category')
+    by_id = {product.pk: product for product in products}
+    return [GuestCartItem(by_id[pk], quantity) for pk, quantity in quantities.items() if pk in by_id]
+
+
+def get_summary(request):
+    """Same shape as orders.cart.get_cart_summary(), priced in one query"""
+    from products.models import Product
+
+    quantities = get_quantities(request)
+    if not quantities:
+        return dict(EMPTY_SUMMARY)
+    prices = Product.objects.filter(pk__in=quantities, is_active=True).annotate(
+        promotional_price=Coalesce(active_promotion_price('pk'), F('price')),
+    ).values_list('pk', 'price', 'promotional_price')
+
+    summary = dict(EMPTY_SUMMARY)
+    for product_id, price, promotional_price in prices:
+        quantity = quantities[product_id]
+        summary['item_count'] += 1
+        summary['units'] += quantity
+        summary['total'] += price * quantity
+        summary['promotional_total'] += promotional_price * quantity
+    summary['savings'] = summary['total'] - summary['promotional_total']
+    return summary
+
+
+def merge_guest_cart(request, user):
+    """
+    Move the guest cart into the customer's Cart with one bulk upsert.
+    Returns the number of guest cart lines merged.
+    """
+    from products.models import Product
+    from .models import Cart, CartItem
+
+    key = _key(request)
+    if not key:
+        return 0
+    quantities = get_quantities(request)
+    if quantities and getattr(user, 'user_type', None) == 'CUSTOMER':
+        now = timezone.now()
+        with transaction.atomic():
+            cart, _ = Cart.objects.get_or_create(customer=user)
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    MERGE_SQL.format(
+                        cart_items=CartItem._meta.db_table,
+                        products=Product._meta.db_table,
+                        values=', '.join(['(%s::bigint, %s::int)'] * len(quantities)),
+                    ),
+                    [cart.pk, now, now] + [value for item in quantities.items() for value in item],
+                )
+        invalidate_cart_summary(user.pk)
+    _redis().delete(key)
+    request.session.pop(SESSION_TOKEN_KEY, None)
+    return len(quantities)
@@ -0,0 +1,26 @@
+"""
+Management command to flag abandoned carts and queue recovery notifications (run hourly from cron)
+"""
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from orders.abandoned import ABANDONED_AFTER, detect_abandoned_carts
+
+
+class Command(BaseCommand):
+    help = 'Flag idle carts as abandoned, roll up abandoned carts per vendor and notify customers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=int(ABANDONED_AFTER.total_seconds() // 3600),
+                            help='Hours without cart activity before a cart counts as abandoned')
+        parser.add_argument('--no-notify', action='store_true',
+                            help='Flag carts and refresh rollups without queuing notifications')
+
+    def handle(self, *args, **options):
+        counts = detect_abandoned_carts(
+            idle_for=timedelta(hours=max(options['hours'], 1)),
+            notify=not options['no_notify'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Flagged {counts['abandoned']} abandoned carts ({counts['recovered']} recovered), "
+            f"{counts['vendors']} vendors affected, {counts['notified']} notifications queued"
+        ))
@@ -2,6 +2,7 @@ from django.db import models
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator
 from decimal import Decimal
+from accounts import numbering
 
 User = get_user_model()
 
@@ -22,13 +23,19 @@ class Cart(models.Model):
     def __str__(self):
         return f"Cart for {self.customer.username}"
     
+    @property
+    def summary(self):
+        """Cached item count and totals (see orders.cart)"""
+        from .cart import get_cart_summary
+        return get_cart_summary(self.customer_id)
+    
     @property
     def total(self):
-        return sum(item.subtotal for item in self.items.all())
+        return self.summary['total']
     
     @property
     def item_count(self):
-        return self.items.count()
+        return self.summary['item_count']
 
 
 class CartItem(models.Model):
@@ -124,14 +131,9 @@ class Order(models.Model):
         return f"Order {self.order_number} - {self.customer.username}"
     
     def save(self, *args, **kwargs):
-        if not self.order_number:
-            # Generate unique order number
-            from datetime import datetime
-            import random
-            if not self.pk:
-                super().save(*args, **kwargs)  # Save first to get an ID
-            self.order_number = f"ORD-{datetime.now().strftime('%Y%m%d')}-{self.id}-{random.randint(1000, 9999)}"
-        super().save(*args, **kwargs)
+        # Number from the platform-wide order sequence: one INSERT, no second save
+        with numbering.numbered(self, 'order_number', numbering.ORDER):
+            super().save(*args, **kwargs)
 
 
 class OrderItem(models.Model):
@@ -0,0 +1,27 @@
+"""
+Order Signals
+Keep cached cart summaries in sync with cart changes and merge guest carts on login
+"""
+from django.contrib.auth.signals import user_logged_in
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .cart import invalidate_cart_summary
+from .guest_cart import merge_guest_cart
+
+
+@receiver([post_save, post_delete], sender='orders.CartItem')
+def on_cart_item_changed(sender, instance, **kwargs):
+    """Cart items loaded through cart.items or with select_related('cart') need no query here"""
+    invalidate_cart_summary(instance.cart.customer_id)
+
+
+@receiver(post_delete, sender='orders.Cart')
+def on_cart_deleted(sender, instance, **kwargs):
+    invalidate_cart_summary(instance.customer_id)
+
+
+@receiver(user_logged_in)
+def on_user_logged_in(sender, request, user, **kwargs):
+    """Move a guest cart into the customer's cart"""
+    if request is not None and hasattr(request, 'session'):
+        merge_guest_cart(request, user)
@@ -0,0 +1,98 @@
+"""
+Test the abandoned cart batch job
+"""
+from datetime import timedelta
+from decimal import Decimal
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from customers.models import CustomerDashboard
+from notifications.models import Notification
+from orders.abandoned import detect_abandoned_carts
+from orders.models import Cart, CartItem
+from vendors.models import VendorAnalytics
+
+User = get_user_model()
+
+
+def make_cart(customer, items, idle_hours):
+    """A cart of (product, quantity) items last touched idle_hours ago"""
+    cart = Cart.objects.create(customer=customer)
+    for product, quantity in items:
+        CartItem.objects.create(cart=cart, product=product, quantity=quantity)
+    touched = timezone.now() - timedelta(hours=idle_hours)
+    Cart.objects.filter(pk=cart.pk).update(updated_at=touched)
+    CartItem.objects.filter(cart=cart).update(updated_at=touched)
+    return cart
+
+
+@pytest.fixture
+def other_customer(db):
+    return User.objects.create_user(username='othercustomer', password='testpass123', user_type='CUSTOMER')
+
+
+@pytest.mark.unit
+class TestAbandonedCarts:
+    """Test flagging, recovery, vendor rollups and notifications"""
+
+    def test_flags_idle_carts_and_rolls_up(self, customer_user, other_customer, vendor_user, products):
+        """Test only idle carts are flagged and the vendor rollup counts carts and value"""
+        idle = make_cart(customer_user, [(products[0], 2), (products[1], 1)], idle_hours=30)
+        active = make_cart(other_customer, [(products[2], 1)], idle_hours=2)
+
+        counts = detect_abandoned_carts()
+
+        assert counts == {'abandoned': 1, 'recovered': 0, 'vendors': 1, 'notified': 1}
+        idle.refresh_from_db()
+        active.refresh_from_db()
+        assert idle.is_abandoned and idle.abandoned_at
+        assert not active.is_abandoned
+        analytics = VendorAnalytics.objects.get(vendor=vendor_user)
+        assert analytics.total_abandoned_carts == 1
+        assert analytics.abandoned_cart_value == Decimal('40.00')
+
+        notification = Notification.objects.get(recipient=customer_user)
+        assert notification.notification_type == 'CART_ABANDONED'
+        assert notification.object_id == idle.pk
+
+        # Already flagged carts are not notified again
+        assert detect_abandoned_carts()['notified'] == 0
+
+    def test_recovered_carts_are_cleared(self, customer_user, vendor_user, products):
+        """Test touching or emptying an abandoned cart clears the flag and the rollup"""
+        cart = make_cart(customer_user, [(products[0], 1)], idle_hours=30)
+        detect_abandoned_carts()
+
+        item = cart.items.get()
+        item.quantity = 3
+        item.save()
+        counts = detect_abandoned_carts()
+
+        assert counts['recovered'] == 1
+        cart.refresh_from_db()
+        assert not cart.is_abandoned and cart.abandoned_at is None
+        analytics = VendorAnalytics.objects.get(vendor=vendor_user)
+        assert (analytics.total_abandoned_carts, analytics.abandoned_cart_value) == (0, Decimal('0'))
+
+    def test_respects_reminder_preference(self, customer_user, products):
+        """Test customers who hide abandoned carts get no reminder"""
+        CustomerDashboard.objects.create(customer=customer_user, show_abandoned_carts=False)
+        make_cart(customer_user, [(products[0], 1)], idle_hours=30)
+
+        call_command('detect_abandoned_carts', '--hours', '24')
+
+        assert Cart.objects.get(customer=customer_user).is_abandoned
+        assert not Notification.objects.filter(recipient=customer_user).exists()
+
+    def test_dashboard_reads_rollup(self, client, customer_user, vendor_user, products):
+        """Test the vendor dashboard shows the precomputed count"""
+        make_cart(customer_user, [(products[0], 1)], idle_hours=30)
+        detect_abandoned_carts(notify=False)
+
+        client.force_login(vendor_user)
+        response = client.get(reverse('vendor_dashboard'))
+
+        assert response.status_code == 200
+        assert response.context['abandoned_carts_count'] == 1
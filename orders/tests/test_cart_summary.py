@@ -0,0 +1,83 @@
+"""
+Test the cached cart summary
+"""
+from decimal import Decimal
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from orders.cart import get_cart_summary
+from orders.models import Cart, CartItem
+from vendors.models import ProductPromotion
+
+
+def count_queries(func):
+    with CaptureQueriesContext(connection) as ctx:
+        result = func()
+    return result, len([
+        q for q in ctx.captured_queries
+        if not q['sql'].startswith(('EXPLAIN', 'SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT'))
+        and '"silk_' not in q['sql']
+    ])
+
+
+@pytest.fixture
+def cart(customer_user, products):
+    """Two of product 1 ($10) and one of product 3 ($30)"""
+    cart = Cart.objects.create(customer=customer_user)
+    CartItem.objects.create(cart=cart, product=products[0], quantity=2)
+    CartItem.objects.create(cart=cart, product=products[2], quantity=1)
+    return cart
+
+
+@pytest.mark.unit
+class TestCartSummary:
+    """Test single-query totals, caching and invalidation"""
+
+    def test_summary_in_one_query_then_cached(self, customer_user, cart, products, promotion):
+        """Test counts, totals and promotion-adjusted totals come from one query"""
+        promotion.status = 'ACTIVE'
+        promotion.save()
+        ProductPromotion.objects.create(promotion=promotion, product=products[2])  # 25% off $30
+
+        summary, queries = count_queries(lambda: get_cart_summary(customer_user.pk))
+        assert queries == 1
+        assert (summary['item_count'], summary['units']) == (2, 3)
+        assert summary['total'] == Decimal('50.00')
+        assert summary['promotional_total'] == Decimal('42.50')
+        assert summary['savings'] == Decimal('7.50')
+
+        _, queries = count_queries(lambda: get_cart_summary(customer_user.pk))
+        assert queries == 0
+
+    def test_mutations_invalidate(self, customer_user, cart, products):
+        """Test adding, updating and removing items refresh the cached summary"""
+        assert cart.item_count == 2
+        item = CartItem.objects.create(cart=cart, product=products[1], quantity=1)
+        assert (cart.item_count, cart.total) == (3, Decimal('70.00'))
+
+        item.quantity = 3
+        item.save()
+        assert cart.total == Decimal('110.00')
+
+        cart.items.all().delete()
+        assert (cart.item_count, cart.total) == (0, Decimal('0'))
+
+    def test_cart_views(self, customer_client, customer_user, cart, products):
+        """Test AJAX responses report the updated summary with a constant query count"""
+        item = cart.items.get(product=products[0])
+        url = reverse('update_cart_item', kwargs={'item_id': item.pk})
+        response, queries = count_queries(lambda: customer_client.post(url, {'quantity': 4}))
+        data = response.json()
+        assert queries == 5  # session, user, item with cart and product, update, summary
+        assert (data['cart_item_count'], data['cart_total'], data['item_subtotal']) == (2, '70.00', '40.00')
+
+        response = customer_client.post(reverse('add_to_cart', kwargs={'product_id': products[1].pk}))
+        assert response.json()['cart_total'] == '90.00'
+
+        response = customer_client.post(reverse('remove_from_cart', kwargs={'item_id': item.pk}))
+        assert response.json()['cart_item_count'] == 2
+
+        response = customer_client.get(reverse('view_cart'))
+        assert response.context['summary']['total'] == Decimal('50.00')
+        assert response.context['cart_summary']['item_count'] == 2
@@ -0,0 +1,78 @@
+"""
+Test Redis-backed guest carts and the merge on login
+"""
+from decimal import Decimal
+import pytest
+from django.urls import reverse
+from orders import guest_cart
+from orders.models import Cart, CartItem
+
+
+def guest_key(client):
+    return guest_cart.GUEST_CART_KEY.format(client.session[guest_cart.SESSION_TOKEN_KEY])
+
+
+@pytest.mark.unit
+class TestGuestCart:
+    """Test guest cart views and merging into the customer's cart"""
+
+    def test_guest_add_update_remove(self, client, products):
+        """Test guests can manage a cart without creating Cart rows"""
+        response = client.post(reverse('add_to_cart', args=[products[0].pk]), {'quantity': 2})
+        assert response.status_code == 200
+        assert response.json()['cart_item_count'] == 1
+        assert response.json()['cart_total'] == '20.00'
+
+        client.post(reverse('add_to_cart', args=[products[0].pk]), {'quantity': 1})
+        response = client.post(reverse('add_to_cart', args=[products[1].pk]))
+        assert response.json()['cart_item_count'] == 2
+        assert response.json()['cart_total'] == '50.00'
+
+        response = client.post(reverse('update_cart_item', args=[products[1].pk]), {'quantity': 4})
+        assert response.json()['item_subtotal'] == '80.00'
+        assert response.json()['cart_total'] == '110.00'
+
+        response = client.post(reverse('remove_from_cart', args=[products[0].pk]))
+        assert response.json()['cart_item_count'] == 1
+        assert client.post(reverse('remove_from_cart', args=[products[0].pk])).status_code == 404
+
+        response = client.get(reverse('view_cart'))
+        assert response.status_code == 200
+        assert [(item.product, item.quantity) for item in response.context['cart_items']] == [(products[1], 4)]
+        assert response.context['summary']['total'] == Decimal('80.00')
+        assert response.context['cart_summary']['item_count'] == 1
+        assert not Cart.objects.exists()
+        assert not CartItem.objects.exists()
+
+    def test_merge_on_login(self, client, customer_user, products):
+        """Test logging in adds guest quantities to the existing cart and clears the guest cart"""
+        cart = Cart.objects.create(customer=customer_user)
+        CartItem.objects.create(cart=cart, product=products[0], quantity=1)
+        client.post(reverse('add_to_cart', args=[products[0].pk]), {'quantity': 2})
+        client.post(reverse('add_to_cart', args=[products[2].pk]))
+        key = guest_key(client)
+
+        assert client.login(username='testcustomer', password='testpass123')
+
+        assert dict(cart.items.values_list('product_id', 'quantity')) == {products[0].pk: 3, products[2].pk: 1}
+        assert cart.total == Decimal('60.00')
+        assert not guest_cart._redis().exists(key)
+        assert guest_cart.SESSION_TOKEN_KEY not in client.session
+
+    def test_merge_skips_inactive_products(self, client, customer_user, products):
+        """Test products deactivated while in the guest cart are not merged"""
+        client.post(reverse('add_to_cart', args=[products[0].pk]))
+        client.post(reverse('add_to_cart', args=[products[1].pk]))
+        products[1].is_active = False
+        products[1].save()
+
+        client.force_login(customer_user)
+
+        cart = Cart.objects.get(customer=customer_user)
+        assert list(cart.items.values_list('product_id', flat=True)) == [products[0].pk]
+
+    def test_non_customers_cannot_add(self, vendor_user, client, products):
+        """Test logged-in vendors are still refused"""
+        client.force_login(vendor_user)
+        response = client.post(reverse('add_to_cart', args=[products[0].pk]))
+        assert response.status_code == 403
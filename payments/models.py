@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator
+from accounts import numbering
 
 User = get_user_model()
 
@@ -105,11 +106,8 @@ class PaymentTransaction(models.Model):
         return f"Payment {self.payment_reference} - {self.status} - {self.amount}"
     
     def save(self, *args, **kwargs):
-        if not self.payment_reference:
-            from datetime import datetime
-            import random
-            self.payment_reference = f"PAY-{datetime.now().strftime('%Y%m%d%H%M%S')}-{random.randint(1000, 9999)}"
-        super().save(*args, **kwargs)
+        with numbering.numbered(self, 'payment_reference', numbering.PAYMENT):
+            super().save(*args, **kwargs)
 
 
 class FiscalReceipt(models.Model):
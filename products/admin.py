@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Category, Brand, Product, ProductImage, ProductReview, ProductView, ReviewPhoto, ReviewHelpfulVote, ProductTag, CategoryDisplaySchedule
+from .models import Category, Brand, Product, ProductImage, ProductReview, ProductView, RecentlyViewedProduct, TrendingProduct, ReviewPhoto, ReviewHelpfulVote, ProductTag, CategoryDisplaySchedule
 
 
 @admin.register(Category)
@@ -186,6 +186,28 @@ class ProductViewAdmin(admin.ModelAdmin):
         return False  # Views are created automatically
 
 
+@admin.register(RecentlyViewedProduct)
+class RecentlyViewedProductAdmin(admin.ModelAdmin):
+    list_display = ['customer', 'product', 'viewed_at']
+    search_fields = ['product__name', 'customer__username']
+    raw_id_fields = ['product', 'customer']
+    readonly_fields = ['viewed_at']
+    
+    def has_add_permission(self, request):
+        return False  # Maintained by products.recently_viewed
+
+
+@admin.register(TrendingProduct)
+class TrendingProductAdmin(admin.ModelAdmin):
+    list_display = ['product', 'category', 'score', 'recent_views', 'recent_sales', 'recent_reviews', 'computed_at']
+    list_filter = ['category']
+    search_fields = ['product__name']
+    raw_id_fields = ['product']
+    
+    def has_add_permission(self, request):
+        return False  # Rebuilt by refresh_trending_scores
+
+
 @admin.register(ProductTag)
 class ProductTagAdmin(admin.ModelAdmin):
     list_display = ['name', 'slug', 'color', 'is_active', 'created_at']
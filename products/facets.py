@@ -0,0 +1,123 @@
+"""
+Search facets for the product filter sidebar
+"""
+from decimal import Decimal
+from django.core.cache import cache
+from django.db.models import Case, When, Value, IntegerField, Count, Min, Max
+from django.contrib.auth import get_user_model
+from .models import Product, Category
+
+User = get_user_model()
+
+GLOBAL_FACETS_CACHE_KEY = 'products:search_facets:global'
+GLOBAL_FACETS_TIMEOUT = 60 * 60  # 1 hour, invalidated on Product/Category changes
+
+# (lower, upper) bounds in USD; the last bucket is open ended
+PRICE_BUCKETS = [
+    (Decimal('0'), Decimal('10')),
+    (Decimal('10'), Decimal('25')),
+    (Decimal('25'), Decimal('50')),
+    (Decimal('50'), Decimal('100')),
+    (Decimal('100'), Decimal('250')),
+    (Decimal('250'), None),
+]
+
+
+def _price_bucket_label(lower, upper):
+    if upper is None:
+        return f"${lower:,.0f}+"
+    if not lower:
+        return f"Under ${upper:,.0f}"
+    return f"${lower:,.0f} - ${upper:,.0f}"
+
+
+def _price_bucket_expression():
+    """Map Product.price to the index of its PRICE_BUCKETS entry"""
+    whens = [
+        When(price__lt=upper, then=Value(index))
+        for index, (lower, upper) in enumerate(PRICE_BUCKETS)
+        if upper is not None
+    ]
+    return Case(*whens, default=Value(len(PRICE_BUCKETS) - 1), output_field=IntegerField())
+
+
+def get_global_facets():
+    """
+    Get the query-independent filter options (categories, vendors, price range)
+    Cached until a Product or Category changes
+    """
+    facets = cache.get(GLOBAL_FACETS_CACHE_KEY)
+    if facets is not None:
+        return facets
+
+    categories = list(Category.objects.order_by('name').values('id', 'name'))
+    vendors = list(User.objects.filter(
+        user_type='VENDOR',
+        products__is_active=True
+    ).distinct().order_by('username').values('id', 'username'))
+    price_range = Product.objects.filter(is_active=True).aggregate(
+        min_price=Min('price'),
+        max_price=Max('price')
+    )
+
+    facets = {
+        'categories': categories,
+        'vendors': vendors,
+        'price_range': price_range,
+    }
+    cache.set(GLOBAL_FACETS_CACHE_KEY, facets, GLOBAL_FACETS_TIMEOUT)
+    return facets
+
+
+def invalidate_global_facets():
+    """Drop the cached global facets so the next search rebuilds them"""
+    cache.delete(GLOBAL_FACETS_CACHE_KEY)
+
+
+def get_result_facets(products):
+    """
+    Count the current result set per category, vendor, price bucket and
+    local materials flag in a single grouped query
+    """
+    rows = Product.objects.filter(
+        pk__in=products.values('pk')
+    ).order_by().values(
+        'category_id',
+        'vendor_id',
+        'is_made_from_local_materials',
+        price_bucket=_price_bucket_expression(),
+    ).annotate(total=Count('pk'))
+
+    category_counts = {}
+    vendor_counts = {}
+    bucket_counts = [0] * len(PRICE_BUCKETS)
+    local_materials_count = 0
+    total = 0
+
+    for row in rows:
+        count = row['total']
+        total += count
+        category_counts[row['category_id']] = category_counts.get(row['category_id'], 0) + count
+        if row['vendor_id']:
+            vendor_counts[row['vendor_id']] = vendor_counts.get(row['vendor_id'], 0) + count
+        bucket_counts[row['price_bucket']] += count
+        if row['is_made_from_local_materials']:
+            local_materials_count += count
+
+    price_buckets = [
+        {
+            'label': _price_bucket_label(lower, upper),
+            'min_price': lower,
+            'max_price': upper,
+            'count': bucket_counts[index],
+        }
+        for index, (lower, upper) in enumerate(PRICE_BUCKETS)
+    ]
+
+    return {
+        'categories': category_counts,
+        'vendors': vendor_counts,
+        'price_buckets': price_buckets,
+        'local_materials': local_materials_count,
+        'total': total,
+    }
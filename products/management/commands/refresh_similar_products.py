@@ -0,0 +1,16 @@
+"""
+Management command to refresh precomputed similar products (run every few minutes from cron, --full nightly)
+"""
+from django.core.management.base import BaseCommand
+from products.similarity import refresh_similar_products
+
+
+class Command(BaseCommand):
+    help = 'Recompute TF-IDF nearest neighbours for changed products (or all with --full)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Rebuild neighbours for the whole catalog')
+
+    def handle(self, *args, **options):
+        count = refresh_similar_products(full=options['full'])
+        self.stdout.write(self.style.SUCCESS(f'Refreshed similar products for {count} products'))
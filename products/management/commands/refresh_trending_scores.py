@@ -0,0 +1,13 @@
+"""
+Management command to recompute trending product scores (run hourly from cron)
+"""
+from django.core.management.base import BaseCommand
+from products.trending import refresh_trending_scores
+
+
+class Command(BaseCommand):
+    help = 'Recompute time-decayed trending scores from recent views, sales and reviews'
+
+    def handle(self, *args, **options):
+        count = refresh_trending_scores()
+        self.stdout.write(self.style.SUCCESS(f'Scored {count} trending products'))
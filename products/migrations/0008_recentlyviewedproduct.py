@@ -0,0 +1,30 @@
+# Generated by Django 4.2.25 on 2026-10-19 01:01
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('products', '0007_alter_category_options'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecentlyViewedProduct',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('viewed_at', models.DateTimeField()),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recently_viewed_products', to=settings.AUTH_USER_MODEL)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recent_viewers', to='products.product')),
+            ],
+            options={
+                'ordering': ['-viewed_at'],
+                'indexes': [models.Index(fields=['customer', '-viewed_at'], name='products_re_custome_caa23f_idx')],
+                'unique_together': {('customer', 'product')},
+            },
+        ),
+    ]
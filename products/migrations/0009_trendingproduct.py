@@ -0,0 +1,33 @@
+# Generated by Django 4.2.25 on 2026-10-19 01:04
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0008_recentlyviewedproduct'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingProduct',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(default=0)),
+                ('recent_views', models.PositiveIntegerField(default=0)),
+                ('recent_sales', models.PositiveIntegerField(default=0)),
+                ('recent_reviews', models.PositiveIntegerField(default=0)),
+                ('avg_rating', models.DecimalField(blank=True, decimal_places=2, max_digits=3, null=True)),
+                ('review_total', models.PositiveIntegerField(default=0)),
+                ('computed_at', models.DateTimeField()),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='trending_products', to='products.category')),
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='trending', to='products.product')),
+            ],
+            options={
+                'ordering': ['-score'],
+                'indexes': [models.Index(fields=['-score'], name='products_tr_score_5ce07e_idx'), models.Index(fields=['category', '-score'], name='products_tr_categor_d71660_idx')],
+            },
+        ),
+    ]
@@ -6,6 +6,32 @@ from django.db.models import Avg
 
 User = get_user_model()
 
+ACTIVE_PROMOTION_CACHE_KEY = 'product:{}:active_promotion'
+ACTIVE_PROMOTION_CACHE_TIMEOUT = 60 * 15
+
+
+def active_promotion_prefetch(lookup='promotion_links'):
+    """
+    Prefetch the active promotion links of products reached through `lookup`
+    (e.g. 'product__promotion_links' from an item queryset), so
+    Product.get_active_promotion() needs no query or cache round trip per product.
+    """
+    from django.db.models import Prefetch
+    from django.utils import timezone
+    from vendors.models import ProductPromotion
+    
+    now = timezone.now()
+    return Prefetch(
+        lookup,
+        queryset=ProductPromotion.objects.select_related('promotion').filter(
+            promotion__is_active=True,
+            promotion__status='ACTIVE',
+            promotion__start_date__lte=now,
+            promotion__end_date__gte=now,
+        ),
+        to_attr='active_promotion_links',
+    )
+
 
 class Category(models.Model):
     """
@@ -30,6 +56,7 @@ class Category(models.Model):
     
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         verbose_name_plural = 'Categories'
@@ -175,21 +202,40 @@ class Product(models.Model):
     
     # Promotion-related methods
     def get_active_promotion(self):
-        """Get the currently active promotion for this product"""
+        """
+        Get the currently active promotion for this product.
+        Cached per product; the promotion scheduler invalidates on status changes.
+        """
         from vendors.models import ProductPromotion
+        from django.core.cache import cache
         from django.utils import timezone
         
-        try:
-            product_promo = ProductPromotion.objects.select_related('promotion').filter(
-                product=self,
-                promotion__is_active=True,
-                promotion__status='ACTIVE',
-                promotion__start_date__lte=timezone.now(),
-                promotion__end_date__gte=timezone.now()
-            ).first()
-            return product_promo
-        except:
-            return None
+        now = timezone.now()
+        key = ACTIVE_PROMOTION_CACHE_KEY.format(self.pk)
+        prefetched = hasattr(self, 'active_promotion_links')  # see active_promotion_prefetch()
+        cached = None if prefetched else cache.get(key)
+        if prefetched:
+            product_promo = self.active_promotion_links[0] if self.active_promotion_links else None
+        elif cached is not None:
+            product_promo = cached[0]
+        else:
+            try:
+                product_promo = ProductPromotion.objects.select_related('promotion').filter(
+                    product=self,
+                    promotion__is_active=True,
+                    promotion__status='ACTIVE',
+                    promotion__start_date__lte=now,
+                    promotion__end_date__gte=now
+                ).first()
+            except:
+                return None
+            # Wrapped in a tuple so "no promotion" is cached too
+            cache.set(key, (product_promo,), ACTIVE_PROMOTION_CACHE_TIMEOUT)
+        
+        # Don't serve a promotion that ended since it was cached
+        if product_promo and not (product_promo.promotion.start_date <= now <= product_promo.promotion.end_date):
+            product_promo = None
+        return product_promo
     
     @property
     def has_active_promotion(self):
@@ -226,6 +272,7 @@ class Product(models.Model):
         promo = self.get_active_promotion()
         if promo:
             return {
+                'promotion_id': promo.promotion_id,
                 'style': promo.promotion.style,
                 'name': promo.promotion.name,
                 'display_name': promo.promotion.get_style_display_name(),
@@ -386,6 +433,77 @@ class ProductView(models.Model):
         return f"{user} viewed {self.product.name} at {self.viewed_at}"
 
 
+class RecentlyViewedProduct(models.Model):
+    """
+    A customer's most recently viewed products (one row per product, capped
+    at recently_viewed.RECENT_LIMIT). Persists the Redis recently-viewed list.
+    """
+    customer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='recently_viewed_products')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='recent_viewers')
+    viewed_at = models.DateTimeField()
+    
+    class Meta:
+        ordering = ['-viewed_at']
+        unique_together = [['customer', 'product']]
+        indexes = [
+            models.Index(fields=['customer', '-viewed_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.customer.username} viewed {self.product.name} at {self.viewed_at}"
+
+
+class TrendingProduct(models.Model):
+    """
+    Time-decayed trending score per product, rebuilt by the
+    refresh_trending_scores job. Only products with recent activity have a row.
+    """
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, related_name='trending')
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, null=True, blank=True, related_name='trending_products')
+    score = models.FloatField(default=0)
+    
+    # Window totals behind the score (shown on product cards)
+    recent_views = models.PositiveIntegerField(default=0)
+    recent_sales = models.PositiveIntegerField(default=0)
+    recent_reviews = models.PositiveIntegerField(default=0)
+    avg_rating = models.DecimalField(max_digits=3, decimal_places=2, null=True, blank=True)
+    review_total = models.PositiveIntegerField(default=0)
+    
+    computed_at = models.DateTimeField()
+    
+    class Meta:
+        ordering = ['-score']
+        indexes = [
+            models.Index(fields=['-score']),
+            models.Index(fields=['category', '-score']),
+        ]
+    
+    def __str__(self):
+        return f"{self.product.name}: {self.score:.2f}"
+
+
+class SimilarProduct(models.Model):
+    """
+    Precomputed content-based neighbours of a product (TF-IDF cosine
+    similarity), maintained by products.similarity
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='similar_entries')
+    similar_product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='similar_to_entries')
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+    computed_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['product', 'rank']
+        unique_together = [['product', 'similar_product']]
+        indexes = [
+            models.Index(fields=['product', 'rank']),
+        ]
+    
+    def __str__(self):
+        return f"{self.product.name} ~ {self.similar_product.name} ({self.score:.2f})"
+
+
 class ProductTag(models.Model):
     """
     Tags for products (created by admin, used by vendors)
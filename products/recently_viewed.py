@@ -0,0 +1,102 @@
+"""
+Recently viewed products
+
+Each customer (or anonymous session) has a Redis sorted set of product ids
+scored by view time, trimmed to RECENT_LIMIT entries on every view, so
+reading the list costs the same whatever the view history. Customers'
+lists are also persisted in RecentlyViewedProduct (one row per product,
+capped the same way) and reloaded into Redis when the key is missing,
+both before a view is added to it and when the list is read.
+"""
+import time
+from datetime import datetime, timezone as dt_timezone
+from django_redis import get_redis_connection
+from .models import RecentlyViewedProduct
+
+RECENT_LIMIT = 20
+
+CUSTOMER_KEY = 'mushanai:recent:c:{}'
+SESSION_KEY = 'mushanai:recent:s:{}'
+
+CUSTOMER_TTL = 60 * 60 * 24 * 30
+SESSION_TTL = 60 * 60 * 24 * 14
+
+
+def _redis():
+    return get_redis_connection('default')
+
+
+def _key(customer=None, session_key=None):
+    if customer:
+        return CUSTOMER_KEY.format(customer.pk), CUSTOMER_TTL
+    if session_key:
+        return SESSION_KEY.format(session_key), SESSION_TTL
+    return None, None
+
+
+def _persist(customer, product_id, viewed_at):
+    """Upsert the customer's row for the product and drop rows beyond the cap"""
+    RecentlyViewedProduct.objects.bulk_create(
+        [RecentlyViewedProduct(customer=customer, product_id=product_id, viewed_at=viewed_at)],
+        update_conflicts=True,
+        unique_fields=['customer', 'product'],
+        update_fields=['viewed_at'],
+    )
+    keep = RecentlyViewedProduct.objects.filter(customer=customer).order_by('-viewed_at').values('pk')[:RECENT_LIMIT]
+    RecentlyViewedProduct.objects.filter(customer=customer).exclude(pk__in=keep).delete()
+
+
+def _reload(redis, key, ttl, customer):
+    """Rebuild the customer's expired or evicted list from the database, newest first"""
+    rows = list(RecentlyViewedProduct.objects.filter(customer=customer).order_by(
+        '-viewed_at'
+    ).values_list('product_id', 'viewed_at')[:RECENT_LIMIT])
+    if rows:
+        pipe = redis.pipeline(transaction=False)
+        pipe.zadd(key, {product_id: viewed_at.timestamp() for product_id, viewed_at in rows})
+        pipe.expire(key, ttl)
+        pipe.execute()
+    return [product_id for product_id, _ in rows]
+
+
+def record_view(product_id, customer=None, session_key=None):
+    """Move the product to the front of the customer's (or session's) list"""
+    key, ttl = _key(customer, session_key)
+    if not key:
+        return
+    redis = _redis()
+    # Seed a lost list first, or it would restart from this one view and never reload
+    if customer and not redis.exists(key):
+        _reload(redis, key, ttl, customer)
+    now = time.time()
+    pipe = redis.pipeline(transaction=False)
+    pipe.zadd(key, {product_id: now})
+    pipe.zremrangebyrank(key, 0, -(RECENT_LIMIT + 1))
+    pipe.expire(key, ttl)
+    added, _, _ = pipe.execute()
+
+    # Re-viewing a listed product only moves it; the capped table needs trimming on new ones
+    if customer:
+        viewed_at = datetime.fromtimestamp(now, tz=dt_timezone.utc)
+        if added:
+            _persist(customer, product_id, viewed_at)
+        else:
+            updated = RecentlyViewedProduct.objects.filter(
+                customer=customer, product_id=product_id
+            ).update(viewed_at=viewed_at)
+            if not updated:
+                _persist(customer, product_id, viewed_at)
+
+
+def get_recent_product_ids(customer=None, session_key=None, limit=RECENT_LIMIT):
+    """Most recently viewed product ids, newest first"""
+    key, ttl = _key(customer, session_key)
+    if not key:
+        return []
+    redis = _redis()
+    product_ids = [int(pid) for pid in redis.zrevrange(key, 0, limit - 1)]
+    if product_ids or not customer:
+        return product_ids
+
+    return _reload(redis, key, ttl, customer)[:limit]
+
@@ -6,6 +6,9 @@ from django.contrib.auth import get_user_model
 from django.utils import timezone
 from datetime import timedelta
 from .models import Product, ProductView, ProductReview
+from .recently_viewed import record_view, get_recent_product_ids
+from .trending import get_top_trending
+from .similarity import get_precomputed_similar
 
 User = get_user_model()
 
@@ -51,85 +54,34 @@ def get_customers_also_bought(product, limit=8):
 
 def get_similar_products(product, limit=8):
     """
-    Get similar products based on category, brand, and attributes
+    Get similar products from the precomputed content-similarity index
+    (see products.similarity)
     """
-    from django.db.models import Case, When, IntegerField
+    similar = get_precomputed_similar(product, limit=limit)
+    if similar:
+        return similar
     
-    similar_products = Product.objects.filter(
-        is_active=True
-    ).exclude(id=product.id)
-    
-    # Build similarity query - prioritize by category, then brand, then vendor
-    similarity_filters = Q()
-    
-    # Same category (highest priority)
-    if product.category:
-        similarity_filters |= Q(category=product.category)
-    
-    # Same brand
-    if product.brand:
-        similarity_filters |= Q(brand=product.brand)
-    
-    # Same vendor
-    if product.vendor:
-        similarity_filters |= Q(vendor=product.vendor)
-    
-    # Filter products that match similarity criteria
-    if similarity_filters:
-        similar = similar_products.filter(similarity_filters)
-    else:
-        # If no filters, just get other products from same vendor
-        similar = similar_products.filter(vendor=product.vendor)
-    
-    # Annotate with ratings and sales
-    similar = similar.annotate(
-        avg_rating=Avg('reviews__rating'),
-        annotated_review_count=Count('reviews', distinct=True),
-        sales_count=Count('order_items', distinct=True)
-    )
-    
-    # If no similar products found with filters, get products from same category or vendor
-    if not similar.exists():
-        fallback = Product.objects.filter(
-            is_active=True
-        ).exclude(id=product.id)
-        if product.category:
-            fallback = fallback.filter(category=product.category)
-        elif product.vendor:
-            fallback = fallback.filter(vendor=product.vendor)
-        similar = fallback.annotate(
-            avg_rating=Avg('reviews__rating'),
-            annotated_review_count=Count('reviews', distinct=True),
-            sales_count=Count('order_items', distinct=True)
-        )
-    
-    # Order by ratings and popularity
-    similar = similar.order_by('-avg_rating', '-annotated_review_count', '-sales_count', '-created_at')
-    
-    return similar[:limit]
+    # Not indexed yet (e.g. a brand new product): same category, most viewed first
+    fallback = Product.objects.filter(is_active=True).exclude(id=product.id).select_related('vendor')
+    if product.category_id:
+        fallback = fallback.filter(category_id=product.category_id)
+    elif product.vendor_id:
+        fallback = fallback.filter(vendor_id=product.vendor_id)
+    return list(fallback.annotate(
+        avg_rating=Avg('reviews__rating')
+    ).order_by('-view_count', '-created_at')[:limit])
 
 
 def get_recently_viewed(customer=None, session_key=None, limit=8):
     """
     Get recently viewed products for a customer or session
     """
-    if customer:
-        views = ProductView.objects.filter(
-            customer=customer
-        ).order_by('-viewed_at').values_list('product_id', flat=True).distinct()[:limit]
-    elif session_key:
-        views = ProductView.objects.filter(
-            session_key=session_key
-        ).order_by('-viewed_at').values_list('product_id', flat=True).distinct()[:limit]
-    else:
-        return Product.objects.none()
-    
-    product_ids = list(views)
+    product_ids = get_recent_product_ids(customer=customer, session_key=session_key, limit=limit)
+    if not product_ids:
+        return []
     
     # Preserve order of views
-    products = Product.objects.filter(id__in=product_ids, is_active=True)
-    # Create a mapping to preserve order
-    product_dict = {p.id: p for p in products}
+    product_dict = Product.objects.filter(id__in=product_ids, is_active=True).in_bulk()
     return [product_dict[pid] for pid in product_ids if pid in product_dict]
 
 
@@ -190,36 +142,20 @@ def get_personalized_recommendations(customer, limit=12):
     return recommendations[:limit]
 
 
-def get_trending_products(limit=12, days=30):
+def get_trending_products(limit=12, category=None):
     """
-    Get trending products based on recent activity (views, sales, reviews)
+    Get trending products (time-decayed views, sales and reviews),
+    read from the table maintained by refresh_trending_scores
     """
-    from orders.models import OrderItem
-    from django.db.models import Count, Avg, F
-    
-    cutoff_date = timezone.now() - timedelta(days=days)
+    trending = get_top_trending(limit=limit, category=category)
+    if trending:
+        return trending
     
-    trending = Product.objects.filter(
-        is_active=True
-    ).annotate(
-        annotated_avg_rating=Avg('reviews__rating'),
-        annotated_review_count=Count('reviews', distinct=True),
-        annotated_recent_sales=Count('order_items', filter=Q(order_items__order__created_at__gte=cutoff_date), distinct=True),
-        annotated_recent_views=Count('views', filter=Q(views__viewed_at__gte=cutoff_date), distinct=True)
-    )
-    
-    # Calculate trending score (simplified - using popularity_score property)
-    # Order by combination of factors
-    trending = trending.order_by(
-        '-annotated_recent_sales',
-        '-annotated_recent_views', 
-        '-annotated_review_count',
-        '-annotated_avg_rating',
-        '-view_count',
-        '-created_at'
-    )[:limit]
-    
-    return trending
+    # Scores not computed yet: fall back to the most viewed products
+    fallback = Product.objects.filter(is_active=True).select_related('vendor')
+    if category is not None:
+        fallback = fallback.filter(category=category)
+    return list(fallback.order_by('-view_count', '-created_at')[:limit])
 
 
 def get_seasonal_suggestions(limit=8):
@@ -262,19 +198,5 @@ def track_product_view(product, customer=None, session_key=None, ip_address=None
     # Update product view count
     Product.objects.filter(id=product.id).update(view_count=F('view_count') + 1)
     
-    # Update customer dashboard's recently viewed (keep last 20)
-    if customer:
-        try:
-            dashboard = customer.customer_dashboard
-            dashboard.last_viewed_products.add(product)
-            # Keep only last 20 viewed products (get most recent views)
-            recent_views = ProductView.objects.filter(
-                customer=customer
-            ).order_by('-viewed_at').values_list('product_id', flat=True).distinct()[:20]
-            dashboard.last_viewed_products.set(recent_views)
-        except:
-            # Dashboard doesn't exist yet, create it
-            from customers.models import CustomerDashboard
-            dashboard = CustomerDashboard.objects.create(customer=customer)
-            dashboard.last_viewed_products.add(product)
-
+    # Update the capped recently viewed list
+    record_view(product.id, customer=customer, session_key=session_key)
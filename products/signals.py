@@ -0,0 +1,35 @@
+"""
+Product Signals
+Keep cached catalog data in sync with Product/Category changes
+"""
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from .facets import invalidate_global_facets
+from .models import Product
+from .similarity import mark_dirty
+
+
+@receiver([post_save, post_delete], sender='products.Product')
+@receiver([post_save, post_delete], sender='products.Category')
+def on_catalog_changed(sender, instance, **kwargs):
+    """Invalidate search facets when products or categories change"""
+    invalidate_global_facets()
+
+
+@receiver(post_save, sender='products.Product')
+def on_product_saved(sender, instance, **kwargs):
+    """Queue the product for the next similar-products refresh"""
+    mark_dirty([instance.pk])
+
+
+@receiver(m2m_changed, sender=Product.tags.through)
+def on_product_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Tags feed the similarity vectors"""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        # Tag side: pk_set holds product ids (None on clear)
+        if pk_set:
+            mark_dirty(list(pk_set))
+    else:
+        mark_dirty([instance.pk])
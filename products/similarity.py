@@ -0,0 +1,189 @@
+"""
+Content-based similar products
+
+Every active product is turned into a sparse TF-IDF vector over the words of
+its name, description, category and tags (name and category words weigh
+more). Vectors are L2-normalised, so cosine similarity is a sparse dot
+product; an inverted index (term -> postings) means each product is only
+compared with products sharing at least one term. Terms that appear in more
+than MAX_DF_RATIO of the catalog carry almost no signal and are dropped.
+
+The top NEIGHBOURS per product are stored in SimilarProduct. Product saves
+and tag changes mark the product dirty in Redis; refresh_similar_products()
+recomputes only dirty products and the products whose lists they appear in,
+and a nightly --full run rebuilds everything.
+"""
+import heapq
+import math
+import re
+from collections import Counter, defaultdict
+from operator import itemgetter
+from django.db import transaction
+from django.db.models import Avg
+from django_redis import get_redis_connection
+from .models import Product, SimilarProduct
+
+NEIGHBOURS = 12
+MIN_SCORE = 0.05
+MAX_DF_RATIO = 0.5
+MIN_DOCS_FOR_DF_CUTOFF = 20
+
+FIELD_WEIGHTS = {
+    'name': 3,
+    'category': 2,
+    'tags': 2,
+    'description': 1,
+}
+
+DIRTY_KEY = 'mushanai:similar:dirty'
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+STOP_WORDS = frozenset(
+    'and are but can for from has have her his its not our out the this that was were will with you your '
+    'all any each made make more most only other some such than them then they these those very'.split()
+)
+
+
+def _redis():
+    return get_redis_connection('default')
+
+
+def tokenize(text):
+    return [t for t in TOKEN_RE.findall((text or '').lower()) if len(t) > 2 and t not in STOP_WORDS]
+
+
+def product_terms(product):
+    """Weighted term counts for a product (category and tags from prefetched relations)"""
+    terms = Counter()
+    fields = {
+        'name': product.name,
+        'description': product.description,
+        'category': product.category.name if product.category_id else '',
+        'tags': ' '.join(tag.name for tag in product.tags.all()),
+    }
+    for field, text in fields.items():
+        for token in tokenize(text):
+            terms[token] += FIELD_WEIGHTS[field]
+    if product.category_id:
+        terms[f'category:{product.category_id}'] += FIELD_WEIGHTS['category']
+    return terms
+
+
+def build_vectors(term_counts):
+    """
+    TF-IDF vectors from {product_id: Counter}: sublinear tf, smoothed idf,
+    L2-normalised. Returns {product_id: {term: weight}}.
+    """
+    n_docs = len(term_counts)
+    df = Counter()
+    for terms in term_counts.values():
+        df.update(terms.keys())
+    max_df = n_docs * MAX_DF_RATIO if n_docs >= MIN_DOCS_FOR_DF_CUTOFF else n_docs
+    idf = {
+        term: math.log((1 + n_docs) / (1 + count)) + 1
+        for term, count in df.items()
+        if count <= max_df
+    }
+
+    vectors = {}
+    for product_id, terms in term_counts.items():
+        vector = {term: (1 + math.log(count)) * idf[term] for term, count in terms.items() if term in idf}
+        norm = math.sqrt(sum(w * w for w in vector.values()))
+        vectors[product_id] = {term: w / norm for term, w in vector.items()} if norm else {}
+    return vectors
+
+
+class SimilarityIndex:
+    """Inverted index over normalised sparse vectors"""
+
+    def __init__(self, vectors):
+        self.vectors = vectors
+        self.postings = defaultdict(list)
+        for product_id, vector in vectors.items():
+            for term, weight in vector.items():
+                self.postings[term].append((product_id, weight))
+
+    def neighbours(self, product_id, k=NEIGHBOURS):
+        """[(other_id, cosine)] for the k most similar products"""
+        scores = defaultdict(float)
+        for term, weight in self.vectors.get(product_id, {}).items():
+            for other_id, other_weight in self.postings[term]:
+                scores[other_id] += weight * other_weight
+        scores.pop(product_id, None)
+        return [
+            (other_id, score)
+            for other_id, score in heapq.nlargest(k, scores.items(), key=itemgetter(1))
+            if score >= MIN_SCORE
+        ]
+
+
+def load_index():
+    """Vectorise the active catalog (one product query plus one tags query)"""
+    products = Product.objects.filter(is_active=True).select_related('category').prefetch_related('tags').only(
+        'id', 'name', 'description', 'category_id', 'category__name'
+    )
+    return SimilarityIndex(build_vectors({product.pk: product_terms(product) for product in products}))
+
+
+def mark_dirty(product_ids):
+    """Queue products for the next incremental refresh"""
+    if product_ids:
+        _redis().sadd(DIRTY_KEY, *product_ids)
+
+
+def _take_dirty():
+    pipe = _redis().pipeline()
+    pipe.smembers(DIRTY_KEY)
+    pipe.delete(DIRTY_KEY)
+    members, _ = pipe.execute()
+    return {int(pid) for pid in members}
+
+
+def refresh_similar_products(full=False):
+    """
+    Recompute stored neighbours. Incremental runs cover dirty products, their
+    new neighbours and the products that currently list them.
+    Returns the number of products whose neighbours were rewritten.
+    """
+    dirty = _take_dirty()
+    if not full and not dirty:
+        return 0
+
+    try:
+        index = load_index()
+        if full:
+            targets = set(index.vectors)
+        else:
+            targets = {pid for pid in dirty if pid in index.vectors}
+            for pid in list(targets):
+                targets.update(other_id for other_id, _ in index.neighbours(pid))
+            targets.update(SimilarProduct.objects.filter(similar_product_id__in=dirty).values_list('product_id', flat=True))
+            targets &= set(index.vectors)
+
+        rows = [
+            SimilarProduct(product_id=pid, similar_product_id=other_id, score=score, rank=rank)
+            for pid in targets
+            for rank, (other_id, score) in enumerate(index.neighbours(pid), start=1)
+        ]
+        with transaction.atomic():
+            if full:
+                SimilarProduct.objects.all().delete()
+            else:
+                # Dirty products that were deactivated lose their own list too
+                SimilarProduct.objects.filter(product_id__in=targets | dirty).delete()
+            SimilarProduct.objects.bulk_create(rows, batch_size=1000)
+    except Exception:
+        if dirty:
+            mark_dirty(dirty)  # retry on the next run
+        raise
+    return len(targets)
+
+
+def get_precomputed_similar(product, limit=8):
+    """Stored neighbours of a product, most similar first (one query)"""
+    return list(Product.objects.filter(
+        is_active=True,
+        similar_to_entries__product=product,
+    ).select_related('vendor').annotate(
+        avg_rating=Avg('reviews__rating'),
+    ).order_by('similar_to_entries__rank')[:limit])
@@ -0,0 +1,73 @@
+"""
+Test search facets
+"""
+import pytest
+from decimal import Decimal
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from products.facets import (
+    get_global_facets,
+    get_result_facets,
+    GLOBAL_FACETS_CACHE_KEY,
+)
+from products.models import Product
+
+
+@pytest.mark.unit
+class TestSearchFacets:
+    """Test facet counts and caching"""
+
+    def test_result_facets_counts(self, products, category, vendor_user):
+        """Test per-category, per-vendor, price bucket and local materials counts"""
+        # Prices are 10, 20, 30, 40, 50
+        Product.objects.filter(pk=products[0].pk).update(is_made_from_local_materials=True)
+
+        facets = get_result_facets(Product.objects.filter(is_active=True))
+
+        assert facets['total'] == 5
+        assert facets['categories'] == {category.id: 5}
+        assert facets['vendors'] == {vendor_user.id: 5}
+        assert facets['local_materials'] == 1
+        bucket_counts = [bucket['count'] for bucket in facets['price_buckets']]
+        assert bucket_counts == [0, 2, 2, 1, 0, 0]
+
+    def test_result_facets_single_query(self, products):
+        """Test facets are computed with one grouped query"""
+        with CaptureQueriesContext(connection) as context:
+            get_result_facets(Product.objects.filter(is_active=True, price__gte=Decimal('20.00')))
+
+        # Ignore EXPLAIN statements issued by django-silk when DEBUG is on
+        queries = [q for q in context.captured_queries if not q['sql'].startswith('EXPLAIN')]
+        assert len(queries) == 1
+
+    def test_global_facets_cached_and_invalidated(self, product):
+        """Test global facets are cached and dropped when a product changes"""
+        facets = get_global_facets()
+
+        assert facets['price_range']['max_price'] == Decimal('99.99')
+        assert cache.get(GLOBAL_FACETS_CACHE_KEY) is not None
+
+        product.price = Decimal('150.00')
+        product.save()
+
+        assert cache.get(GLOBAL_FACETS_CACHE_KEY) is None
+        assert get_global_facets()['price_range']['max_price'] == Decimal('150.00')
+
+    def test_search_view_uses_facets(self, client, products):
+        """Test search page exposes facet counts"""
+        response = client.get(reverse('product_search'), {'q': 'Test', 'sort': 'price_low'})
+
+        assert response.status_code == 200
+        assert response.context['results_count'] == 5
+        assert response.context['categories'][0]['count'] == 5
+
+    def test_bucket_links_match_bucket_counts(self, client, products):
+        """Test a product priced on a boundary is listed by the bucket that counts it"""
+        # Prices are 10, 20, 30, 40, 50; 50 is the lower bound of the 50 - 100 bucket
+        response = client.get(reverse('product_search'))
+
+        for bucket in response.context['price_buckets']:
+            listed = client.get(f"{reverse('product_search')}?{bucket['querystring']}")
+            assert listed.context['results_count'] == bucket['count'], bucket['label']
@@ -0,0 +1,78 @@
+"""
+Test the capped recently viewed lists
+"""
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django_redis import get_redis_connection
+from products.models import Product, RecentlyViewedProduct
+from products.recently_viewed import RECENT_LIMIT, CUSTOMER_KEY, record_view, get_recent_product_ids
+from products.recommendations import get_recently_viewed, track_product_view
+
+
+@pytest.fixture
+def many_products(vendor_user, category):
+    return Product.objects.bulk_create([
+        Product(name=f'Item {i}', slug=f'item-{i}', description='Item', vendor=vendor_user,
+                category=category, price=i + 1, stock_quantity=1)
+        for i in range(RECENT_LIMIT + 5)
+    ])
+
+
+@pytest.mark.unit
+class TestRecentlyViewed:
+    """Test ordering, dedupe, capping and persistence"""
+
+    def test_views_are_deduplicated_newest_first(self, customer_user, products):
+        """Test re-viewing a product moves it to the front instead of repeating it"""
+        for product in (products[0], products[1], products[0], products[2]):
+            track_product_view(product, customer=customer_user)
+
+        assert [p.pk for p in get_recently_viewed(customer=customer_user)] == [
+            products[2].pk, products[0].pk, products[1].pk
+        ]
+
+    def test_lists_are_capped(self, customer_user, many_products):
+        """Test Redis and the database both keep only RECENT_LIMIT products"""
+        for product in many_products:
+            record_view(product.pk, customer=customer_user)
+
+        expected = [p.pk for p in reversed(many_products)][:RECENT_LIMIT]
+        assert get_recent_product_ids(customer=customer_user) == expected
+        assert RecentlyViewedProduct.objects.filter(customer=customer_user).count() == RECENT_LIMIT
+
+        # Reads never touch the database while the Redis list exists
+        with CaptureQueriesContext(connection) as ctx:
+            assert get_recent_product_ids(customer=customer_user, limit=5) == expected[:5]
+        assert not [q for q in ctx.captured_queries if not q['sql'].startswith('EXPLAIN')]
+
+    def test_customer_list_reloads_from_database(self, customer_user, products):
+        """Test a lost Redis key is rebuilt from RecentlyViewedProduct"""
+        for product in products[:3]:
+            record_view(product.pk, customer=customer_user)
+        get_redis_connection('default').delete(CUSTOMER_KEY.format(customer_user.pk))
+
+        expected = [products[2].pk, products[1].pk, products[0].pk]
+        assert get_recent_product_ids(customer=customer_user) == expected
+        assert get_redis_connection('default').zcard(CUSTOMER_KEY.format(customer_user.pk)) == 3
+
+    def test_view_after_lost_key_keeps_history(self, customer_user, products):
+        """Test a view landing on an expired or evicted key is added to the stored list, not a fresh one"""
+        for product in products[:3]:
+            record_view(product.pk, customer=customer_user)
+        get_redis_connection('default').delete(CUSTOMER_KEY.format(customer_user.pk))
+
+        record_view(products[3].pk, customer=customer_user)
+
+        expected = [products[3].pk, products[2].pk, products[1].pk, products[0].pk]
+        assert get_recent_product_ids(customer=customer_user) == expected
+        assert RecentlyViewedProduct.objects.filter(customer=customer_user).count() == 4
+
+    def test_anonymous_sessions_use_redis_only(self, products):
+        """Test session lists work without a customer and aren't persisted"""
+        record_view(products[0].pk, session_key='abc')
+        record_view(products[1].pk, session_key='abc')
+
+        assert get_recent_product_ids(session_key='abc') == [products[1].pk, products[0].pk]
+        assert get_recent_product_ids(session_key='other') == []
+        assert not RecentlyViewedProduct.objects.exists()
@@ -0,0 +1,71 @@
+"""
+Test the content-based similar products index
+"""
+import pytest
+from products.models import Product, ProductTag, SimilarProduct
+from products.similarity import build_vectors, SimilarityIndex, refresh_similar_products, tokenize
+from products.recommendations import get_similar_products
+
+
+@pytest.fixture
+def catalog(vendor_user, category):
+    """Two baskets, a mat and an unrelated product"""
+    def make(name, description):
+        return Product.objects.create(
+            name=name, slug=name.lower().replace(' ', '-'), description=description,
+            vendor=vendor_user, category=category, price=10, stock_quantity=1,
+        )
+    return {
+        'basket': make('Woven Ilala Basket', 'Hand woven ilala palm basket with lid'),
+        'tray': make('Ilala Serving Tray', 'Round woven ilala palm tray'),
+        'mat': make('Sisal Floor Mat', 'Woven sisal mat for the floor'),
+        'stool': make('Carved Stool', 'Teak wood stool carved by hand'),
+    }
+
+
+@pytest.mark.unit
+class TestSimilarityIndex:
+    """Test vectors, neighbours and incremental refreshes"""
+
+    def test_cosine_neighbours(self):
+        """Test vectors are normalised and shared rare terms rank higher"""
+        vectors = build_vectors({
+            1: {'ilala': 3, 'basket': 3},
+            2: {'ilala': 3, 'tray': 3},
+            3: {'sisal': 3, 'basket': 1},
+            4: {'teak': 3},
+        })
+        assert sum(w * w for w in vectors[1].values()) == pytest.approx(1)
+
+        neighbours = SimilarityIndex(vectors).neighbours(1)
+        assert [pid for pid, _ in neighbours] == [2, 3]
+        assert neighbours[0][1] > neighbours[1][1]
+        assert tokenize('The Ilala-palm BASKET, 2 pcs') == ['ilala', 'palm', 'basket', 'pcs']
+
+    def test_full_refresh_feeds_product_detail(self, catalog):
+        """Test stored neighbours are read back in rank order"""
+        assert refresh_similar_products(full=True) == 4
+
+        similar = get_similar_products(catalog['basket'])
+        assert [p.pk for p in similar][:2] == [catalog['tray'].pk, catalog['mat'].pk]
+        assert SimilarProduct.objects.get(product=catalog['basket'], rank=1).similar_product == catalog['tray']
+
+    def test_incremental_refresh_only_touches_dirty_products(self, catalog):
+        """Test a changed product is re-indexed along with the lists it appears in"""
+        assert refresh_similar_products() == 4  # creating the fixtures marked them dirty
+        assert refresh_similar_products() == 0
+
+        tag = ProductTag.objects.create(name='Teak', slug='teak')
+        catalog['mat'].tags.add(tag)
+        catalog['mat'].description = 'Carved teak wood mat stand'
+        catalog['mat'].save()
+        refresh_similar_products()
+
+        stool_neighbours = list(SimilarProduct.objects.filter(product=catalog['stool']).values_list('similar_product', flat=True))
+        assert stool_neighbours[0] == catalog['mat'].pk
+
+        catalog['tray'].is_active = False
+        catalog['tray'].save()
+        refresh_similar_products()
+        assert not SimilarProduct.objects.filter(similar_product=catalog['tray']).exists()
+        assert not SimilarProduct.objects.filter(product=catalog['tray']).exists()
@@ -0,0 +1,75 @@
+"""
+Test the trending score table
+"""
+from datetime import timedelta
+from decimal import Decimal
+import pytest
+from django.utils import timezone
+from orders.models import Order, OrderItem
+from products.models import Category, ProductView, ProductReview, TrendingProduct
+from products.trending import refresh_trending_scores, decay, HALF_LIFE_DAYS
+from products.recommendations import get_trending_products
+
+
+def add_views(product, count, days_ago=0):
+    views = ProductView.objects.bulk_create([ProductView(product=product) for _ in range(count)])
+    ProductView.objects.filter(pk__in=[v.pk for v in views]).update(
+        viewed_at=timezone.now() - timedelta(days=days_ago)
+    )
+
+
+@pytest.mark.unit
+class TestTrendingScores:
+    """Test decayed scoring, per-category lists and the top-K read"""
+
+    def test_recent_activity_outranks_old_activity(self, products):
+        """Test a view today counts more than the same view a half-life ago"""
+        add_views(products[0], 10, days_ago=HALF_LIFE_DAYS)
+        add_views(products[1], 10)
+        add_views(products[2], 1, days_ago=60)  # outside the window
+
+        assert refresh_trending_scores() == 2
+
+        old, new = (TrendingProduct.objects.get(product=p) for p in products[:2])
+        assert new.score == pytest.approx(10)
+        assert old.score == pytest.approx(10 * decay(HALF_LIFE_DAYS)) == pytest.approx(5)
+        assert [p.pk for p in get_trending_products(limit=5)] == [products[1].pk, products[0].pk]
+
+    def test_sales_and_reviews_are_weighted(self, customer_user, products):
+        """Test paid sales and reviews feed the score and card totals"""
+        order, = Order.objects.bulk_create([Order(
+            order_number='ORD-TREND-1', customer=customer_user, subtotal=Decimal('30'), total=Decimal('30'),
+            shipping_address='1 Test Street', shipping_city='Harare', shipping_phone='0771234567',
+            payment_status='PAID',
+        )])
+        OrderItem.objects.create(order=order, product=products[2], product_name='x', quantity=3,
+                                 price=Decimal('10'), subtotal=Decimal('30'))
+        ProductReview.objects.create(product=products[3], customer=customer_user, rating=4, comment='Nice')
+        add_views(products[4], 20)
+
+        refresh_trending_scores()
+
+        top = get_trending_products(limit=3)
+        assert [p.pk for p in top] == [products[2].pk, products[4].pk, products[3].pk]
+        assert top[0].sales_count == 3
+        assert (top[2].avg_rating, top[2].annotated_review_count) == (4, 1)
+
+    def test_category_lists_and_stale_rows(self, products, category):
+        """Test per-category reads and removal of products that went quiet"""
+        other = Category.objects.create(name='Other', slug='other')
+        products[1].category = other
+        products[1].save()
+        add_views(products[0], 2)
+        add_views(products[1], 5)
+        refresh_trending_scores()
+
+        assert [p.pk for p in get_trending_products(category=category)] == [products[0].pk]
+        assert [p.pk for p in get_trending_products(category=other)] == [products[1].pk]
+
+        ProductView.objects.filter(product=products[0]).delete()
+        refresh_trending_scores()
+        assert not TrendingProduct.objects.filter(product=products[0]).exists()
+
+    def test_falls_back_before_first_refresh(self, products):
+        """Test trending lists are never empty just because the job hasn't run"""
+        assert len(get_trending_products(limit=3)) == 3
@@ -0,0 +1,120 @@
+"""
+Trending products
+
+refresh_trending_scores() (run from cron) aggregates views, paid sales and
+reviews per product per day over the last WINDOW_DAYS, weights each day by
+exponential decay (half-life HALF_LIFE_DAYS) and upserts the result into
+TrendingProduct. Trending lists are then a top-K read on an indexed score,
+globally or per category.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import Avg, Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from .models import Product, ProductView, ProductReview, TrendingProduct
+
+WINDOW_DAYS = 30
+HALF_LIFE_DAYS = 7
+WEIGHTS = {
+    'views': 1.0,
+    'sales': 10.0,
+    'reviews': 5.0,
+}
+
+
+def decay(age_days):
+    """Weight of activity age_days old: 1 today, 0.5 after one half-life"""
+    return 0.5 ** (age_days / HALF_LIFE_DAYS)
+
+
+def _daily_counts(queryset, date_field, value):
+    return queryset.annotate(day=TruncDate(date_field)).order_by().values(
+        'product_id', 'day'
+    ).annotate(n=value)
+
+
+def refresh_trending_scores(now=None):
+    """
+    Recompute every product's trending score with three grouped queries over
+    the window and one upsert. Returns the number of trending products.
+    """
+    from orders.models import OrderItem
+
+    now = now or timezone.now()
+    today = timezone.localdate(now)
+    since = now - timedelta(days=WINDOW_DAYS)
+
+    sources = {
+        'views': _daily_counts(ProductView.objects.filter(viewed_at__gte=since), 'viewed_at', Count('id')),
+        'sales': _daily_counts(
+            OrderItem.objects.filter(
+                order__created_at__gte=since, order__payment_status='PAID', product__isnull=False
+            ),
+            'order__created_at', Sum('quantity'),
+        ),
+        'reviews': _daily_counts(ProductReview.objects.filter(created_at__gte=since), 'created_at', Count('id')),
+    }
+
+    scores = defaultdict(float)
+    totals = defaultdict(lambda: dict.fromkeys(WEIGHTS, 0))
+    for source, rows in sources.items():
+        for row in rows:
+            scores[row['product_id']] += WEIGHTS[source] * row['n'] * decay((today - row['day']).days)
+            totals[row['product_id']][source] += row['n']
+
+    products = dict(Product.objects.filter(id__in=scores, is_active=True).values_list('id', 'category_id'))
+    ratings = {
+        row['product_id']: row
+        for row in ProductReview.objects.filter(product_id__in=products).order_by().values('product_id').annotate(
+            avg=Avg('rating'), n=Count('id')
+        )
+    }
+
+    rows = [
+        TrendingProduct(
+            product_id=product_id,
+            category_id=category_id,
+            score=scores[product_id],
+            recent_views=totals[product_id]['views'],
+            recent_sales=totals[product_id]['sales'],
+            recent_reviews=totals[product_id]['reviews'],
+            avg_rating=ratings[product_id]['avg'] if product_id in ratings else None,
+            review_total=ratings[product_id]['n'] if product_id in ratings else 0,
+            computed_at=now,
+        )
+        for product_id, category_id in products.items()
+    ]
+    with transaction.atomic():
+        TrendingProduct.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=['product'],
+            update_fields=['category', 'score', 'recent_views', 'recent_sales', 'recent_reviews',
+                           'avg_rating', 'review_total', 'computed_at'],
+            batch_size=1000,
+        )
+        # Products that went quiet or inactive drop out
+        TrendingProduct.objects.filter(computed_at__lt=now).delete()
+    return len(rows)
+
+
+def get_top_trending(limit=12, category=None):
+    """
+    Top trending products, optionally within a category. Products carry
+    avg_rating, sales_count, annotated_review_count and trending_score.
+    """
+    rows = TrendingProduct.objects.filter(product__is_active=True).select_related('product', 'product__vendor')
+    if category is not None:
+        rows = rows.filter(category=category)
+
+    products = []
+    for row in rows.order_by('-score')[:limit]:
+        product = row.product
+        product.trending_score = row.score
+        product.avg_rating = row.avg_rating
+        product.sales_count = row.recent_sales
+        product.annotated_review_count = row.review_total
+        products.append(product)
+    return products
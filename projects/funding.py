@@ -0,0 +1,128 @@
+"""
+Community project funding engine
+
+Paid orders allocate a share of their total to a CommunityProject. The
+running totals on CommunityProject (current_funding, total_votes) are kept
+up to date with F() deltas as orders are paid, and a nightly reconciliation
+recomputes them from the ProjectVote ledger.
+"""
+from decimal import Decimal, ROUND_HALF_UP
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum, Count, F, Q
+from .models import CommunityProject, ProjectVote
+
+
+CONTRIBUTION_RATE = Decimal(str(getattr(settings, 'PROJECT_CONTRIBUTION_RATE', '0.01')))
+
+
+def contribution_for_amount(amount):
+    """Project contribution for an order total"""
+    return (Decimal(amount or 0) * CONTRIBUTION_RATE).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+
+def get_default_project():
+    """The project that receives votes from customers who did not choose one"""
+    return CommunityProject.objects.filter(
+        is_most_popular=True,
+        is_approved=True,
+        status__in=['ACTIVE', 'IN_PROGRESS']
+    ).order_by('-total_votes', '-created_at').first()
+
+
+def apply_order_contribution(order):
+    """
+    Record the vote for a paid order and add its contribution to the project.
+    Safe to call repeatedly; the (customer, order) vote is only created once.
+    """
+    if not order.selected_project_id:
+        return None
+
+    amount = contribution_for_amount(order.total)
+    with transaction.atomic():
+        vote, created = ProjectVote.objects.get_or_create(
+            customer_id=order.customer_id,
+            order=order,
+            defaults={
+                'project_id': order.selected_project_id,
+                'vote_amount': amount,
+                'is_default_vote': order.is_default_vote,
+            }
+        )
+        if created:
+            CommunityProject.objects.filter(pk=order.selected_project_id).update(
+                current_funding=F('current_funding') + amount,
+                total_votes=F('total_votes') + 1,
+            )
+    return vote
+
+
+def resolve_default_votes():
+    """
+    Assign paid orders without a selected project to the most popular
+    project and apply their contributions in one pass.
+    Returns the number of orders resolved.
+    """
+    from orders.models import Order
+
+    project = get_default_project()
+    if not project:
+        return 0
+
+    with transaction.atomic():
+        pending = list(Order.objects.select_for_update(skip_locked=True, of=('self',)).filter(
+            payment_status='PAID',
+            selected_project__isnull=True,
+            project_votes__isnull=True,
+        ).values_list('pk', 'customer_id', 'total'))
+        if not pending:
+            return 0
+
+        Order.objects.filter(pk__in=[pk for pk, _, _ in pending]).update(
+            selected_project=project,
+            is_default_vote=True,
+        )
+        votes = [
+            ProjectVote(
+                customer_id=customer_id,
+                order_id=order_id,
+                project=project,
+                vote_amount=contribution_for_amount(total),
+                is_default_vote=True,
+            )
+            for order_id, customer_id, total in pending
+        ]
+        ProjectVote.objects.bulk_create(votes)
+        CommunityProject.objects.filter(pk=project.pk).update(
+            current_funding=F('current_funding') + sum((v.vote_amount for v in votes), Decimal('0.00')),
+            total_votes=F('total_votes') + len(votes),
+        )
+    return len(votes)
+
+
+def reconcile_project_totals():
+    """
+    Recompute current_funding and total_votes for every project from paid
+    votes with a single GROUP BY, and write back only the projects that drifted.
+    Returns the number of projects corrected.
+    """
+    totals = {
+        row['project']: (row['funding'] or Decimal('0.00'), row['votes'])
+        for row in ProjectVote.objects.filter(
+            Q(order__isnull=True) | Q(order__payment_status='PAID')
+        ).order_by().values('project').annotate(
+            funding=Sum('vote_amount'),
+            votes=Count('id'),
+        )
+    }
+
+    corrected = []
+    for project in CommunityProject.objects.only('id', 'current_funding', 'total_votes'):
+        funding, votes = totals.get(project.id, (Decimal('0.00'), 0))
+        if project.current_funding != funding or project.total_votes != votes:
+            project.current_funding = funding
+            project.total_votes = votes
+            corrected.append(project)
+
+    CommunityProject.objects.bulk_update(corrected, ['current_funding', 'total_votes'], batch_size=500)
+    return len(corrected)
@@ -0,0 +1,19 @@
+"""
+Management command to reconcile community project funding (run nightly from cron)
+"""
+from django.core.management.base import BaseCommand
+from projects.funding import resolve_default_votes, reconcile_project_totals
+
+
+class Command(BaseCommand):
+    help = 'Resolve default project votes and recompute project funding totals'
+
+    def handle(self, *args, **options):
+        resolved = resolve_default_votes()
+        self.stdout.write(self.style.SUCCESS(f'Resolved {resolved} default votes'))
+
+        corrected = reconcile_project_totals()
+        if corrected:
+            self.stdout.write(self.style.WARNING(f'Corrected totals for {corrected} projects'))
+        else:
+            self.stdout.write(self.style.SUCCESS('All project totals are consistent'))
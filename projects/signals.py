@@ -0,0 +1,14 @@
+"""
+Project Signals
+Roll order contributions up into community project totals
+"""
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from .funding import apply_order_contribution
+
+
+@receiver(post_save, sender='orders.Order')
+def on_order_paid(sender, instance, **kwargs):
+    """Apply the project contribution once an order is paid"""
+    if instance.payment_status == 'PAID' and instance.selected_project_id:
+        apply_order_contribution(instance)
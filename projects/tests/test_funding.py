@@ -0,0 +1,81 @@
+"""
+Test community project funding engine
+"""
+import pytest
+from decimal import Decimal
+from projects.funding import resolve_default_votes, reconcile_project_totals
+from projects.models import CommunityProject, ProjectVote
+
+
+@pytest.fixture
+def project(db):
+    """Create an active, most popular project"""
+    # bulk_create skips the new-project notification signal
+    project, = CommunityProject.objects.bulk_create([CommunityProject(
+        title='School Borehole',
+        slug='school-borehole',
+        description='Clean water for a rural school',
+        target_amount=Decimal('5000.00'),
+        status='ACTIVE',
+        is_approved=True,
+        is_most_popular=True,
+    )])
+    return project
+
+
+def make_paid_order(customer, number, total, project=None):
+    """Create a paid order without firing post_save"""
+    from orders.models import Order
+    order, = Order.objects.bulk_create([Order(
+        order_number=f'ORD-TEST-{number}',
+        customer=customer,
+        selected_project=project,
+        subtotal=total,
+        total=total,
+        shipping_address='1 Test Street',
+        shipping_city='Harare',
+        shipping_phone='0771234567',
+        payment_status='PAID',
+    )])
+    return order
+
+
+@pytest.mark.unit
+class TestProjectFunding:
+    """Test contribution deltas, default votes and reconciliation"""
+
+    def test_paid_order_adds_contribution_once(self, customer_user, project):
+        """Test saving a paid order applies its 1% contribution once"""
+        order = make_paid_order(customer_user, 1, Decimal('250.00'), project)
+        order.save()
+        order.save()
+
+        project.refresh_from_db()
+        assert project.current_funding == Decimal('2.50')
+        assert project.total_votes == 1
+
+    def test_resolve_default_votes(self, customer_user, project):
+        """Test orders without a project are assigned to the most popular one"""
+        make_paid_order(customer_user, 1, Decimal('100.00'))
+        make_paid_order(customer_user, 2, Decimal('300.00'))
+
+        assert resolve_default_votes() == 2
+        assert resolve_default_votes() == 0
+
+        project.refresh_from_db()
+        assert project.current_funding == Decimal('4.00')
+        assert project.total_votes == 2
+        assert ProjectVote.objects.filter(is_default_vote=True).count() == 2
+
+    def test_reconcile_project_totals(self, customer_user, project):
+        """Test reconciliation corrects drifted totals"""
+        order = make_paid_order(customer_user, 1, Decimal('500.00'), project)
+        order.save()
+        CommunityProject.objects.filter(pk=project.pk).update(current_funding=Decimal('99.00'), total_votes=7)
+
+        assert reconcile_project_totals() == 1
+        assert reconcile_project_totals() == 0
+
+        project.refresh_from_db()
+        assert project.current_funding == Decimal('5.00')
+        assert project.total_votes == 1
@@ -0,0 +1,157 @@
+"""
+Social media analytics rollups
+
+A daily job (snapshot_social_analytics) aggregates ProductSocialPost rows
+into one SocialMediaAnalytics row per account per month. The vendor
+dashboard sums those few rows per platform for past months and aggregates
+only the current month live, so it costs the same for ten posts or ten
+thousand and new posts show up straight away.
+
+Past months come only from the rollup, so it must cover every month with
+posts: migration 0004 backfills the full history, and the daily job
+recomputes it all by default (engagement on old posts keeps changing, so
+past-month engagement lags by up to a day).
+"""
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import Count, Sum, Q, F, Max, DateField
+from django.db.models.functions import Coalesce, TruncMonth
+from django.utils import timezone
+from .models import ProductSocialPost, SocialMediaAnalytics
+
+STAT_KEYS = ('posts', 'likes', 'comments', 'shares', 'reach')
+
+
+def _empty_stats():
+    return dict.fromkeys(STAT_KEYS, 0)
+
+
+def _month_start(day):
+    return day.replace(day=1)
+
+
+def recent_months(count, today=None):
+    """First day of the current month and the count-1 months before it"""
+    month = _month_start(today or timezone.localdate())
+    months = [month]
+    for _ in range(count - 1):
+        month = _month_start(month - timedelta(days=1))
+        months.append(month)
+    return months
+
+
+def rollup_posts(since=None):
+    """
+    Recompute the monthly SocialMediaAnalytics rows with one grouped query
+    and one upsert, for every month with posts or only the months from
+    `since` on. Rows of recomputed months whose posts are gone are deleted.
+    Returns the number of rows written.
+    """
+    posted = Q(status='POSTED')
+    posts = ProductSocialPost.objects.all()
+    if since is not None:
+        posts = posts.filter(created_at__date__gte=since)
+
+    rows = posts.order_by().values(
+        'vendor_id', 'social_account_id', month=TruncMonth('created_at', output_field=DateField()),
+    ).annotate(
+        total_posts=Count('id'),
+        successful_posts=Count('id', filter=posted),
+        failed_posts=Count('id', filter=Q(status='FAILED')),
+        total_likes=Coalesce(Sum('likes_count', filter=posted), 0),
+        total_comments=Coalesce(Sum('comments_count', filter=posted), 0),
+        total_shares=Coalesce(Sum('shares_count', filter=posted), 0),
+        total_reach=Coalesce(Sum('reach', filter=posted), 0),
+    )
+
+    now = timezone.now()
+    snapshots = [
+        SocialMediaAnalytics(
+            vendor_id=row['vendor_id'],
+            social_account_id=row['social_account_id'],
+            month=row['month'],
+            total_posts=row['total_posts'],
+            successful_posts=row['successful_posts'],
+            failed_posts=row['failed_posts'],
+            total_likes=row['total_likes'],
+            total_comments=row['total_comments'],
+            total_shares=row['total_shares'],
+            total_reach=row['total_reach'],
+            created_at=now,
+            updated_at=now,
+        )
+        for row in rows
+    ]
+
+    stale = SocialMediaAnalytics.objects.filter(updated_at__lt=now)
+    if since is not None:
+        stale = stale.filter(month__gte=since)
+    with transaction.atomic():
+        SocialMediaAnalytics.objects.bulk_create(
+            snapshots,
+            update_conflicts=True,
+            unique_fields=['vendor', 'social_account', 'month'],
+            update_fields=['total_posts', 'successful_posts', 'failed_posts', 'total_likes',
+                           'total_comments', 'total_shares', 'total_reach', 'updated_at'],
+            batch_size=500,
+        )
+        # Account-months whose posts were all deleted drop out
+        stale.delete()
+    return len(snapshots)
+
+
+def snapshot_social_analytics(months=None, today=None):
+    """
+    Recompute the SocialMediaAnalytics rows for every month with posts, or
+    only for the current month and the months-1 before it.
+    Returns the number of rows written.
+    """
+    since = recent_months(months, today)[-1] if months else None
+    return rollup_posts(since)
+
+
+def _platform_stats(rows):
+    """Sum grouped rows (a platform may appear in several) into totals and per-platform stats"""
+    platform_stats = {}
+    totals = _empty_stats()
+    for row in rows:
+        stats = platform_stats.setdefault(row['platform'], _empty_stats())
+        for key in STAT_KEYS:
+            stats[key] += row[key] or 0
+            totals[key] += row[key] or 0
+    return totals, platform_stats
+
+
+def get_dashboard_stats(vendor, today=None):
+    """
+    Overall and per-platform totals for a vendor's posted content: the
+    rollup for past months plus one grouped live query for the current
+    month, so new posts show up before the next snapshot.
+    Returns (totals, platform_stats, as_of); as_of is when the past months
+    were last rolled up, or None when there are no rolled-up months.
+    """
+    month = recent_months(1, today)[0]
+    snapshot_rows = list(SocialMediaAnalytics.objects.filter(vendor=vendor, month__lt=month).order_by().values(
+        platform=F('social_account__platform')
+    ).annotate(
+        posts=Sum('successful_posts'),
+        likes=Sum('total_likes'),
+        comments=Sum('total_comments'),
+        shares=Sum('total_shares'),
+        reach=Sum('total_reach'),
+        as_of=Max('updated_at'),
+    ))
+    live_rows = ProductSocialPost.objects.filter(
+        vendor=vendor, status='POSTED', created_at__date__gte=month
+    ).order_by().values(
+        platform=F('social_account__platform')
+    ).annotate(
+        posts=Count('id'),
+        likes=Sum('likes_count'),
+        comments=Sum('comments_count'),
+        shares=Sum('shares_count'),
+        reach=Sum('reach'),
+    )
+    totals, platform_stats = _platform_stats([*snapshot_rows, *live_rows])
+    as_of = max((row['as_of'] for row in snapshot_rows), default=None)
+    return totals, platform_stats, as_of
@@ -6,3 +6,6 @@ class SocialMediaConfig(AppConfig):
     name = 'social_media'
     verbose_name = 'Social Media Integration'
 
+
+    def ready(self):
+        import social_media.signals  # noqa
@@ -0,0 +1,225 @@
+"""
+Scheduled post dispatcher
+
+Product creation only queues ScheduledPost rows; dispatch_due_posts()
+publishes them from a background worker:
+- due posts are claimed in batches with SELECT ... FOR UPDATE SKIP LOCKED
+  and marked PUBLISHING, so any number of workers can run side by side
+- each account's posts are published in order, accounts concurrently on
+  one event loop sharing one HTTP pool, at most max_workers at a time (the
+  coroutines only do HTTP; all database writes happen before and after)
+- an account that fails is backed off exponentially and its remaining
+  posts go back to the queue; a post is FAILED after MAX_ATTEMPTS
+- claims older than CLAIM_TIMEOUT (a crashed worker) are released
+"""
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from asgiref.sync import async_to_sync
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from .models import SocialMediaAccount, ProductSocialPost, ScheduledPost
+from .http import new_client
+from .services import SocialMediaPoster
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 5
+CLAIM_TIMEOUT = timedelta(minutes=10)
+BACKOFF_BASE = timedelta(minutes=1)
+BACKOFF_MAX = timedelta(hours=6)
+
+
+def enqueue_auto_posts(product, scheduled_for=None):
+    """Queue a post of the product for every active auto-post account of its vendor"""
+    accounts = SocialMediaAccount.objects.filter(
+        vendor_id=product.vendor_id,
+        auto_post=True,
+        status='ACTIVE',
+        platform__in=['FACEBOOK', 'INSTAGRAM'],
+    )
+    scheduled_for = scheduled_for or timezone.now()
+    return ScheduledPost.objects.bulk_create([
+        ScheduledPost(
+            product=product,
+            vendor_id=product.vendor_id,
+            social_account=account,
+            post_text=SocialMediaPoster.build_post_text(product, account),
+            scheduled_for=scheduled_for,
+        )
+        for account in accounts
+    ])
+
+
+def backoff_delay(failures):
+    """Exponential backoff: 1, 2, 4, ... minutes, capped at BACKOFF_MAX"""
+    return min(BACKOFF_BASE * (2 ** min(max(failures - 1, 0), 16)), BACKOFF_MAX)
+
+
+def release_stale_claims(now=None):
+    """Put posts claimed by a worker that died back in the queue"""
+    now = now or timezone.now()
+    return ScheduledPost.objects.filter(
+        status='PUBLISHING', claimed_at__lt=now - CLAIM_TIMEOUT
+    ).update(status='SCHEDULED', claimed_at=None)
+
+
+def claim_due_posts(batch_size, now=None):
+    """Claim up to batch_size due posts; rows locked by other workers are skipped"""
+    now = now or timezone.now()
+    with transaction.atomic():
+        posts = list(ScheduledPost.objects.select_for_update(skip_locked=True, of=('self',)).filter(
+            status='SCHEDULED',
+            scheduled_for__lte=now,
+            social_account__status='ACTIVE',
+        ).filter(
+            Q(social_account__backoff_until__isnull=True) | Q(social_account__backoff_until__lte=now)
+        ).select_related('product', 'social_account').order_by('scheduled_for')[:batch_size])
+        if posts:
+            ScheduledPost.objects.filter(pk__in=[p.pk for p in posts]).update(
+                status='PUBLISHING', claimed_at=now, attempts=F('attempts') + 1
+            )
+            for post in posts:
+                post.attempts += 1
+    return posts
+
+
+def _image_path(product):
+    if hasattr(product, 'image') and product.image:
+        try:
+            return product.image.path
+        except Exception:
+            return None
+    return None
+
+
+async def _publish_account_posts(account, posts, client, limit):
+    """
+    Publish one account's posts in order. Stops at the first failure so a
+    struggling account isn't hammered. Returns [(post, success, post_id, error)]
+    for the posts that were attempted.
+    """
+    results = []
+    async with limit:
+        for post in posts:
+            try:
+                service = SocialMediaPoster.get_service(account, client=client)
+                success, post_id, error = await SocialMediaPoster.publish(
+                    service, post.product, post.post_text, _image_path(post.product)
+                )
+            except Exception as e:
+                success, post_id, error = False, None, str(e)
+            results.append((post, success, post_id, error))
+            if not success:
+                break
+    return results
+
+
+async def _publish_all(accounts, account_posts, max_workers):
+    """Publish every account's posts concurrently; returns {account_id: results}"""
+    limit = asyncio.Semaphore(max_workers)
+    async with new_client(max_workers) as client:
+        results = await asyncio.gather(*(
+            _publish_account_posts(accounts[account_id], account_list, client, limit)
+            for account_id, account_list in account_posts.items()
+        ))
+    return dict(zip(account_posts, results))
+
+
+def _record_results(account_posts, results, now):
+    """Write post results, requeue unattempted posts and update account backoff"""
+    attempted = {}
+    social_posts = []
+    for account_id, account_results in results.items():
+        for post, success, post_id, error in account_results:
+            attempted[post.pk] = post
+            if success:
+                post.status = 'POSTED'
+                post.post_id = post_id
+                post.posted_at = now
+                post.error_message = None
+            elif post.attempts >= MAX_ATTEMPTS:
+                post.status = 'FAILED'
+                post.error_message = error
+            else:
+                post.status = 'SCHEDULED'
+                post.error_message = error
+            post.claimed_at = None
+            post.updated_at = now
+            if post.status in ('POSTED', 'FAILED'):
+                post.social_post = ProductSocialPost(
+                    product_id=post.product_id,
+                    vendor_id=post.vendor_id,
+                    social_account_id=account_id,
+                    post_id=post_id,
+                    post_text=post.post_text,
+                    status=post.status,
+                    error_message=None if success else error,
+                    posted_at=now if success else None,
+                )
+                social_posts.append(post.social_post)
+
+    with transaction.atomic():
+        ProductSocialPost.objects.bulk_create(social_posts)
+        ScheduledPost.objects.bulk_update(
+            attempted.values(),
+            ['status', 'post_id', 'posted_at', 'error_message', 'social_post', 'claimed_at', 'updated_at'],
+        )
+
+        # Posts after an account's first failure were never tried: give the attempt back
+        unattempted = [
+            post.pk for posts in account_posts.values() for post in posts if post.pk not in attempted
+        ]
+        if unattempted:
+            ScheduledPost.objects.filter(pk__in=unattempted).update(
+                status='SCHEDULED', claimed_at=None, attempts=F('attempts') - 1
+            )
+
+        for account_id, account_results in results.items():
+            account = account_results[0][0].social_account
+            successes = sum(1 for _, success, _, _ in account_results if success)
+            if account_results[-1][1]:
+                SocialMediaAccount.objects.filter(pk=account_id).update(
+                    total_posts=F('total_posts') + successes,
+                    last_post_at=now,
+                    consecutive_failures=0,
+                    backoff_until=None,
+                    updated_at=now,
+                )
+            else:
+                failures = account.consecutive_failures + 1
+                SocialMediaAccount.objects.filter(pk=account_id).update(
+                    total_posts=F('total_posts') + successes,
+                    last_post_at=now if successes else F('last_post_at'),
+                    consecutive_failures=F('consecutive_failures') + 1,
+                    backoff_until=now + backoff_delay(failures),
+                    updated_at=now,
+                )
+    posted = sum(1 for post in attempted.values() if post.status == 'POSTED')
+    return posted, len(attempted) - posted
+
+
+def dispatch_due_posts(batch_size=50, max_workers=4):
+    """
+    Claim and publish one batch of due posts.
+    Returns (claimed, posted, failed attempts).
+    """
+    release_stale_claims()
+    posts = claim_due_posts(batch_size)
+    if not posts:
+        return 0, 0, 0
+
+    account_posts = defaultdict(list)
+    accounts = {}
+    for post in posts:
+        account_posts[post.social_account_id].append(post)
+        accounts[post.social_account_id] = post.social_account
+
+    results = async_to_sync(_publish_all)(accounts, account_posts, max_workers)
+
+    posted, failed = _record_results(account_posts, results, timezone.now())
+    if failed:
+        logger.warning('Scheduled post dispatch: %s posted, %s failed', posted, failed)
+    return len(posts), posted, failed
@@ -0,0 +1,58 @@
+"""
+Async HTTP client for the platform APIs
+
+Services talk to the Graph API through an httpx.AsyncClient so a slow call
+only suspends its coroutine instead of holding a worker:
+
+- under the ASGI deployment each Uvicorn worker opens one pooled client on
+  lifespan startup (mushanaicore.asgi) and closes it on shutdown; every
+  request on the worker's event loop reuses its connections
+- under WSGI there is no lifespan and each async view runs on a fresh event
+  loop, so request_client() opens a client for the request and closes it
+  before the response instead of leaking one per loop
+- batch jobs (dispatcher, metrics refresher) run their own short-lived
+  event loop and open a client with new_client() for its duration
+
+Pool size and timeouts come from the SOCIAL_HTTP_* settings.
+"""
+from contextlib import asynccontextmanager
+import httpx
+from django.conf import settings
+
+_shared_client = None
+
+
+def new_client(max_connections=None):
+    """A pooled client; use as `async with new_client() as client`"""
+    max_connections = max_connections or settings.SOCIAL_HTTP_MAX_CONNECTIONS
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=min(max_connections, settings.SOCIAL_HTTP_MAX_KEEPALIVE),
+        ),
+        timeout=httpx.Timeout(settings.SOCIAL_HTTP_TIMEOUT, connect=settings.SOCIAL_HTTP_CONNECT_TIMEOUT),
+    )
+
+
+def open_shared_client():
+    """Open the worker's shared client (ASGI lifespan startup)"""
+    global _shared_client
+    _shared_client = new_client()
+
+
+async def close_shared_client():
+    """Close the worker's shared client (ASGI lifespan shutdown)"""
+    global _shared_client
+    client, _shared_client = _shared_client, None
+    if client is not None:
+        await client.aclose()
+
+
+@asynccontextmanager
+async def request_client():
+    """The worker's shared client, or one closed when the request is done"""
+    if _shared_client is not None:
+        yield _shared_client
+        return
+    async with new_client() as client:
+        yield client
@@ -0,0 +1,31 @@
+"""
+Management command to publish due scheduled posts (run every minute from cron, or with --loop)
+"""
+import time
+from django.core.management.base import BaseCommand
+from social_media.dispatcher import dispatch_due_posts
+
+
+class Command(BaseCommand):
+    help = 'Claim due scheduled posts and publish them; safe to run several workers at once'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50, help='Posts claimed per batch')
+        parser.add_argument('--workers', type=int, default=4, help='Accounts published concurrently')
+        parser.add_argument('--loop', action='store_true', help='Keep polling instead of exiting when the queue is empty')
+        parser.add_argument('--interval', type=float, default=30, help='Seconds to sleep between polls with --loop')
+
+    def handle(self, *args, **options):
+        total_posted = total_failed = 0
+        while True:
+            claimed, posted, failed = dispatch_due_posts(
+                batch_size=options['batch_size'], max_workers=options['workers']
+            )
+            total_posted += posted
+            total_failed += failed
+            if claimed:
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS(f'Published {total_posted} scheduled posts ({total_failed} failed attempts)'))
@@ -0,0 +1,16 @@
+"""
+Management command to refresh engagement metrics for posted products (run hourly from cron)
+"""
+from django.core.management.base import BaseCommand
+from social_media.metrics_refresher import refresh_post_metrics
+
+
+class Command(BaseCommand):
+    help = 'Fetch likes, comments and shares for all posted products in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None, help='Concurrent API requests')
+
+    def handle(self, *args, **options):
+        updated, failed = refresh_post_metrics(max_workers=options['workers'])
+        self.stdout.write(self.style.SUCCESS(f'Updated metrics for {updated} posts ({failed} failed batches)'))
@@ -0,0 +1,20 @@
+"""
+Management command to roll social media posts up into SocialMediaAnalytics (run daily from cron)
+"""
+from django.core.management.base import BaseCommand
+from social_media.analytics import snapshot_social_analytics
+
+
+class Command(BaseCommand):
+    help = 'Snapshot per-account monthly social media analytics'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months', type=int, default=None,
+            help='Only recompute this many months, counting back from the current one '
+                 '(default: every month with posts, since engagement on older posts keeps changing)'
+        )
+
+    def handle(self, *args, **options):
+        rows = snapshot_social_analytics(options['months'])
+        self.stdout.write(self.style.SUCCESS(f'Wrote {rows} social media analytics snapshots'))
@@ -0,0 +1,155 @@
+"""
+Bulk social media metrics refresher
+
+Refreshes engagement numbers for posted ProductSocialPosts:
+- posts are grouped per account and fetched with the Graph API batch
+  endpoint (?ids=...), up to BATCH_SIZE posts per request
+- requests share one pooled httpx client and run concurrently on one
+  event loop, at most max_workers at a time (the coroutines only do HTTP,
+  never touch the database)
+- each account has a token bucket so we stay under its API rate limit
+- results are written back with a single bulk_update
+"""
+import asyncio
+import logging
+import time
+from collections import defaultdict
+import httpx
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.utils import timezone
+from .http import new_client
+from .models import SocialMediaAccount, ProductSocialPost
+from .services import SocialMediaPoster, SocialMediaAPIError
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 50  # Graph API limit for ?ids=
+METRIC_FIELDS = {
+    'likes': 'likes_count',
+    'comments': 'comments_count',
+    'shares': 'shares_count',
+    'reach': 'reach',
+}
+
+
+class TokenBucket:
+    """
+    Async token bucket: `rate` requests per second, bursts up to `capacity`.
+    Create it inside the event loop that uses it.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        # Waiters queue on the lock, so tokens are handed out in arrival order
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+async def _fetch_batches(jobs, max_workers, requests_per_second):
+    """
+    Fetch every (account, batch) job; returns one result per job, either the
+    metrics dict or the exception it raised
+    """
+    limit = asyncio.Semaphore(max_workers)
+    buckets = defaultdict(lambda: TokenBucket(requests_per_second))
+
+    async with new_client(max_workers) as client:
+        async def fetch(account, batch):
+            service = SocialMediaPoster.get_service(account, client=client)
+            async with limit:
+                await buckets[account.pk].acquire()
+                return await service.get_posts_metrics([p.post_id for p in batch])
+
+        return await asyncio.gather(
+            *(fetch(account, batch) for account, batch in jobs), return_exceptions=True
+        )
+
+
+def refresh_post_metrics(posts=None, max_workers=None, requests_per_second=None):
+    """
+    Refresh engagement metrics for the given posts (default: every posted
+    post on an active account). Returns (posts updated, batches failed).
+    """
+    max_workers = max_workers or getattr(settings, 'SOCIAL_METRICS_WORKERS', 8)
+    requests_per_second = requests_per_second or getattr(settings, 'SOCIAL_API_REQUESTS_PER_SECOND', 2)
+
+    if posts is None:
+        posts = ProductSocialPost.objects.filter(
+            status='POSTED',
+            post_id__isnull=False,
+            social_account__status='ACTIVE',
+            social_account__platform__in=['FACEBOOK', 'INSTAGRAM'],
+        ).select_related('social_account').only(
+            'id', 'post_id', 'likes_count', 'comments_count', 'shares_count', 'reach',
+            'social_account__id', 'social_account__platform', 'social_account__access_token',
+            'social_account__status',
+        )
+
+    by_account = defaultdict(list)
+    accounts = {}
+    for post in posts:
+        if post.post_id:
+            by_account[post.social_account_id].append(post)
+            accounts[post.social_account_id] = post.social_account
+    if not by_account:
+        return 0, 0
+
+    jobs = []
+    for account_id, account_posts in by_account.items():
+        for start in range(0, len(account_posts), BATCH_SIZE):
+            jobs.append((accounts[account_id], account_posts[start:start + BATCH_SIZE]))
+
+    fetched = async_to_sync(_fetch_batches)(jobs, max_workers, requests_per_second)
+
+    now = timezone.now()
+    changed = []
+    failed = 0
+    expired_accounts = set()
+    for (account, batch), results in zip(jobs, fetched):
+        if isinstance(results, SocialMediaAPIError):
+            failed += 1
+            if results.token_expired:
+                expired_accounts.add(account.pk)
+            logger.warning('Metrics refresh failed for account %s: %s', account.pk, results)
+            continue
+        if isinstance(results, httpx.HTTPError):
+            failed += 1
+            logger.warning('Metrics refresh failed for account %s: %s', account.pk, results)
+            continue
+        if isinstance(results, BaseException):
+            raise results
+
+        for post in batch:
+            metrics = results.get(post.post_id)
+            if metrics is None:
+                continue
+            updated = False
+            for key, field in METRIC_FIELDS.items():
+                value = metrics.get(key, 0)
+                if getattr(post, field) != value:
+                    setattr(post, field, value)
+                    updated = True
+            if updated:
+                post.updated_at = now
+                changed.append(post)
+
+    ProductSocialPost.objects.bulk_update(
+        changed, list(METRIC_FIELDS.values()) + ['updated_at'], batch_size=500
+    )
+    if expired_accounts:
+        SocialMediaAccount.objects.filter(pk__in=expired_accounts).update(status='EXPIRED', updated_at=now)
+    return len(changed), failed
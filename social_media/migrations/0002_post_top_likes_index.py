@@ -0,0 +1,17 @@
+# Generated by Django 4.2.25 on 2026-10-19 00:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('social_media', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='productsocialpost',
+            index=models.Index(fields=['vendor', 'status', '-likes_count'], name='social_medi_vendor__2e4510_idx'),
+        ),
+    ]
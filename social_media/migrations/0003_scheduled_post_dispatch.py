@@ -0,0 +1,44 @@
+# Generated by Django 4.2.25 on 2026-10-19 00:53
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('social_media', '0002_post_top_likes_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scheduledpost',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='scheduledpost',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, help_text='When a dispatcher worker took it', null=True),
+        ),
+        migrations.AddField(
+            model_name='scheduledpost',
+            name='social_post',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='scheduled_posts', to='social_media.productsocialpost'),
+        ),
+        migrations.AddField(
+            model_name='socialmediaaccount',
+            name='backoff_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='socialmediaaccount',
+            name='consecutive_failures',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='scheduledpost',
+            name='status',
+            field=models.CharField(choices=[('SCHEDULED', 'Scheduled'), ('PUBLISHING', 'Publishing'), ('POSTED', 'Posted'), ('FAILED', 'Failed'), ('CANCELLED', 'Cancelled')], default='SCHEDULED', max_length=20),
+        ),
+    ]
@@ -0,0 +1,47 @@
+from django.db import migrations
+from django.db.models import Count, Sum, Q, DateField
+from django.db.models.functions import Coalesce, TruncMonth
+from django.utils import timezone
+
+
+def backfill_social_analytics(apps, schema_editor):
+    """
+    Roll up every month with posts into one SocialMediaAnalytics row per
+    account per month, so the dashboard's past months are complete from the start
+    """
+    ProductSocialPost = apps.get_model('social_media', 'ProductSocialPost')
+    SocialMediaAnalytics = apps.get_model('social_media', 'SocialMediaAnalytics')
+
+    posted = Q(status='POSTED')
+    rows = ProductSocialPost.objects.order_by().values(
+        'vendor_id', 'social_account_id', month=TruncMonth('created_at', output_field=DateField()),
+    ).annotate(
+        total_posts=Count('id'),
+        successful_posts=Count('id', filter=posted),
+        failed_posts=Count('id', filter=Q(status='FAILED')),
+        total_likes=Coalesce(Sum('likes_count', filter=posted), 0),
+        total_comments=Coalesce(Sum('comments_count', filter=posted), 0),
+        total_shares=Coalesce(Sum('shares_count', filter=posted), 0),
+        total_reach=Coalesce(Sum('reach', filter=posted), 0),
+    )
+
+    now = timezone.now()
+    SocialMediaAnalytics.objects.bulk_create(
+        [SocialMediaAnalytics(created_at=now, updated_at=now, **row) for row in rows],
+        update_conflicts=True,
+        unique_fields=['vendor', 'social_account', 'month'],
+        update_fields=['total_posts', 'successful_posts', 'failed_posts', 'total_likes',
+                       'total_comments', 'total_shares', 'total_reach', 'updated_at'],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('social_media', '0003_scheduled_post_dispatch'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_social_analytics, migrations.RunPython.noop),
+    ]
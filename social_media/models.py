@@ -49,6 +49,10 @@ class SocialMediaAccount(models.Model):
     total_posts = models.PositiveIntegerField(default=0)
     last_post_at = models.DateTimeField(null=True, blank=True)
     
+    # Publishing backoff (set by the scheduled post dispatcher after failures)
+    consecutive_failures = models.PositiveIntegerField(default=0)
+    backoff_until = models.DateTimeField(null=True, blank=True)
+    
     connected_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -112,6 +116,7 @@ class ProductSocialPost(models.Model):
         indexes = [
             models.Index(fields=['vendor', 'status']),
             models.Index(fields=['product', 'social_account']),
+            models.Index(fields=['vendor', 'status', '-likes_count']),
         ]
     
     def __str__(self):
@@ -225,6 +230,7 @@ class ScheduledPost(models.Model):
     """
     STATUS_CHOICES = [
         ('SCHEDULED', 'Scheduled'),
+        ('PUBLISHING', 'Publishing'),
         ('POSTED', 'Posted'),
         ('FAILED', 'Failed'),
         ('CANCELLED', 'Cancelled'),
@@ -242,6 +248,12 @@ class ScheduledPost(models.Model):
     post_id = models.CharField(max_length=200, blank=True, null=True)
     error_message = models.TextField(blank=True, null=True)
     posted_at = models.DateTimeField(null=True, blank=True)
+    social_post = models.ForeignKey(ProductSocialPost, on_delete=models.SET_NULL, null=True, blank=True,
+                                    related_name='scheduled_posts')
+    
+    # Dispatching
+    attempts = models.PositiveSmallIntegerField(default=0)
+    claimed_at = models.DateTimeField(null=True, blank=True, help_text='When a dispatcher worker took it')
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
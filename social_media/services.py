@@ -2,39 +2,108 @@
 Social Media Posting Services
 
 Handles posting to Facebook, Instagram, and other platforms
+
+Platform calls are async (httpx, see social_media.http) so a slow Graph API
+request suspends a coroutine rather than blocking a worker; sync callers
+drive them with asgiref's async_to_sync.
 """
-import requests
+import asyncio
+import os
+from asgiref.sync import sync_to_async
 from django.conf import settings
+from django.db.models import F
 from django.utils import timezone
 from decimal import Decimal
 
 
+def _read_file(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+class SocialMediaAPIError(Exception):
+    """Error response from a platform API"""
+    
+    def __init__(self, message, code=None):
+        super().__init__(message)
+        self.code = code
+    
+    @property
+    def token_expired(self):
+        # Graph API: 190 = invalid/expired access token
+        return self.code == 190
+
+
 class SocialMediaService:
     """Base class for social media services"""
     
-    def __init__(self, social_account):
+    BASE_URL = 'https://graph.facebook.com/v18.0'
+    METRICS_FIELDS = ''
+    
+    def __init__(self, social_account, client):
         self.social_account = social_account
         self.access_token = social_account.access_token
+        self.base_url = getattr(settings, 'SOCIAL_GRAPH_API_URL', self.BASE_URL)
+        # The caller's httpx.AsyncClient (social_media.http.new_client)
+        self.http = client
     
-    def post_product(self, product, post_text, image_url=None):
+    async def post_product(self, product, post_text, image_url=None):
         """Post a product to social media"""
         raise NotImplementedError("Subclasses must implement post_product")
     
-    def delete_post(self, post_id):
+    async def delete_post(self, post_id):
         """Delete a post"""
         raise NotImplementedError("Subclasses must implement delete_post")
     
-    def get_post_metrics(self, post_id):
-        """Get engagement metrics for a post"""
-        raise NotImplementedError("Subclasses must implement get_post_metrics")
+    def parse_metrics(self, data):
+        """Convert a platform response for one post into likes/comments/shares/reach"""
+        raise NotImplementedError("Subclasses must implement parse_metrics")
+    
+    async def get_post_metrics(self, post_id):
+        """
+        Get engagement metrics for a post
+        
+        Returns: dict with likes, comments, shares, reach
+        Raises: SocialMediaAPIError, httpx.HTTPError
+        """
+        params = {
+            'access_token': self.access_token,
+            'fields': self.METRICS_FIELDS,
+        }
+        response = await self.http.get(f"{self.base_url}/{post_id}", params=params)
+        data = response.json()
+        if response.status_code != 200 or 'error' in data:
+            error = data.get('error', {})
+            raise SocialMediaAPIError(error.get('message', f'HTTP {response.status_code}'), error.get('code'))
+        return self.parse_metrics(data)
+    
+    async def get_posts_metrics(self, post_ids):
+        """
+        Get engagement metrics for many posts with one batch request
+        (Graph API ?ids=...)
+        
+        Returns: dict of post_id -> metrics
+        Raises: SocialMediaAPIError, httpx.HTTPError
+        """
+        params = {
+            'access_token': self.access_token,
+            'ids': ','.join(post_ids),
+            'fields': self.METRICS_FIELDS,
+        }
+        response = await self.http.get(f"{self.base_url}/", params=params)
+        data = response.json()
+        if response.status_code != 200 or 'error' in data:
+            error = data.get('error', {})
+            raise SocialMediaAPIError(error.get('message', f'HTTP {response.status_code}'), error.get('code'))
+        return {post_id: self.parse_metrics(item) for post_id, item in data.items()}
 
 
 class FacebookService(SocialMediaService):
     """Facebook posting service"""
     
-    BASE_URL = 'https://graph.facebook.com/v18.0'
+    METRICS_FIELDS = 'likes.summary(true),comments.summary(true),shares'
     
-    def post_product(self, product, post_text, image_url=None):
+    async def post_product(self, product, post_text, image_url=None):
         """
         Post a product to Facebook Page
         
@@ -45,7 +114,7 @@ class FacebookService(SocialMediaService):
             page_id = self.social_account.account_id
             
             # Prepare post data
-            url = f"{self.BASE_URL}/{page_id}/feed"
+            url = f"{self.base_url}/{page_id}/feed"
             
             params = {
                 'access_token': self.access_token,
@@ -58,7 +127,7 @@ class FacebookService(SocialMediaService):
                 params['link'] = product_url
             
             # Post
-            response = requests.post(url, data=params, timeout=30)
+            response = await self.http.post(url, data=params)
             data = response.json()
             
             if response.status_code == 200 and 'id' in data:
@@ -70,7 +139,7 @@ class FacebookService(SocialMediaService):
         except Exception as e:
             return False, None, str(e)
     
-    def post_product_with_photo(self, product, post_text, image_path):
+    async def post_product_with_photo(self, product, post_text, image_path):
         """
         Post a product with photo to Facebook Page
         
@@ -83,7 +152,7 @@ class FacebookService(SocialMediaService):
         """
         try:
             page_id = self.social_account.account_id
-            url = f"{self.BASE_URL}/{page_id}/photos"
+            url = f"{self.base_url}/{page_id}/photos"
             
             params = {
                 'access_token': self.access_token,
@@ -95,10 +164,10 @@ class FacebookService(SocialMediaService):
                 product_url = f"{settings.SITE_URL}/products/{product.slug}/"
                 params['link'] = product_url
             
-            # Open and send image
-            with open(image_path, 'rb') as image_file:
-                files = {'source': image_file}
-                response = requests.post(url, data=params, files=files, timeout=60)
+            # Read the image off the event loop, then send it
+            image = await asyncio.to_thread(_read_file, image_path)
+            files = {'source': (os.path.basename(image_path), image)}
+            response = await self.http.post(url, data=params, files=files, timeout=60)
             
             data = response.json()
             
@@ -111,51 +180,33 @@ class FacebookService(SocialMediaService):
         except Exception as e:
             return False, None, str(e)
     
-    def delete_post(self, post_id):
+    async def delete_post(self, post_id):
         """Delete a Facebook post"""
         try:
-            url = f"{self.BASE_URL}/{post_id}"
+            url = f"{self.base_url}/{post_id}"
             params = {'access_token': self.access_token}
             
-            response = requests.delete(url, params=params, timeout=30)
+            response = await self.http.delete(url, params=params)
             return response.status_code == 200
             
         except Exception as e:
             return False
     
-    def get_post_metrics(self, post_id):
-        """
-        Get engagement metrics for a post
-        
-        Returns: dict with likes, comments, shares, reach
-        """
-        try:
-            url = f"{self.BASE_URL}/{post_id}"
-            params = {
-                'access_token': self.access_token,
-                'fields': 'likes.summary(true),comments.summary(true),shares'
-            }
-            
-            response = requests.get(url, params=params, timeout=30)
-            data = response.json()
-            
-            return {
-                'likes': data.get('likes', {}).get('summary', {}).get('total_count', 0),
-                'comments': data.get('comments', {}).get('summary', {}).get('total_count', 0),
-                'shares': data.get('shares', {}).get('count', 0),
-                'reach': 0,  # Requires insights API
-            }
-            
-        except Exception as e:
-            return {'likes': 0, 'comments': 0, 'shares': 0, 'reach': 0}
+    def parse_metrics(self, data):
+        return {
+            'likes': data.get('likes', {}).get('summary', {}).get('total_count', 0),
+            'comments': data.get('comments', {}).get('summary', {}).get('total_count', 0),
+            'shares': data.get('shares', {}).get('count', 0),
+            'reach': 0,  # Requires insights API
+        }
 
 
 class InstagramService(SocialMediaService):
     """Instagram posting service (via Facebook Graph API)"""
     
-    BASE_URL = 'https://graph.facebook.com/v18.0'
+    METRICS_FIELDS = 'like_count,comments_count'
     
-    def post_product(self, product, post_text, image_url):
+    async def post_product(self, product, post_text, image_url):
         """
         Post a product to Instagram Business Account
         
@@ -174,14 +225,14 @@ class InstagramService(SocialMediaService):
             instagram_account_id = self.social_account.account_id
             
             # Step 1: Create media container
-            create_url = f"{self.BASE_URL}/{instagram_account_id}/media"
+            create_url = f"{self.base_url}/{instagram_account_id}/media"
             create_params = {
                 'access_token': self.access_token,
                 'image_url': image_url,
                 'caption': post_text,
             }
             
-            response = requests.post(create_url, data=create_params, timeout=30)
+            response = await self.http.post(create_url, data=create_params)
             data = response.json()
             
             if response.status_code != 200 or 'id' not in data:
@@ -191,13 +242,13 @@ class InstagramService(SocialMediaService):
             container_id = data['id']
             
             # Step 2: Publish the container
-            publish_url = f"{self.BASE_URL}/{instagram_account_id}/media_publish"
+            publish_url = f"{self.base_url}/{instagram_account_id}/media_publish"
             publish_params = {
                 'access_token': self.access_token,
                 'creation_id': container_id,
             }
             
-            response = requests.post(publish_url, data=publish_params, timeout=30)
+            response = await self.http.post(publish_url, data=publish_params)
             data = response.json()
             
             if response.status_code == 200 and 'id' in data:
@@ -209,88 +260,101 @@ class InstagramService(SocialMediaService):
         except Exception as e:
             return False, None, str(e)
     
-    def delete_post(self, post_id):
+    async def delete_post(self, post_id):
         """Delete an Instagram post"""
         try:
-            url = f"{self.BASE_URL}/{post_id}"
+            url = f"{self.base_url}/{post_id}"
             params = {'access_token': self.access_token}
             
-            response = requests.delete(url, params=params, timeout=30)
+            response = await self.http.delete(url, params=params)
             return response.status_code == 200
             
         except Exception as e:
             return False
     
-    def get_post_metrics(self, post_id):
-        """Get engagement metrics for Instagram post"""
-        try:
-            url = f"{self.BASE_URL}/{post_id}"
-            params = {
-                'access_token': self.access_token,
-                'fields': 'like_count,comments_count,engagement'
-            }
-            
-            response = requests.get(url, params=params, timeout=30)
-            data = response.json()
-            
-            return {
-                'likes': data.get('like_count', 0),
-                'comments': data.get('comments_count', 0),
-                'shares': 0,  # Instagram doesn't provide shares
-                'reach': 0,  # Requires insights API
-            }
-            
-        except Exception as e:
-            return {'likes': 0, 'comments': 0, 'shares': 0, 'reach': 0}
+    def parse_metrics(self, data):
+        return {
+            'likes': data.get('like_count', 0),
+            'comments': data.get('comments_count', 0),
+            'shares': 0,  # Instagram doesn't provide shares
+            'reach': 0,  # Requires insights API
+        }
 
 
 class SocialMediaPoster:
     """Main class for posting to social media"""
     
     @staticmethod
-    def get_service(social_account):
+    def get_service(social_account, client):
         """Get the appropriate service for a social media account"""
         if social_account.platform == 'FACEBOOK':
-            return FacebookService(social_account)
+            return FacebookService(social_account, client=client)
         elif social_account.platform == 'INSTAGRAM':
-            return InstagramService(social_account)
+            return InstagramService(social_account, client=client)
         else:
             raise ValueError(f"Unsupported platform: {social_account.platform}")
     
     @staticmethod
-    def post_product(product, social_account, post_text=None, image_path=None):
+    def build_post_text(product, social_account):
+        """Post text from the vendor's default template for the platform, or a generic one"""
+        from .models import SocialMediaTemplate
+        
+        # Try to get default template
+        template = SocialMediaTemplate.objects.filter(
+            vendor=product.vendor,
+            platform=social_account.platform,
+            is_default=True
+        ).first()
+        
+        if template:
+            return template.render(product)
+        
+        # Generate default text
+        post_text = f"{product.name}\n\n{product.description[:200]}\n\nPrice: ${product.price}"
+        if hasattr(settings, 'SITE_URL'):
+            post_text += f"\n\n{settings.SITE_URL}/products/{product.slug}/"
+        return post_text
+    
+    @staticmethod
+    async def publish(service, product, post_text, image_path=None):
+        """
+        Send a post to the platform (HTTP only, no database writes)
+        
+        Returns: (success: bool, post_id: str, error: str)
+        """
+        platform = service.social_account.platform
+        if image_path and platform == 'FACEBOOK':
+            return await service.post_product_with_photo(product, post_text, image_path)
+        if platform == 'INSTAGRAM':
+            # Instagram requires public image URL
+            if hasattr(product, 'image') and product.image:
+                image_url = f"{settings.SITE_URL}{product.image.url}"
+                return await service.post_product(product, post_text, image_url)
+            return False, None, "No product image available"
+        return await service.post_product(product, post_text)
+    
+    @staticmethod
+    async def post_product(product, social_account, client, post_text=None, image_path=None):
         """
         Post a product to a social media account
         
         Args:
             product: Product instance
             social_account: SocialMediaAccount instance
+            client: httpx.AsyncClient to send the request with
             post_text: Optional custom post text (uses template if not provided)
             image_path: Optional path to image file
         
         Returns: ProductSocialPost instance
         """
-        from .models import ProductSocialPost, SocialMediaTemplate
+        from .models import ProductSocialPost, SocialMediaAccount
         
         # Get or generate post text
         if not post_text:
-            # Try to get default template
-            template = SocialMediaTemplate.objects.filter(
-                vendor=product.vendor,
-                platform=social_account.platform,
-                is_default=True
-            ).first()
-            
-            if template:
-                post_text = template.render(product)
-            else:
-                # Generate default text
-                post_text = f"{product.name}\n\n{product.description[:200]}\n\nPrice: ${product.price}"
-                if hasattr(settings, 'SITE_URL'):
-                    post_text += f"\n\n{settings.SITE_URL}/products/{product.slug}/"
+            post_text = await sync_to_async(SocialMediaPoster.build_post_text)(product, social_account)
         
         # Create post record
-        social_post = ProductSocialPost.objects.create(
+        social_post = await ProductSocialPost.objects.acreate(
             product=product,
             vendor=product.vendor,
             social_account=social_account,
@@ -300,26 +364,12 @@ class SocialMediaPoster:
         
         try:
             # Get service
-            service = SocialMediaPoster.get_service(social_account)
+            service = SocialMediaPoster.get_service(social_account, client)
             
             # Post to platform
-            if image_path and social_account.platform == 'FACEBOOK':
-                success, post_id, error = service.post_product_with_photo(
-                    product, post_text, image_path
-                )
-            elif social_account.platform == 'INSTAGRAM':
-                # Instagram requires public image URL
-                if hasattr(product, 'image') and product.image:
-                    image_url = f"{settings.SITE_URL}{product.image.url}"
-                    success, post_id, error = service.post_product(
-                        product, post_text, image_url
-                    )
-                else:
-                    success, post_id, error = False, None, "No product image available"
-            else:
-                success, post_id, error = service.post_product(
-                    product, post_text
-                )
+            success, post_id, error = await SocialMediaPoster.publish(
+                service, product, post_text, image_path
+            )
             
             # Update post record
             if success:
@@ -327,76 +377,47 @@ class SocialMediaPoster:
                 social_post.post_id = post_id
                 social_post.posted_at = timezone.now()
                 
-                # Update account stats
-                social_account.total_posts += 1
-                social_account.last_post_at = timezone.now()
-                social_account.save()
+                # Update account stats in the database: posts to one account
+                # can run concurrently, and a read-modify-write would lose some
+                now = timezone.now()
+                await SocialMediaAccount.objects.filter(pk=social_account.pk).aupdate(
+                    total_posts=F('total_posts') + 1,
+                    last_post_at=now,
+                    updated_at=now,
+                )
             else:
                 social_post.status = 'FAILED'
                 social_post.error_message = error
             
-            social_post.save()
+            await social_post.asave()
             return social_post
             
         except Exception as e:
             social_post.status = 'FAILED'
             social_post.error_message = str(e)
-            social_post.save()
+            await social_post.asave()
             return social_post
     
     @staticmethod
     def auto_post_product(product):
         """
-        Auto-post product to all accounts with auto_post enabled
+        Queue a post of the product to every account with auto_post enabled.
+        The scheduled post dispatcher publishes them in the background.
         
         Args:
             product: Product instance
         
-        Returns: list of ProductSocialPost instances
+        Returns: list of ScheduledPost instances
         """
-        from .models import SocialMediaAccount
-        
-        # Get accounts with auto-post enabled
-        accounts = SocialMediaAccount.objects.filter(
-            vendor=product.vendor,
-            auto_post=True,
-            status='ACTIVE'
-        )
-        
-        posts = []
-        for account in accounts:
-            # Get image path if available
-            image_path = None
-            if hasattr(product, 'image') and product.image:
-                try:
-                    image_path = product.image.path
-                except:
-                    pass
-            
-            # Post
-            post = SocialMediaPoster.post_product(
-                product, account, image_path=image_path
-            )
-            posts.append(post)
+        from .dispatcher import enqueue_auto_posts
         
-        return posts
+        return enqueue_auto_posts(product)
     
     @staticmethod
     def update_post_metrics(social_post):
-        """Update engagement metrics for a post"""
+        """Update engagement metrics for a post (see metrics_refresher for bulk refreshes)"""
+        from .metrics_refresher import refresh_post_metrics
+        
         if social_post.status != 'POSTED' or not social_post.post_id:
             return
-        
-        try:
-            service = SocialMediaPoster.get_service(social_post.social_account)
-            metrics = service.get_post_metrics(social_post.post_id)
-            
-            social_post.likes_count = metrics.get('likes', 0)
-            social_post.comments_count = metrics.get('comments', 0)
-            social_post.shares_count = metrics.get('shares', 0)
-            social_post.reach = metrics.get('reach', 0)
-            social_post.save()
-            
-        except Exception as e:
-            pass  # Silently fail
-
+        refresh_post_metrics([social_post], max_workers=1)
@@ -0,0 +1,15 @@
+"""
+Social Media Signals
+Queue auto-posts for new products; the dispatcher publishes them
+"""
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from .dispatcher import enqueue_auto_posts
+
+
+@receiver(post_save, sender='products.Product')
+def on_product_created(sender, instance, created, **kwargs):
+    """Queue posts for the vendor's auto-post accounts once the product is committed"""
+    if created and instance.is_active:
+        transaction.on_commit(lambda: enqueue_auto_posts(instance))
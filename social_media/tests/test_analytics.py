@@ -0,0 +1,129 @@
+"""
+Test social media analytics rollups
+"""
+import pytest
+from datetime import timedelta
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from social_media.models import SocialMediaAccount, ProductSocialPost, SocialMediaAnalytics
+from social_media.analytics import snapshot_social_analytics, get_dashboard_stats
+
+
+@pytest.fixture
+def accounts(vendor_user):
+    """Facebook and Instagram accounts for the vendor"""
+    return {
+        platform: SocialMediaAccount.objects.create(
+            vendor=vendor_user,
+            platform=platform,
+            account_name=f'{platform} page',
+            account_id=f'{platform}-1',
+            access_token='token',
+        )
+        for platform in ('FACEBOOK', 'INSTAGRAM')
+    }
+
+
+@pytest.fixture
+def posts(vendor_user, products, accounts):
+    """Posted and failed posts across both platforms"""
+    rows = []
+    for i, product in enumerate(products):
+        platform = 'FACEBOOK' if i % 2 == 0 else 'INSTAGRAM'
+        rows.append(ProductSocialPost(
+            product=product,
+            vendor=vendor_user,
+            social_account=accounts[platform],
+            post_text=product.name,
+            status='POSTED',
+            likes_count=10,
+            comments_count=2,
+            shares_count=1,
+            reach=100,
+        ))
+    rows.append(ProductSocialPost(
+        product=products[0],
+        vendor=vendor_user,
+        social_account=accounts['FACEBOOK'],
+        post_text='failed',
+        status='FAILED',
+        likes_count=99,
+    ))
+    return ProductSocialPost.objects.bulk_create(rows)
+
+
+@pytest.mark.unit
+class TestSocialAnalytics:
+    """Test grouped aggregation and monthly snapshots"""
+
+    def test_current_month_is_live(self, vendor_user, posts):
+        """Test this month's posts are counted with one grouped live query, before any snapshot"""
+        with CaptureQueriesContext(connection) as ctx:
+            totals, platform_stats, as_of = get_dashboard_stats(vendor_user)
+        queries = [q for q in ctx.captured_queries if not q['sql'].startswith('EXPLAIN')]
+
+        assert len(queries) == 2  # past-month rollup + current-month live aggregate
+        assert as_of is None
+        assert totals == {'posts': 5, 'likes': 50, 'comments': 10, 'shares': 5, 'reach': 500}
+        assert platform_stats['FACEBOOK']['posts'] == 3
+        assert platform_stats['INSTAGRAM']['likes'] == 20
+
+    def test_snapshot_feeds_dashboard(self, vendor_user, posts, accounts):
+        """Test past months are read from the snapshot"""
+        ProductSocialPost.objects.update(created_at=timezone.now() - timedelta(days=40))
+        assert snapshot_social_analytics() == 2
+        facebook = SocialMediaAnalytics.objects.get(social_account=accounts['FACEBOOK'])
+        assert (facebook.total_posts, facebook.successful_posts, facebook.failed_posts) == (4, 3, 1)
+        assert facebook.total_likes == 30
+
+        # Engagement changes are picked up by the next snapshot (upsert, no duplicates)
+        ProductSocialPost.objects.filter(status='POSTED').update(likes_count=20)
+        assert snapshot_social_analytics() == 2
+        assert SocialMediaAnalytics.objects.count() == 2
+
+        totals, platform_stats, as_of = get_dashboard_stats(vendor_user)
+        assert as_of is not None
+        assert totals['likes'] == 100
+        assert platform_stats['INSTAGRAM'] == {'posts': 2, 'likes': 40, 'comments': 4, 'shares': 2, 'reach': 200}
+
+    def test_first_snapshot_keeps_dashboard_totals(self, vendor_user, posts):
+        """Test posts older than the recent months are rolled up too, so totals don't drop"""
+        old = [post.pk for post in posts[:3]]
+        ProductSocialPost.objects.filter(pk__in=old).update(created_at=timezone.now() - timedelta(days=100))
+        expected = {'posts': 5, 'likes': 50, 'comments': 10, 'shares': 5, 'reach': 500}
+
+        call_command('snapshot_social_analytics')
+        totals, _, as_of = get_dashboard_stats(vendor_user)
+
+        assert SocialMediaAnalytics.objects.values('month').distinct().count() == 2
+        assert as_of is not None
+        assert totals == expected
+
+        # A partial recompute leaves the older months alone
+        assert snapshot_social_analytics(months=2) == 2
+        assert get_dashboard_stats(vendor_user)[0] == expected
+
+    def test_posts_since_snapshot_are_counted(self, vendor_user, posts, products, accounts):
+        """Test a post made after today's snapshot shows on the dashboard straight away"""
+        snapshot_social_analytics()
+        ProductSocialPost.objects.create(
+            product=products[0], vendor=vendor_user, social_account=accounts['INSTAGRAM'],
+            post_text='new', status='POSTED', likes_count=7,
+        )
+
+        totals, platform_stats, _ = get_dashboard_stats(vendor_user)
+        assert totals['posts'] == 6
+        assert totals['likes'] == 57
+        assert platform_stats['INSTAGRAM']['posts'] == 3
+
+    def test_snapshot_drops_stale_rows(self, vendor_user, posts, accounts):
+        """Test an account-month whose posts are gone is deleted on the next snapshot"""
+        snapshot_social_analytics()
+        ProductSocialPost.objects.filter(social_account=accounts['INSTAGRAM']).delete()
+
+        assert snapshot_social_analytics() == 1
+        assert list(SocialMediaAnalytics.objects.values_list('social_account', flat=True)) == [
+            accounts['FACEBOOK'].pk
+        ]
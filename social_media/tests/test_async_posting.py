@@ -0,0 +1,183 @@
+"""
+Test async posting through the shared or request-scoped httpx client
+"""
+import asyncio
+import json
+from urllib.parse import parse_qs
+import httpx
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import AnonymousUser
+from django.http import Http404
+from django.test import AsyncRequestFactory
+from django.urls import reverse
+from mushanaicore.asgi import application
+from social_media import http
+from social_media.models import SocialMediaAccount, ProductSocialPost
+from social_media.services import FacebookService, SocialMediaAPIError, SocialMediaPoster
+from social_media.views import post_product
+
+
+def make_account(vendor, platform, token='token'):
+    return SocialMediaAccount.objects.create(
+        vendor=vendor, platform=platform, account_name=platform,
+        account_id=f'{platform}-1', access_token=token,
+    )
+
+
+@pytest.fixture
+def http_clients():
+    """The httpx clients the view opened"""
+    return []
+
+
+@pytest.fixture
+def graph_api(monkeypatch, settings, http_clients):
+    """Route the view's clients to an in-process Graph API; feeds reject token 'bad'"""
+    requests = []
+
+    def handler(request):
+        data = parse_qs(request.content.decode())
+        requests.append((request.method, request.url.path, data))
+        if data.get('access_token') == ['bad']:
+            return httpx.Response(400, json={'error': {'message': 'Invalid token', 'code': 190}})
+        return httpx.Response(200, json={'id': f'post-{len(requests)}'})
+
+    def new_client(max_connections=None):
+        http_clients.append(httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+        return http_clients[-1]
+
+    settings.SOCIAL_GRAPH_API_URL = 'https://graph.test/v18.0'
+    monkeypatch.setattr(http, 'new_client', new_client)
+    return requests
+
+
+def ajax_post(user, product, account_ids, **extra):
+    request = AsyncRequestFactory().post(
+        f'/social-media/post/{product.id}/', {'accounts': account_ids, **extra},
+        headers={'X-Requested-With': 'XMLHttpRequest'},
+    )
+    request.user = user
+    return async_to_sync(post_product)(request, product_id=product.id)
+
+
+@pytest.mark.unit
+class TestAsyncPosting:
+    """Test the async post_product view and the shared client"""
+
+    def test_post_product_posts_to_each_account(self, graph_api, vendor_user, product):
+        """Test every selected account is posted to and the results are recorded"""
+        facebook = make_account(vendor_user, 'FACEBOOK')
+        other = SocialMediaAccount.objects.create(
+            vendor=vendor_user, platform='FACEBOOK', account_name='Other page',
+            account_id='FACEBOOK-2', access_token='bad',
+        )
+
+        response = ajax_post(vendor_user, product, [facebook.pk, other.pk], custom_text='New in store')
+
+        results = sorted(json.loads(response.content)['results'], key=lambda r: r['success'])
+        assert results == [
+            {'platform': 'FACEBOOK', 'success': False, 'error': 'Invalid token'},
+            {'platform': 'FACEBOOK', 'success': True, 'error': None},
+        ]
+        assert sorted(path for _, path, _ in graph_api) == [
+            '/v18.0/FACEBOOK-1/feed', '/v18.0/FACEBOOK-2/feed',
+        ]
+        posted = ProductSocialPost.objects.get(social_account=facebook)
+        assert (posted.status, posted.post_text) == ('POSTED', 'New in store')
+        assert posted.post_id.startswith('post-')
+        assert ProductSocialPost.objects.get(social_account=other).status == 'FAILED'
+        facebook.refresh_from_db()
+        assert facebook.total_posts == 1
+
+    def test_post_product_guards(self, graph_api, vendor_user, customer_user, product):
+        """Test anonymous users are sent to login, GETs refused and other vendors' products 404"""
+        factory = AsyncRequestFactory()
+
+        request = factory.post(f'/social-media/post/{product.id}/')
+        request.user = AnonymousUser()
+        response = async_to_sync(post_product)(request, product_id=product.id)
+        assert response.status_code == 302
+        assert '/login' in response['Location']
+
+        request = factory.get(f'/social-media/post/{product.id}/')
+        request.user = vendor_user
+        assert async_to_sync(post_product)(request, product_id=product.id).status_code == 405
+
+        with pytest.raises(Http404):
+            ajax_post(customer_user, product, [make_account(vendor_user, 'FACEBOOK').pk])
+        assert graph_api == []
+
+    def test_post_product_closes_its_client(self, graph_api, http_clients, vendor_user, product):
+        """Test the request's posts share one client, closed before the response"""
+        accounts = [make_account(vendor_user, 'FACEBOOK'), make_account(vendor_user, 'INSTAGRAM')]
+
+        ajax_post(vendor_user, product, [account.pk for account in accounts])
+
+        assert len(http_clients) == 1
+        assert http_clients[0].is_closed
+
+    def test_post_product_reuses_worker_client(self, graph_api, http_clients, vendor_user, product):
+        """Test requests share the client opened on lifespan startup, closed on shutdown"""
+        account = make_account(vendor_user, 'FACEBOOK')
+
+        async def worker():
+            receive, sent = asyncio.Queue(), asyncio.Queue()
+            lifespan = asyncio.create_task(application({'type': 'lifespan'}, receive.get, sent.put))
+            await receive.put({'type': 'lifespan.startup'})
+            assert (await sent.get())['type'] == 'lifespan.startup.complete'
+
+            for _ in range(2):
+                request = AsyncRequestFactory().post(
+                    f'/social-media/post/{product.id}/', {'accounts': [account.pk]},
+                    headers={'X-Requested-With': 'XMLHttpRequest'},
+                )
+                request.user = vendor_user
+                await post_product(request, product_id=product.id)
+            shared_open = len(http_clients) == 1 and not http_clients[0].is_closed
+
+            await receive.put({'type': 'lifespan.shutdown'})
+            assert (await sent.get())['type'] == 'lifespan.shutdown.complete'
+            await lifespan
+            return shared_open
+
+        assert async_to_sync(worker)()
+        assert len(graph_api) == 2
+        assert len(http_clients) == 1 and http_clients[0].is_closed
+
+    def test_post_product_url(self, vendor_user, product):
+        """Test the social media URLs are routed"""
+        assert reverse('social_post_product', kwargs={'product_id': product.id}) == f'/social-media/post/{product.id}/'
+
+    def test_concurrent_posts_all_counted(self, graph_api, vendor_user, product):
+        """Test concurrent posts to one account (separate requests' copies of it) are all counted"""
+        account = make_account(vendor_user, 'FACEBOOK')
+        copies = [SocialMediaAccount.objects.get(pk=account.pk) for _ in range(3)]
+
+        async def post_three_times():
+            async with httpx.AsyncClient(transport=httpx.MockTransport(
+                lambda request: httpx.Response(200, json={'id': 'post-1'})
+            )) as client:
+                return await asyncio.gather(*(
+                    SocialMediaPoster.post_product(product, copy, client, post_text='New in store')
+                    for copy in copies
+                ))
+
+        assert [post.status for post in async_to_sync(post_three_times)()] == ['POSTED'] * 3
+        account.refresh_from_db()
+        assert account.total_posts == 3
+
+    def test_post_metrics_errors_propagate(self, vendor_user):
+        """Test a failed metrics lookup raises instead of reporting zero engagement"""
+        account = make_account(vendor_user, 'FACEBOOK')
+
+        async def metrics(response):
+            async with httpx.AsyncClient(transport=httpx.MockTransport(lambda request: response)) as client:
+                return await FacebookService(account, client).get_post_metrics('post-1')
+
+        with pytest.raises(SocialMediaAPIError) as error:
+            async_to_sync(metrics)(httpx.Response(400, json={'error': {'message': 'Expired', 'code': 190}}))
+        assert error.value.token_expired
+        assert async_to_sync(metrics)(httpx.Response(200, json={
+            'likes': {'summary': {'total_count': 4}}, 'comments': {'summary': {'total_count': 1}}, 'shares': {'count': 2},
+        })) == {'likes': 4, 'comments': 1, 'shares': 2, 'reach': 0}
@@ -0,0 +1,138 @@
+"""
+Test the scheduled post dispatcher
+"""
+import threading
+from datetime import timedelta
+import pytest
+from django.db import connection, transaction
+from django.utils import timezone
+from products.models import Product
+from social_media.models import SocialMediaAccount, ProductSocialPost, ScheduledPost
+from social_media.dispatcher import (
+    dispatch_due_posts, claim_due_posts, enqueue_auto_posts, backoff_delay, MAX_ATTEMPTS,
+)
+from social_media.services import SocialMediaPoster
+
+
+def make_account(vendor, platform, auto_post=True):
+    return SocialMediaAccount.objects.create(
+        vendor=vendor, platform=platform, account_name=platform,
+        account_id=f'{platform}-1', access_token='token', auto_post=auto_post,
+    )
+
+
+@pytest.fixture
+def published(monkeypatch):
+    """Replace the HTTP call; posts whose text contains 'fail' are rejected"""
+    calls = []
+
+    async def fake_publish(service, product, post_text, image_path=None):
+        calls.append((service.social_account.platform, post_text))
+        if 'fail' in post_text:
+            return False, None, 'API error'
+        return True, f'post-{len(calls)}', None
+
+    monkeypatch.setattr(SocialMediaPoster, 'publish', staticmethod(fake_publish))
+    return calls
+
+
+@pytest.mark.unit
+class TestScheduledPostDispatcher:
+    """Test enqueueing, claiming, publishing and backoff"""
+
+    def test_product_creation_enqueues_only(self, vendor_user, category, published, django_capture_on_commit_callbacks):
+        """Test a new product queues one post per auto-post account without publishing"""
+        make_account(vendor_user, 'FACEBOOK')
+        make_account(vendor_user, 'INSTAGRAM', auto_post=False)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            product = Product.objects.create(
+                vendor=vendor_user, category=category, name='Basket', slug='basket',
+                description='Woven basket', price=20, stock_quantity=3,
+            )
+
+        queued = ScheduledPost.objects.get(product=product)
+        assert queued.status == 'SCHEDULED'
+        assert queued.social_account.platform == 'FACEBOOK'
+        assert 'Basket' in queued.post_text
+        assert published == []
+
+    def test_dispatch_publishes_and_records(self, vendor_user, product, published):
+        """Test due posts are published once and linked to a ProductSocialPost"""
+        account = make_account(vendor_user, 'FACEBOOK')
+        enqueue_auto_posts(product)
+        ScheduledPost.objects.create(
+            product=product, vendor=vendor_user, social_account=account, post_text='later',
+            scheduled_for=timezone.now() + timedelta(hours=1),
+        )
+
+        assert dispatch_due_posts() == (1, 1, 0)
+        assert dispatch_due_posts() == (0, 0, 0)
+
+        done = ScheduledPost.objects.get(status='POSTED')
+        assert done.post_id == 'post-1'
+        assert done.social_post.status == 'POSTED'
+        assert ProductSocialPost.objects.count() == 1
+        account.refresh_from_db()
+        assert (account.total_posts, account.consecutive_failures) == (1, 0)
+
+    def test_failure_backs_off_account(self, vendor_user, product, published):
+        """Test a failure requeues the post, skips the account's other posts and backs it off"""
+        account = make_account(vendor_user, 'FACEBOOK')
+        now = timezone.now()
+        for text in ('fail first', 'second'):
+            ScheduledPost.objects.create(
+                product=product, vendor=vendor_user, social_account=account,
+                post_text=text, scheduled_for=now - timedelta(minutes=1),
+            )
+
+        assert dispatch_due_posts() == (2, 0, 1)
+        assert len(published) == 1
+
+        account.refresh_from_db()
+        assert account.consecutive_failures == 1
+        assert account.backoff_until > timezone.now()
+        first, second = ScheduledPost.objects.order_by('pk')
+        assert (first.status, first.attempts, first.error_message) == ('SCHEDULED', 1, 'API error')
+        assert (second.status, second.attempts) == ('SCHEDULED', 0)
+
+        # Backed-off accounts are not claimed until the backoff expires
+        assert dispatch_due_posts() == (0, 0, 0)
+
+        SocialMediaAccount.objects.filter(pk=account.pk).update(backoff_until=None)
+        ScheduledPost.objects.filter(pk=first.pk).update(attempts=MAX_ATTEMPTS - 1)
+        dispatch_due_posts()
+        first.refresh_from_db()
+        assert first.status == 'FAILED'
+        assert first.social_post.status == 'FAILED'
+
+        assert backoff_delay(1) == timedelta(minutes=1)
+        assert backoff_delay(4) == timedelta(minutes=8)
+        assert backoff_delay(50) == timedelta(hours=6)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_locked_posts_are_skipped(self, vendor_user, product):
+        """Test a second worker skips rows another worker has locked"""
+        account = make_account(vendor_user, 'FACEBOOK')
+        posts = ScheduledPost.objects.bulk_create([
+            ScheduledPost(product=product, vendor=vendor_user, social_account=account,
+                          post_text=str(i), scheduled_for=timezone.now())
+            for i in range(4)
+        ])
+        other_worker = {}
+
+        def claim_in_other_connection():
+            try:
+                other_worker['claimed'] = claim_due_posts(10)
+            finally:
+                connection.close()
+
+        with transaction.atomic():
+            locked = list(ScheduledPost.objects.select_for_update().filter(pk__in=[p.pk for p in posts[:2]]))
+            thread = threading.Thread(target=claim_in_other_connection)
+            thread.start()
+            thread.join(timeout=10)
+
+        assert len(locked) == 2
+        assert sorted(p.pk for p in other_worker['claimed']) == [p.pk for p in posts[2:]]
+        assert sorted(p.pk for p in claim_due_posts(10)) == [p.pk for p in posts[:2]]
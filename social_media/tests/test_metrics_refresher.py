@@ -0,0 +1,132 @@
+"""
+Test the bulk social metrics refresher against a local stub Graph API
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import pytest
+from asgiref.sync import async_to_sync
+from social_media.models import SocialMediaAccount, ProductSocialPost
+from social_media.metrics_refresher import refresh_post_metrics, TokenBucket
+
+
+class StubGraphHandler(BaseHTTPRequestHandler):
+    """Answers ?ids= batch requests like the Graph API"""
+
+    requests = []
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        StubGraphHandler.requests.append(query)
+        if query['access_token'] == ['expired']:
+            status, body = 400, {'error': {'message': 'Session has expired', 'code': 190}}
+        else:
+            status = 200
+            body = {}
+            for post_id in query['ids'][0].split(','):
+                n = int(post_id.split('_')[-1])
+                body[post_id] = {
+                    'likes': {'summary': {'total_count': n * 10}},
+                    'comments': {'summary': {'total_count': n}},
+                    'shares': {'count': 1},
+                    'like_count': n * 10,
+                    'comments_count': n,
+                }
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def graph_api(settings):
+    """Run the stub Graph API on a free local port"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubGraphHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    StubGraphHandler.requests = []
+    settings.SOCIAL_GRAPH_API_URL = f'http://127.0.0.1:{server.server_port}'
+    yield StubGraphHandler
+    server.shutdown()
+    server.server_close()
+
+
+def make_account(vendor, platform, token='token'):
+    return SocialMediaAccount.objects.create(
+        vendor=vendor, platform=platform, account_name=platform,
+        account_id=f'{platform}-{token}', access_token=token,
+    )
+
+
+def make_posts(vendor, product, account, count):
+    return ProductSocialPost.objects.bulk_create([
+        ProductSocialPost(
+            product=product, vendor=vendor, social_account=account,
+            post_text='post', status='POSTED', post_id=f'{account.pk}_{i}',
+        )
+        for i in range(1, count + 1)
+    ])
+
+
+@pytest.mark.unit
+class TestMetricsRefresher:
+    """Test batching, write-back and error handling"""
+
+    def test_refresh_batches_and_bulk_updates(self, graph_api, vendor_user, product):
+        """Test posts are fetched in batches of 50 per account and written back"""
+        facebook = make_account(vendor_user, 'FACEBOOK')
+        instagram = make_account(vendor_user, 'INSTAGRAM')
+        make_posts(vendor_user, product, facebook, 60)
+        make_posts(vendor_user, product, instagram, 3)
+
+        updated, failed = refresh_post_metrics(requests_per_second=100)
+
+        assert (updated, failed) == (63, 0)
+        assert len(graph_api.requests) == 3  # 50 + 10 Facebook, 3 Instagram
+        post = ProductSocialPost.objects.get(post_id=f'{facebook.pk}_7')
+        assert (post.likes_count, post.comments_count, post.shares_count) == (70, 7, 1)
+        post = ProductSocialPost.objects.get(post_id=f'{instagram.pk}_2')
+        assert (post.likes_count, post.comments_count, post.shares_count) == (20, 2, 0)
+
+        # Unchanged numbers are not written again
+        assert refresh_post_metrics(requests_per_second=100) == (0, 0)
+
+    def test_expired_token_keeps_metrics_and_flags_account(self, graph_api, vendor_user, product):
+        """Test API errors don't zero out metrics and expired tokens are flagged"""
+        account = make_account(vendor_user, 'FACEBOOK', token='expired')
+        post, = make_posts(vendor_user, product, account, 1)
+        ProductSocialPost.objects.filter(pk=post.pk).update(likes_count=5)
+
+        assert refresh_post_metrics(requests_per_second=100) == (0, 1)
+
+        post.refresh_from_db()
+        assert post.likes_count == 5
+        account.refresh_from_db()
+        assert account.status == 'EXPIRED'
+
+    def test_token_bucket_limits_rate(self, monkeypatch):
+        """Test the bucket waits once the burst is used up"""
+        clock = {'now': 0.0}
+        sleeps = []
+
+        async def fake_sleep(seconds):
+            sleeps.append(seconds)
+            clock['now'] += seconds
+
+        async def drain():
+            bucket = TokenBucket(rate=2, capacity=2)
+            for _ in range(4):
+                await bucket.acquire()
+
+        monkeypatch.setattr('social_media.metrics_refresher.time.monotonic', lambda: clock['now'])
+        monkeypatch.setattr('social_media.metrics_refresher.asyncio.sleep', fake_sleep)
+
+        async_to_sync(drain)()
+
+        assert sum(sleeps) == pytest.approx(1.0)
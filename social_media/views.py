@@ -1,8 +1,8 @@
+import asyncio
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import JsonResponse
-from django.views.decorators.http import require_POST
+from django.http import Http404, JsonResponse
 from django.utils import timezone
 from datetime import timedelta
 
@@ -10,8 +10,11 @@ from .models import (
     SocialMediaAccount, ProductSocialPost, SocialMediaTemplate,
     SocialMediaAnalytics, ScheduledPost
 )
+from mushanaicore.decorators import async_login_required, async_require_POST
 from products.models import Product
 from .services import SocialMediaPoster
+from .http import request_client
+from .analytics import get_dashboard_stats
 
 
 @login_required
@@ -235,13 +238,19 @@ def posts_list(request):
     return render(request, 'social_media/posts_list.html', context)
 
 
-@login_required
-@require_POST
-def post_product(request, product_id):
+@async_login_required
+@async_require_POST
+async def post_product(request, product_id):
     """
     Post a product to selected social media accounts
+    
+    Async, so the Graph API calls (one per account, sent concurrently) don't
+    hold a worker while they wait.
     """
-    product = get_object_or_404(Product, id=product_id, vendor=request.user)
+    try:
+        product = await Product.objects.select_related('vendor').aget(id=product_id, vendor=request.user)
+    except Product.DoesNotExist:
+        raise Http404('No Product matches the given query.')
     
     # Get selected accounts
     account_ids = request.POST.getlist('accounts')
@@ -250,33 +259,36 @@ def post_product(request, product_id):
     if not account_ids:
         return JsonResponse({'success': False, 'error': 'No accounts selected'})
     
-    accounts = SocialMediaAccount.objects.filter(
+    accounts = [account async for account in SocialMediaAccount.objects.filter(
         id__in=account_ids,
         vendor=request.user,
         status='ACTIVE'
-    )
-    
-    results = []
-    for account in accounts:
-        # Get image path if available
-        image_path = None
-        if hasattr(product, 'image') and product.image:
-            try:
-                image_path = product.image.path
-            except:
-                pass
-        
-        # Post
-        post_text = custom_text if custom_text else None
-        social_post = SocialMediaPoster.post_product(
-            product, account, post_text=post_text, image_path=image_path
-        )
-        
-        results.append({
+    )]
+    
+    # Get image path if available
+    image_path = None
+    if hasattr(product, 'image') and product.image:
+        try:
+            image_path = product.image.path
+        except:
+            pass
+    
+    # Post
+    post_text = custom_text if custom_text else None
+    async with request_client() as client:
+        social_posts = await asyncio.gather(*(
+            SocialMediaPoster.post_product(product, account, client, post_text=post_text, image_path=image_path)
+            for account in accounts
+        ))
+    
+    results = [
+        {
             'platform': account.platform,
             'success': social_post.status == 'POSTED',
             'error': social_post.error_message
-        })
+        }
+        for account, social_post in zip(accounts, social_posts)
+    ]
     
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
         return JsonResponse({'success': True, 'results': results})
@@ -286,7 +298,7 @@ def post_product(request, product_id):
                 messages.success(request, f"Posted to {result['platform']}")
             else:
                 messages.error(request, f"{result['platform']}: {result['error']}")
-        return redirect('product_detail', product_id=product.id)
+        return redirect('product_detail', slug=product.slug)
 
 
 @login_required
@@ -341,48 +353,24 @@ def analytics_dashboard(request):
         messages.error(request, 'Access denied.')
         return redirect('home')
     
-    # Get all posts
-    posts = ProductSocialPost.objects.filter(
-        vendor=request.user,
-        status='POSTED'
-    ).select_related('social_account')
-    
-    # Overall stats
-    total_posts = posts.count()
-    total_likes = sum(post.likes_count for post in posts)
-    total_comments = sum(post.comments_count for post in posts)
-    total_shares = sum(post.shares_count for post in posts)
-    total_reach = sum(post.reach for post in posts)
-    
-    # By platform
-    platform_stats = {}
-    for post in posts:
-        platform = post.social_account.platform
-        if platform not in platform_stats:
-            platform_stats[platform] = {
-                'posts': 0,
-                'likes': 0,
-                'comments': 0,
-                'shares': 0,
-                'reach': 0
-            }
-        platform_stats[platform]['posts'] += 1
-        platform_stats[platform]['likes'] += post.likes_count
-        platform_stats[platform]['comments'] += post.comments_count
-        platform_stats[platform]['shares'] += post.shares_count
-        platform_stats[platform]['reach'] += post.reach
+    # Past months come from the daily SocialMediaAnalytics rollup (snapshot_social_analytics), the current month is live
+    totals, platform_stats, stats_as_of = get_dashboard_stats(request.user)
     
     # Top performing posts
-    top_posts = posts.order_by('-likes_count')[:10]
+    top_posts = ProductSocialPost.objects.filter(
+        vendor=request.user,
+        status='POSTED'
+    ).select_related('social_account', 'product').order_by('-likes_count')[:10]
     
     context = {
-        'total_posts': total_posts,
-        'total_likes': total_likes,
-        'total_comments': total_comments,
-        'total_shares': total_shares,
-        'total_reach': total_reach,
+        'total_posts': totals['posts'],
+        'total_likes': totals['likes'],
+        'total_comments': totals['comments'],
+        'total_shares': totals['shares'],
+        'total_reach': totals['reach'],
         'platform_stats': platform_stats,
         'top_posts': top_posts,
+        'stats_as_of': stats_as_of,
     }
     
     return render(request, 'social_media/analytics.html', context)
@@ -0,0 +1,42 @@
+"""
+Store Signals
+Refresh nginx-cached storefront pages when what they show changes (see mushanaicore.edge_cache)
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from mushanaicore.edge_cache import purge_surrogate_keys, purging_enabled
+
+
+@receiver([post_save, post_delete], sender='products.Product')
+def on_product_changed(sender, instance, **kwargs):
+    """Price, stock and listing changes show on the product page and every product list"""
+    purge_surrogate_keys(f'product-{instance.pk}', f'vendor-{instance.vendor_id}', 'storefront', 'trending')
+
+
+@receiver([post_save, post_delete], sender='products.Category')
+def on_category_changed(sender, instance, **kwargs):
+    purge_surrogate_keys('storefront', 'trending', 'products')
+
+
+@receiver([post_save, post_delete], sender='products.ProductReview')
+def on_review_changed(sender, instance, **kwargs):
+    purge_surrogate_keys(f'product-{instance.product_id}')
+
+
+@receiver([post_save, post_delete], sender='vendors.VendorProfile')
+def on_vendor_profile_changed(sender, instance, **kwargs):
+    purge_surrogate_keys(f'vendor-{instance.vendor_id}', 'brand-stories', 'storefront')
+
+
+@receiver([post_save, post_delete], sender='vendors.ProductPromotion')
+def on_product_promotion_changed(sender, instance, **kwargs):
+    purge_surrogate_keys(f'product-{instance.product_id}', 'storefront', 'trending')
+
+
+@receiver(post_save, sender='vendors.Promotion')
+def on_promotion_changed(sender, instance, **kwargs):
+    """A flash sale starting or ending changes the prices on all of its products' pages"""
+    if not purging_enabled():
+        return
+    product_ids = instance.product_links.values_list('product_id', flat=True)
+    purge_surrogate_keys('storefront', 'trending', *(f'product-{product_id}' for product_id in product_ids))
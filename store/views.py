@@ -1,14 +1,18 @@
 from decimal import Decimal, InvalidOperation
 from django.shortcuts import render, get_object_or_404, redirect
-from django.db.models import Q, Count, Avg, F, Min, Max
+from django.db.models import Q, Count, Avg, F, Min, Max, Window
+from django.db.models.functions import RowNumber
 from django.db import models
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
 from django.views.decorators.http import require_http_methods, require_POST
+from django.views.decorators.csrf import csrf_exempt, ensure_csrf_cookie
+from django.utils.cache import add_never_cache_headers
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.utils import timezone
 from datetime import timedelta
 from products.models import Product, Brand, Category, ProductReview, ReviewPhoto, ReviewHelpfulVote
+from products.facets import get_global_facets, get_result_facets
 from products.recommendations import (
     get_customers_also_bought,
     get_similar_products,
@@ -19,6 +23,7 @@ from products.recommendations import (
     track_product_view
 )
 from vendors.models import VendorProfile, VendorPaymentOption, VendorDeliveryZone
+from vendors.promotion_events import record_click as record_promotion_click, record_views as record_promotion_views
 from projects.models import CommunityProject
 from customers.models import SearchHistory, SocialShare, BackInStockAlert, VendorSubscription
 from django.contrib.auth import get_user_model
@@ -28,13 +33,52 @@ from .social_sharing import (
     get_vendor_share_data
 )
 from orders.models import Cart, CartItem, Order, OrderItem, OrderPaymentSubmission
+from orders.cart import get_cart_summary
+from orders import guest_cart
 
 User = get_user_model()
 
 
-from django.views.decorators.cache import cache_page
+from mushanaicore.metrics import query_budget
+from mushanaicore.edge_cache import add_surrogate_keys, edge_cache
 
-@cache_page(60 * 5)  # Cache for 5 minutes
+
+def _newest_products_by_category(category_ids, limit):
+    """{category_id: [newest `limit` active products]} with ratings and tags, in two queries"""
+    products = Product.objects.filter(
+        category_id__in=category_ids,
+        is_active=True
+    ).select_related('vendor', 'category').prefetch_related('tags').annotate(
+        avg_rating=Avg('reviews__rating'),
+        review_total=Count('reviews', distinct=True),
+        category_rank=Window(RowNumber(), partition_by=F('category_id'), order_by=F('created_at').desc()),
+    ).filter(category_rank__lte=limit).order_by('category_id', '-created_at')
+    
+    by_category = {}
+    for product in products:
+        by_category.setdefault(product.category_id, []).append(product)
+    return by_category
+
+
+def _category_sections(sections):
+    """Home page sections for [(category, schedule)], skipping categories without products"""
+    # Newest 12 products of every section in one query
+    section_products = _newest_products_by_category([category.id for category, _ in sections], 12)
+    return [
+        {
+            'category': category,
+            'schedule': schedule,
+            'products': section_products[category.id],
+            'header': category.display_header or category.name,
+            'tagline': category.display_tagline or category.description or '',
+        }
+        for category, schedule in sections
+        if category.id in section_products
+    ]
+
+
+@query_budget(15)
+@edge_cache('storefront')
 def home(request):
     from products.models import CategoryDisplaySchedule
     from customers.models import CustomerTestimonial
@@ -51,51 +95,16 @@ def home(request):
     ).select_related('category').order_by('display_order', 'category__name')
     
     # Group by period and get current schedules
-    category_sections = []
-    for schedule in active_schedules:
-        if schedule.is_current():
-            category = schedule.category
-            if not category.is_active:
-                continue
-            
-            # Get products for this category (optimized with select_related)
-            products = Product.objects.filter(
-                category=category,
-                is_active=True
-            ).select_related('vendor', 'category').annotate(
-                avg_rating=Avg('reviews__rating'),
-                review_total=Count('reviews', distinct=True)
-            ).order_by('-created_at')[:12]
-            
-            if products.exists():
-                category_sections.append({
-                    'category': category,
-                    'schedule': schedule,
-                    'products': products,
-                    'header': category.display_header or category.name,
-                    'tagline': category.display_tagline or category.description or '',
-                })
+    sections = [
+        (schedule.category, schedule) for schedule in active_schedules
+        if schedule.is_current() and schedule.category.is_active
+    ]
+    category_sections = _category_sections(sections)
     
     # If no scheduled categories, show all active categories with products
     if not category_sections:
         categories = Category.objects.filter(is_active=True).order_by('tier', 'name')
-        for category in categories:
-            products = Product.objects.filter(
-                category=category,
-                is_active=True
-            ).select_related('vendor', 'category').annotate(
-                avg_rating=Avg('reviews__rating'),
-                review_total=Count('reviews', distinct=True)
-            ).order_by('-created_at')[:12]
-            
-            if products.exists():
-                category_sections.append({
-                    'category': category,
-                    'schedule': None,
-                    'products': products,
-                    'header': category.display_header or category.name,
-                    'tagline': category.display_tagline or category.description or '',
-                })
+        category_sections = _category_sections([(category, None) for category in categories])
     
     # Premium Picks - Get premium tier products (optimized)
     premium_products = Product.objects.filter(
@@ -156,6 +165,7 @@ def home(request):
     return render(request, 'store/index.html', context)
 
 
+@edge_cache('brand-stories')
 def brand_stories(request):
     # Get vendor profiles that have published brand stories (description published)
     brands = VendorProfile.objects.filter(
@@ -168,21 +178,30 @@ def brand_stories(request):
     return render(request, 'store/brand_stories.html', context)
 
 
+def _record_product_view(request, product):
+    customer = request.user if request.user.is_authenticated and request.user.user_type == 'CUSTOMER' else None
+    ip_address = request.META.get('REMOTE_ADDR')
+    track_product_view(product, customer=customer, session_key=request.session.session_key, ip_address=ip_address)
+    
+    # Count a click for the product's active promotion (buffered in Redis)
+    active_promotion = product.get_active_promotion()
+    if active_promotion:
+        record_promotion_click(request, active_promotion)
+
+
+@query_budget(28)
+@edge_cache('products')
 def product_detail(request, slug):
     """
     Product detail page with recommendations
     """
     product = get_object_or_404(Product, slug=slug, is_active=True)
-    
-    # Track product view
     customer = request.user if request.user.is_authenticated and request.user.user_type == 'CUSTOMER' else None
-    session_key = request.session.session_key
-    if not session_key:
-        request.session.create()
-        session_key = request.session.session_key
     
-    ip_address = request.META.get('REMOTE_ADDR')
-    track_product_view(product, customer=customer, session_key=session_key, ip_address=ip_address)
+    # Track product view; anonymous views are posted by the page (product_viewed),
+    # so they are counted even when nginx serves it from its cache
+    if request.user.is_authenticated:
+        _record_product_view(request, product)
     
     # Get product with annotations
     product = Product.objects.filter(id=product.id).annotate(
@@ -267,9 +286,33 @@ def product_detail(request, slug):
         'show_back_in_stock': show_back_in_stock,
     }
     
-    return render(request, 'store/product_detail.html', context)
+    response = render(request, 'store/product_detail.html', context)
+    return add_surrogate_keys(response, f'product-{product.pk}', f'vendor-{product.vendor_id}')
 
 
+@csrf_exempt  # Sent with sendBeacon from cached pages; only records a view
+@require_POST
+def product_viewed(request, product_id):
+    """
+    Record an anonymous product page view (posted by the product page)
+    """
+    product = get_object_or_404(Product, id=product_id, is_active=True)
+    if not request.user.is_authenticated:
+        _record_product_view(request, product)
+    return HttpResponse(status=204)
+
+
+@ensure_csrf_cookie
+def csrf_cookie(request):
+    """
+    Set the CSRF cookie for browsers that only got cached pages so far (see base.html)
+    """
+    response = HttpResponse(status=204)
+    add_never_cache_headers(response)
+    return response
+
+
+@edge_cache()
 def vendor_profile_public(request, vendor_id):
     """
     Public vendor profile page showing ratings, badges, and products
@@ -327,7 +370,8 @@ def vendor_profile_public(request, vendor_id):
         'is_vendor_subscribed': is_vendor_subscribed,
     }
     
-    return render(request, 'store/vendor_profile.html', context)
+    response = render(request, 'store/vendor_profile.html', context)
+    return add_surrogate_keys(response, f'vendor-{vendor.pk}')
 
 
 def _calculate_delivery_fee(vendor_profile, city, distance):
@@ -363,6 +407,7 @@ def _calculate_delivery_fee(vendor_profile, city, distance):
     return fee
 
 
+@query_budget(13)
 @login_required
 def checkout(request):
     """
@@ -408,23 +453,40 @@ def checkout(request):
         })
         group['subtotal'] += product.price * item.quantity
     
+    # Payment options, profiles and delivery zones of every vendor in the cart
+    vendor_ids = [group['vendor'].id for group in vendor_groups.values() if group['vendor']]
+    vendor_options = {}
+    for option in VendorPaymentOption.objects.filter(vendor_id__in=vendor_ids):
+        vendor_options.setdefault(option.vendor_id, []).append(option)
+    vendor_profiles = {
+        profile.vendor_id: profile for profile in VendorProfile.objects.filter(vendor_id__in=vendor_ids)
+    }
+    vendor_zones = {}
+    for zone in VendorDeliveryZone.objects.filter(
+        vendor_id__in=vendor_ids,
+        is_active=True,
+        fee__isnull=False
+    ).order_by('city'):
+        vendor_zones.setdefault(zone.vendor_id, []).append(zone)
+    
     # Attach payment options and delivery settings
     for key, group in vendor_groups.items():
         vendor = group['vendor']
         payment_options = []
         if vendor:
-            options_qs = VendorPaymentOption.objects.filter(vendor=vendor, is_enabled=True)
-            if not options_qs.exists():
+            options = vendor_options.get(vendor.id, [])
+            enabled_options = [option for option in options if option.is_enabled]
+            if not enabled_options:
                 # Fallback to COD if vendor has not configured options
-                options_qs = VendorPaymentOption.objects.filter(vendor=vendor, payment_type='CASH_ON_DELIVERY')
-                if not options_qs.exists():
-                    VendorPaymentOption.objects.update_or_create(
+                enabled_options = [option for option in options if option.payment_type == 'CASH_ON_DELIVERY']
+                if not enabled_options:
+                    option, _ = VendorPaymentOption.objects.update_or_create(
                         vendor=vendor,
                         payment_type='CASH_ON_DELIVERY',
                         defaults={'is_enabled': True}
                     )
-                    options_qs = VendorPaymentOption.objects.filter(vendor=vendor, payment_type='CASH_ON_DELIVERY')
-            for option in options_qs:
+                    enabled_options = [option]
+            for option in enabled_options:
                 payment_options.append({
                     'code': option.payment_type,
                     'label': option.get_payment_type_display(),
@@ -432,7 +494,7 @@ def checkout(request):
                     'merchant_name': option.merchant_name,
                     'instructions': option.instructions,
                 })
-            vendor_profile = VendorProfile.objects.filter(vendor=vendor).first()
+            vendor_profile = vendor_profiles.get(vendor.id)
         else:
             payment_options.append({
                 'code': 'CASH_ON_DELIVERY',
@@ -486,12 +548,7 @@ def checkout(request):
                     'requires_custom': False,
                     'requires_map': False,
                 })
-            city_zones = VendorDeliveryZone.objects.filter(
-                vendor=vendor,
-                is_active=True,
-                fee__isnull=False
-            ).order_by('city')
-            for zone in city_zones:
+            for zone in vendor_zones.get(vendor.id, []):
                 delivery_options.append({
                     'code': f'CITY_{zone.city}',
                     'label': zone.get_city_display(),
@@ -868,6 +925,7 @@ def product_search(request):
     vendor_id = request.GET.get('vendor', '')
     min_price = request.GET.get('min_price', '')
     max_price = request.GET.get('max_price', '')
+    price_below = request.GET.get('price_below', '')  # Exclusive bound, set by the price bucket links
     local_materials = request.GET.get('local_materials', '')
     min_rating = request.GET.get('min_rating', '')
     sort_by = request.GET.get('sort', 'newest')  # newest, price_low, price_high, popularity, rating
@@ -914,6 +972,12 @@ def product_search(request):
         except ValueError:
             pass
     
+    if price_below:
+        try:
+            products = products.filter(price__lt=float(price_below))
+        except ValueError:
+            pass
+    
     if local_materials == 'true':
         products = products.filter(is_made_from_local_materials=True)
     
@@ -924,6 +988,32 @@ def product_search(request):
         except ValueError:
             pass
     
+    # Get filter options (query independent, cached) and counts for this result set
+    global_facets = get_global_facets()
+    result_facets = get_result_facets(products)
+    
+    categories = [
+        dict(category, count=result_facets['categories'].get(category['id'], 0))
+        for category in global_facets['categories']
+    ]
+    vendors = [
+        dict(vendor, count=result_facets['vendors'].get(vendor['id'], 0))
+        for vendor in global_facets['vendors']
+    ]
+    price_range = global_facets['price_range']
+    
+    price_buckets = []
+    for bucket in result_facets['price_buckets']:
+        params = request.GET.copy()
+        params['min_price'] = bucket['min_price']
+        # Buckets are half-open, [min_price, max_price), like their counts
+        params.pop('max_price', None)
+        if bucket['max_price'] is None:
+            params.pop('price_below', None)
+        else:
+            params['price_below'] = bucket['max_price']
+        price_buckets.append(dict(bucket, querystring=params.urlencode()))
+    
     # Apply sorting
     if sort_by == 'price_low':
         products = products.order_by('price')
@@ -939,22 +1029,8 @@ def product_search(request):
     else:  # newest (default)
         products = products.order_by('-created_at')
     
-    # Get filter options
-    categories = Category.objects.all().order_by('name')
-    vendors = User.objects.filter(
-        user_type='VENDOR',
-        products__is_active=True
-    ).distinct().order_by('username')
-    
-    # Calculate price range for filter (from all active products, not filtered)
-    all_products = Product.objects.filter(is_active=True)
-    price_range = all_products.aggregate(
-        min_price=Min('price'),
-        max_price=Max('price')
-    )
-    
     # Get results count before pagination
-    results_count = products.count()
+    results_count = result_facets['total']
     
     # Track search in analytics
     if query:
@@ -983,10 +1059,13 @@ def product_search(request):
         'selected_vendor': vendor_id,
         'min_price_filter': min_price,
         'max_price_filter': max_price,
+        'price_below_filter': price_below,
         'local_materials_filter': local_materials,
         'min_rating_filter': min_rating,
         'sort_by': sort_by,
         'price_range': price_range,
+        'price_buckets': price_buckets,
+        'local_materials_count': result_facets['local_materials'],
         'results_count': results_count,
     }
     
@@ -1021,16 +1100,19 @@ def search_autocomplete(request):
     })
 
 
+@edge_cache('trending')
 def trending_products(request):
     """
-    Get trending products based on search analytics
+    Trending products, overall or within a category (?category=<slug>)
     """
-    from orders.models import OrderItem
-    # Get products with highest search count and reviews
-    trending = get_trending_products(limit=20)
+    category = None
+    if request.GET.get('category'):
+        category = get_object_or_404(Category, slug=request.GET['category'], is_active=True)
+    trending = get_trending_products(limit=20, category=category)
     
     context = {
         'trending_products': trending,
+        'category': category,
     }
     return render(request, 'store/trending.html', context)
 
@@ -1087,13 +1169,52 @@ def track_social_share(request):
     return JsonResponse({'success': True, 'share_id': share.id})
 
 
-@login_required
+@csrf_exempt  # Sent with sendBeacon from cached pages; only buffers counters
+@require_POST
+def track_promotion_views(request):
+    """
+    Record impressions of promoted product cards (sent in batches by the browser)
+    Each item is "<promotion_id>:<product_id>"
+    """
+    items = []
+    for item in request.POST.getlist('items')[:50]:
+        try:
+            promotion_id, product_id = (int(part) for part in item.split(':'))
+        except ValueError:
+            return JsonResponse({'error': 'Invalid item'}, status=400)
+        items.append((promotion_id, product_id))
+    
+    if not items:
+        return JsonResponse({'error': 'Missing required parameters'}, status=400)
+    
+    record_promotion_views(request, items)
+    return JsonResponse({'success': True})
+
+
+def _cart_response(summary, **extra):
+    """JSON body shared by the cart AJAX views"""
+    return JsonResponse({
+        'success': True,
+        'cart_item_count': summary['item_count'],
+        'cart_total': str(summary['total']),
+        'cart_promotional_total': str(summary['promotional_total']),
+        **extra,
+    })
+
+
+def _parse_quantity(request):
+    try:
+        return max(int(request.POST.get('quantity', 1)), 1)
+    except (ValueError, TypeError):
+        return None
+
+
 @require_POST
 def add_to_cart(request, product_id):
     """
-    Add a product to the customer's cart
+    Add a product to the customer's cart (or the guest cart when not logged in)
     """
-    if request.user.user_type != 'CUSTOMER':
+    if request.user.is_authenticated and request.user.user_type != 'CUSTOMER':
         return JsonResponse({'error': 'Only customers can add items to cart'}, status=403)
     
     product = get_object_or_404(Product, id=product_id, is_active=True)
@@ -1102,17 +1223,22 @@ def add_to_cart(request, product_id):
     if product.track_inventory and product.stock_quantity <= 0:
         return JsonResponse({'error': 'Product is out of stock'}, status=400)
     
+    # Get quantity from request (default to 1)
+    quantity = _parse_quantity(request) or 1
+    
+    if not request.user.is_authenticated:
+        # Guest carts live in Redis until login
+        new_quantity = guest_cart.get_quantity(request, product.pk) + quantity
+        if product.track_inventory and new_quantity > product.stock_quantity:
+            return JsonResponse({
+                'error': f'Only {product.stock_quantity} items available in stock'
+            }, status=400)
+        guest_cart.add_item(request, product.pk, quantity)
+        return _cart_response(guest_cart.get_summary(request), message=f'{product.name} added to cart')
+    
     # Get or create cart
     cart, created = Cart.objects.get_or_create(customer=request.user)
     
-    # Get quantity from request (default to 1)
-    try:
-        quantity = int(request.POST.get('quantity', 1))
-        if quantity < 1:
-            quantity = 1
-    except (ValueError, TypeError):
-        quantity = 1
-    
     # Check if item already in cart
     cart_item, item_created = CartItem.objects.get_or_create(
         cart=cart,
@@ -1130,19 +1256,21 @@ def add_to_cart(request, product_id):
         cart_item.quantity = new_quantity
         cart_item.save()
     
-    return JsonResponse({
-        'success': True,
-        'message': f'{product.name} added to cart',
-        'cart_item_count': cart.item_count,
-        'cart_total': str(cart.total)
-    })
+    return _cart_response(get_cart_summary(request.user.pk), message=f'{product.name} added to cart')
 
 
-@login_required
 def view_cart(request):
     """
-    View the customer's shopping cart
+    View the customer's (or guest's) shopping cart
     """
+    if not request.user.is_authenticated:
+        context = {
+            'cart_items': guest_cart.get_items(request),
+            'summary': guest_cart.get_summary(request),
+            'is_guest': True,
+        }
+        return render(request, 'store/cart.html', context)
+    
     if request.user.user_type != 'CUSTOMER':
         messages.error(request, 'Only customers can view their cart.')
         return redirect('home')
@@ -1153,64 +1281,68 @@ def view_cart(request):
     context = {
         'cart': cart,
         'cart_items': cart_items,
+        # Recomputed here so the cart page always shows current prices
+        'summary': get_cart_summary(request.user.pk, refresh=True),
     }
     return render(request, 'store/cart.html', context)
 
 
-@login_required
 @require_POST
 def remove_from_cart(request, item_id):
     """
-    Remove an item from the cart
+    Remove an item from the cart (guest cart items are identified by product id)
     """
+    if not request.user.is_authenticated:
+        if not guest_cart.remove_item(request, item_id):
+            return JsonResponse({'error': 'Item not in cart'}, status=404)
+        return _cart_response(guest_cart.get_summary(request), message='Item removed from cart')
+    
     if request.user.user_type != 'CUSTOMER':
         return JsonResponse({'error': 'Access denied'}, status=403)
     
-    cart_item = get_object_or_404(CartItem, id=item_id, cart__customer=request.user)
+    cart_item = get_object_or_404(
+        CartItem.objects.select_related('cart', 'product'), id=item_id, cart__customer=request.user
+    )
     product_name = cart_item.product.name
     cart_item.delete()
     
-    cart = Cart.objects.get(customer=request.user)
-    return JsonResponse({
-        'success': True,
-        'message': f'{product_name} removed from cart',
-        'cart_item_count': cart.item_count,
-        'cart_total': str(cart.total)
-    })
+    return _cart_response(get_cart_summary(request.user.pk), message=f'{product_name} removed from cart')
 
 
-@login_required
 @require_POST
 def update_cart_item(request, item_id):
     """
-    Update the quantity of a cart item
+    Update the quantity of a cart item (guest cart items are identified by product id)
     """
-    if request.user.user_type != 'CUSTOMER':
+    if request.user.is_authenticated and request.user.user_type != 'CUSTOMER':
         return JsonResponse({'error': 'Access denied'}, status=403)
     
-    cart_item = get_object_or_404(CartItem, id=item_id, cart__customer=request.user)
-    
-    try:
-        quantity = int(request.POST.get('quantity', 1))
-        if quantity < 1:
-            quantity = 1
-    except (ValueError, TypeError):
+    quantity = _parse_quantity(request)
+    if quantity is None:
         return JsonResponse({'error': 'Invalid quantity'}, status=400)
     
+    if not request.user.is_authenticated:
+        if not guest_cart.get_quantity(request, item_id):
+            return JsonResponse({'error': 'Item not in cart'}, status=404)
+        product = get_object_or_404(Product, id=item_id, is_active=True)
+    else:
+        cart_item = get_object_or_404(
+            CartItem.objects.select_related('cart', 'product'), id=item_id, cart__customer=request.user
+        )
+        product = cart_item.product
+    
     # Check stock availability
-    if cart_item.product.track_inventory and quantity > cart_item.product.stock_quantity:
+    if product.track_inventory and quantity > product.stock_quantity:
         return JsonResponse({
-            'error': f'Only {cart_item.product.stock_quantity} items available in stock'
+            'error': f'Only {product.stock_quantity} items available in stock'
         }, status=400)
     
-    cart_item.quantity = quantity
-    cart_item.save()
+    if not request.user.is_authenticated:
+        guest_cart.set_quantity(request, product.pk, quantity)
+        summary = guest_cart.get_summary(request)
+    else:
+        cart_item.quantity = quantity
+        cart_item.save()
+        summary = get_cart_summary(request.user.pk)
     
-    cart = Cart.objects.get(customer=request.user)
-    return JsonResponse({
-        'success': True,
-        'message': 'Cart updated',
-        'cart_item_count': cart.item_count,
-        'cart_total': str(cart.total),
-        'item_subtotal': str(cart_item.subtotal)
-    })
+    return _cart_response(summary, message='Cart updated', item_subtotal=str(product.price * quantity))
@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from accounts import numbering
 
 User = get_user_model()
 
@@ -199,11 +200,8 @@ class RawMaterialPurchase(models.Model):
         return f"{self.purchase_number} - {self.vendor.username}"
     
     def save(self, *args, **kwargs):
-        if not self.purchase_number:
-            from django.utils import timezone
-            timestamp = timezone.now().strftime('%Y%m%d%H%M%S')
-            self.purchase_number = f"RMP-{self.vendor.id}-{timestamp}"
-        super().save(*args, **kwargs)
+        with numbering.numbered(self, 'purchase_number', numbering.RAW_MATERIAL_PURCHASE, self.vendor_id):
+            super().save(*args, **kwargs)
 
 
 class RawMaterialInquiry(models.Model):
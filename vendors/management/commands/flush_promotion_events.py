@@ -0,0 +1,13 @@
+"""
+Management command to flush buffered promotion events (run every few minutes from cron)
+"""
+from django.core.management.base import BaseCommand
+from vendors.promotion_events import flush_promotion_events
+
+
+class Command(BaseCommand):
+    help = 'Write buffered promotion views, clicks and sales from Redis to PromotionAnalytics'
+
+    def handle(self, *args, **options):
+        promotions = flush_promotion_events()
+        self.stdout.write(self.style.SUCCESS(f'Flushed promotion events for {promotions} promotions'))
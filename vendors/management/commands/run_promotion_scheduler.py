@@ -0,0 +1,14 @@
+"""
+Management command to advance promotion statuses (run every few minutes from cron)
+"""
+from django.core.management.base import BaseCommand
+from vendors.promotion_scheduler import run_promotion_schedule
+
+
+class Command(BaseCommand):
+    help = 'Activate, expire and pause promotions by date and send ending-soon notifications'
+
+    def handle(self, *args, **options):
+        changed, notified = run_promotion_schedule()
+        summary = ', '.join(f'{count} {status.lower()}' for status, count in changed.items())
+        self.stdout.write(self.style.SUCCESS(f'Promotions updated ({summary}); {notified} ending-soon notifications sent'))
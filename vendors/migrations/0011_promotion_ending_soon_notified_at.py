@@ -0,0 +1,18 @@
+# Generated by Django 4.2.25 on 2026-10-19 00:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendors', '0010_promotion_productpromotion_promotionanalytics_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='promotion',
+            name='ending_soon_notified_at',
+            field=models.DateTimeField(blank=True, help_text='When the ending-soon event was sent', null=True),
+        ),
+    ]
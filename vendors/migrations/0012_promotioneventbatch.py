@@ -0,0 +1,21 @@
+# Generated by Django 4.2.25 on 2026-10-19 02:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendors', '0011_promotion_ending_soon_notified_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PromotionEventBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('batch_id', models.CharField(max_length=64, unique=True)),
+                ('applied_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
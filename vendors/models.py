@@ -3,6 +3,7 @@ from django.contrib.auth import get_user_model
 from django.db.models import Avg, Count, Sum
 from decimal import Decimal
 from datetime import timedelta
+from accounts import numbering
 
 User = get_user_model()
 
@@ -618,13 +619,9 @@ class SaleReceipt(models.Model):
         return f"Receipt {self.receipt_number} - {self.customer_name}"
     
     def save(self, *args, **kwargs):
-        if not self.receipt_number:
-            # Generate receipt number
-            from django.utils import timezone
-            timestamp = timezone.now().strftime('%Y%m%d%H%M%S')
-            vendor_id = self.vendor.id
-            self.receipt_number = f"RCP-{vendor_id}-{timestamp}"
-        super().save(*args, **kwargs)
+        # Gap-free per-vendor receipt number (fiscal requirement)
+        with numbering.numbered(self, 'receipt_number', numbering.SALE_RECEIPT, self.vendor_id):
+            super().save(*args, **kwargs)
 
 
 class SaleReceiptItem(models.Model):
@@ -754,12 +751,8 @@ class VendorInvoice(models.Model):
         return self.total_amount - self.amount_paid
     
     def save(self, *args, **kwargs):
-        if not self.invoice_number:
-            from django.utils import timezone
-            timestamp = timezone.now().strftime('%Y%m%d%H%M%S')
-            vendor_id = self.vendor.id
-            self.invoice_number = f"INV-{vendor_id}-{timestamp}"
-        super().save(*args, **kwargs)
+        with numbering.numbered(self, 'invoice_number', numbering.VENDOR_INVOICE, self.vendor_id):
+            super().save(*args, **kwargs)
 
 
 class VendorInvoiceItem(models.Model):
@@ -874,4 +867,4 @@ class VendorDiscussionReply(models.Model):
 
 
 # Import promotion models
-from .promotions_models import Promotion, ProductPromotion, PromotionAnalytics
+from .promotions_models import Promotion, ProductPromotion, PromotionAnalytics, PromotionEventBatch
@@ -0,0 +1,282 @@
+"""
+Promotion event tracking
+
+Impressions, clicks and sales of promoted products are counted in Redis
+(one hash per day, HyperLogLog for unique visitors) so rendering a product
+card never writes to the database. flush_promotion_events() periodically
+moves the buffered counts into PromotionAnalytics with an upsert and rolls
+them up into the Promotion and ProductPromotion counters.
+"""
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.utils import timezone
+from django_redis import get_redis_connection
+from redis.exceptions import LockError
+from .models import Promotion, ProductPromotion, PromotionAnalytics, PromotionEventBatch
+
+EVENT_VIEW = 'view'
+EVENT_CLICK = 'click'
+EVENT_SALE = 'sale'
+EVENT_TYPES = (EVENT_VIEW, EVENT_CLICK, EVENT_SALE)
+
+DAYS_KEY = 'mushanai:promo:days'
+EVENTS_KEY = 'mushanai:promo:events:{}'
+VISITORS_KEY = 'mushanai:promo:uv:{}:{}'
+SALE_SEEN_KEY = 'mushanai:promo:sale:{}'
+BATCH_KEY = 'mushanai:promo:batch:{}:{}'
+BATCHES_KEY = 'mushanai:promo:batches'
+FLUSH_LOCK_KEY = 'mushanai:promo:flush-lock'
+
+BUFFER_TTL = 60 * 60 * 24 * 3
+SALE_SEEN_TTL = 60 * 60 * 24 * 30
+FLUSH_LOCK_TTL = 60 * 10
+
+
+def _redis():
+    return get_redis_connection('default')
+
+
+def _visitor_id(request):
+    if request.user.is_authenticated:
+        return f'u{request.user.pk}'
+    if request.session.session_key:
+        return f's{request.session.session_key}'
+    return f"ip{request.META.get('REMOTE_ADDR', '')}:{request.META.get('HTTP_USER_AGENT', '')[:100]}"
+
+
+def record_events(events, visitor=None, day=None):
+    """
+    Buffer events in Redis.
+    events: iterable of (event_type, promotion_id, product_id[, revenue])
+    """
+    day = (day or timezone.localdate()).isoformat()
+    events_key = EVENTS_KEY.format(day)
+    pipe = _redis().pipeline(transaction=False)
+    promotion_ids = set()
+    for event in events:
+        event_type, promotion_id, product_id = event[:3]
+        pipe.hincrby(events_key, f'{promotion_id}:{product_id}:{event_type}', 1)
+        if event_type == EVENT_SALE and len(event) > 3:
+            cents = int((Decimal(event[3]) * 100).to_integral_value())
+            pipe.hincrby(events_key, f'{promotion_id}:{product_id}:revenue', cents)
+        promotion_ids.add(promotion_id)
+    if not promotion_ids:
+        return
+    if visitor:
+        for promotion_id in promotion_ids:
+            visitors_key = VISITORS_KEY.format(day, promotion_id)
+            pipe.pfadd(visitors_key, visitor)
+            pipe.expire(visitors_key, BUFFER_TTL)
+    pipe.expire(events_key, BUFFER_TTL)
+    pipe.sadd(DAYS_KEY, day)
+    pipe.execute()
+
+
+def record_views(request, items):
+    """Promoted product cards were shown; items are (promotion_id, product_id) pairs"""
+    record_events(
+        [(EVENT_VIEW, promotion_id, product_id) for promotion_id, product_id in items],
+        visitor=_visitor_id(request),
+    )
+
+
+def record_click(request, product_promotion):
+    """A shopper opened a promoted product"""
+    record_events(
+        [(EVENT_CLICK, product_promotion.promotion_id, product_promotion.product_id)],
+        visitor=_visitor_id(request),
+    )
+
+
+def record_order_sales(order):
+    """
+    Count promoted items of a paid order as sales. Each order is only
+    counted once, however often it is saved.
+    """
+    items = list(order.items.select_related('product').filter(product__isnull=False))
+    if not items or not _redis().set(SALE_SEEN_KEY.format(order.pk), 1, nx=True, ex=SALE_SEEN_TTL):
+        return 0
+    events = []
+    for item in items:
+        link = item.product.get_active_promotion()
+        if link:
+            events.append((EVENT_SALE, link.promotion_id, link.product_id, item.subtotal))
+    record_events(events, visitor=f'u{order.customer_id}' if order.customer_id else None)
+    return len(events)
+
+
+def _parse_counts(raw):
+    """Redis hash -> {(promotion_id, product_id): {event: count}}"""
+    counts = {}
+    for field, value in raw.items():
+        promotion_id, product_id, event = field.decode().split(':')
+        row = counts.setdefault((int(promotion_id), int(product_id)), dict.fromkeys(EVENT_TYPES + ('revenue',), 0))
+        row[event] = int(value)
+    return counts
+
+
+UPSERT_ANALYTICS_SQL = """
+    INSERT INTO vendors_promotionanalytics
+        (promotion_id, date, views, clicks, sales, revenue, unique_visitors, created_at)
+    VALUES {values}
+    ON CONFLICT (promotion_id, date) DO UPDATE SET
+        views = vendors_promotionanalytics.views + EXCLUDED.views,
+        clicks = vendors_promotionanalytics.clicks + EXCLUDED.clicks,
+        sales = vendors_promotionanalytics.sales + EXCLUDED.sales,
+        revenue = vendors_promotionanalytics.revenue + EXCLUDED.revenue,
+        unique_visitors = GREATEST(vendors_promotionanalytics.unique_visitors, EXCLUDED.unique_visitors)
+"""
+
+INCREMENT_PRODUCT_PROMOTIONS_SQL = """
+    UPDATE vendors_productpromotion AS pp SET
+        view_count = pp.view_count + v.views,
+        click_count = pp.click_count + v.clicks,
+        sales_count = pp.sales_count + v.sales,
+        revenue = pp.revenue + v.revenue
+    FROM (VALUES {values}) AS v (promotion_id, product_id, views, clicks, sales, revenue)
+    WHERE pp.promotion_id = v.promotion_id AND pp.product_id = v.product_id
+"""
+
+
+def _flush_day(day, counts, visitors):
+    """Write one day's buffered counts to the database"""
+    totals = {}
+    for (promotion_id, _), row in counts.items():
+        total = totals.setdefault(promotion_id, dict.fromkeys(EVENT_TYPES + ('revenue',), 0))
+        for event, value in row.items():
+            total[event] += value
+
+    now = timezone.now()
+    analytics_rows = [
+        (promotion_id, day, t[EVENT_VIEW], t[EVENT_CLICK], t[EVENT_SALE],
+         Decimal(t['revenue']) / 100, visitors.get(promotion_id, 0), now)
+        for promotion_id, t in totals.items()
+    ]
+    product_rows = [
+        (promotion_id, product_id, row[EVENT_VIEW], row[EVENT_CLICK], row[EVENT_SALE], Decimal(row['revenue']) / 100)
+        for (promotion_id, product_id), row in counts.items()
+    ]
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            UPSERT_ANALYTICS_SQL.format(values=', '.join(['(%s, %s, %s, %s, %s, %s, %s, %s)'] * len(analytics_rows))),
+            [value for row in analytics_rows for value in row]
+        )
+        cursor.execute(
+            INCREMENT_PRODUCT_PROMOTIONS_SQL.format(
+                values=', '.join(['(%s::bigint, %s::bigint, %s::int, %s::int, %s::int, %s::numeric)'] * len(product_rows))
+            ),
+            [value for row in product_rows for value in row]
+        )
+
+
+def _rollup_promotions(promotion_ids):
+    """Recompute lifetime Promotion counters from their daily analytics"""
+    rows = PromotionAnalytics.objects.filter(promotion_id__in=promotion_ids).order_by().values(
+        'promotion'
+    ).annotate(views=Sum('views'), clicks=Sum('clicks'), sales=Sum('sales'), revenue=Sum('revenue'))
+    promotions = []
+    for row in rows:
+        promotion = Promotion(pk=row['promotion'])
+        promotion.view_count = row['views']
+        promotion.click_count = row['clicks']
+        promotion.conversion_count = row['sales']
+        promotion.total_revenue = row['revenue']
+        promotions.append(promotion)
+    Promotion.objects.bulk_update(
+        promotions, ['view_count', 'click_count', 'conversion_count', 'total_revenue'], batch_size=500
+    )
+
+
+def _start_batch(redis, key, day):
+    """Rename a day's hash to a new batch and register it, atomically"""
+    batch_key = BATCH_KEY.format(day, uuid.uuid4().hex)
+    pipe = redis.pipeline()
+    pipe.rename(key, batch_key)
+    pipe.sadd(BATCHES_KEY, batch_key)
+    pipe.execute()
+
+
+def _flush_batch(redis, batch_key):
+    """
+    Apply one renamed batch hash, at most once: the batch id is recorded in
+    the same transaction as its counts, and a batch already recorded (the
+    previous run died before deleting the hash) is only cleaned up.
+    Returns the promotion ids whose counters need rolling up.
+    """
+    day, batch_id = batch_key.rsplit(':', 2)[-2:]
+    counts = _parse_counts(redis.hgetall(batch_key))
+    # Ignore pairs that aren't (or are no longer) linked; views come from the browser
+    valid_links = set(ProductPromotion.objects.filter(
+        promotion_id__in={promotion_id for promotion_id, _ in counts},
+        product_id__in={product_id for _, product_id in counts},
+    ).values_list('promotion_id', 'product_id'))
+    counts = {key: row for key, row in counts.items() if key in valid_links}
+
+    promotion_ids = sorted({promotion_id for promotion_id, _ in counts})
+    if counts:
+        pipe = redis.pipeline(transaction=False)
+        for promotion_id in promotion_ids:
+            pipe.pfcount(VISITORS_KEY.format(day, promotion_id))
+        visitors = dict(zip(promotion_ids, pipe.execute()))
+        with transaction.atomic():
+            _, created = PromotionEventBatch.objects.get_or_create(batch_id=batch_id)
+            if created:
+                _flush_day(day, counts, visitors)
+
+    _drop_batch(redis, batch_key)
+    return promotion_ids
+
+
+def _drop_batch(redis, batch_key):
+    pipe = redis.pipeline()
+    pipe.delete(batch_key)
+    pipe.srem(BATCHES_KEY, batch_key)
+    pipe.execute()
+
+
+def flush_promotion_events():
+    """
+    Move buffered events into the database. Each day's hash is renamed to a
+    uniquely named batch before it is read, so events recorded during the
+    flush land in a fresh hash for the next run. A Redis lock keeps
+    overlapping runs apart, and batches left over by a failed run are
+    retried first. Returns the number of promotions updated.
+    """
+    redis = _redis()
+    lock = redis.lock(FLUSH_LOCK_KEY, timeout=FLUSH_LOCK_TTL)
+    if not lock.acquire(blocking=False):
+        return 0
+    try:
+        today = timezone.localdate().isoformat()
+        for day in sorted(d.decode() for d in redis.smembers(DAYS_KEY)):
+            events_key = EVENTS_KEY.format(day)
+            # Hash left by a failed run of the previous, unbatched flush
+            if redis.exists(f'{events_key}:flushing'):
+                _start_batch(redis, f'{events_key}:flushing', day)
+            if not redis.exists(events_key):
+                if day < today:
+                    redis.srem(DAYS_KEY, day)
+                continue
+            _start_batch(redis, events_key, day)
+
+        touched = set()
+        for batch_key in sorted(key.decode() for key in redis.smembers(BATCHES_KEY)):
+            touched.update(_flush_batch(redis, batch_key))
+
+        if touched:
+            _rollup_promotions(touched)
+        # Batch hashes expire with the buffer, so older ids can never be retried
+        PromotionEventBatch.objects.filter(
+            applied_at__lt=timezone.now() - timedelta(seconds=2 * BUFFER_TTL)
+        ).delete()
+        return len(touched)
+    finally:
+        try:
+            lock.release()
+        except LockError:
+            # Held past FLUSH_LOCK_TTL; another run may own it now
+            pass
@@ -0,0 +1,117 @@
+"""
+Bulk promotion pricing
+
+ProductPromotion stores original/discounted/savings prices so product
+listings don't recompute them. Products are attached to a promotion with
+one validated query and one INSERT ... ON CONFLICT DO NOTHING RETURNING
+per batch, and stored prices are re-computed
+in memory and written back with one bulk_update whenever a product's price
+or a promotion's discount changes.
+"""
+from decimal import Decimal
+from django.core.cache import cache
+from django.db import connection
+from django.utils import timezone
+from products.models import Product, ACTIVE_PROMOTION_CACHE_KEY
+from .models import ProductPromotion
+
+CENT = Decimal('0.01')
+PRICE_FIELDS = ['original_price', 'discounted_price', 'savings_amount', 'updated_at']
+ATTACH_BATCH_SIZE = 500
+
+# Links added concurrently since the product query are skipped, and only
+# the rows actually inserted come back
+ATTACH_SQL = """
+    INSERT INTO {links} (promotion_id, product_id, original_price, discounted_price, savings_amount,
+                         view_count, click_count, sales_count, revenue, added_at, updated_at)
+    SELECT %s, v.product_id, v.original_price, v.discounted_price, v.savings_amount, 0, 0, 0, 0, %s, %s
+    FROM (VALUES {values}) AS v (product_id, original_price, discounted_price, savings_amount)
+    ON CONFLICT (promotion_id, product_id) DO NOTHING
+    RETURNING product_id
+"""
+
+
+def _apply_prices(link):
+    """Recompute a link's prices in memory. Returns True if they changed."""
+    before = (link.original_price, link.discounted_price, link.savings_amount)
+    link.calculate_prices()
+    # Round like the 2dp columns so unchanged rows compare equal
+    link.original_price = link.original_price.quantize(CENT)
+    link.discounted_price = link.discounted_price.quantize(CENT)
+    link.savings_amount = link.savings_amount.quantize(CENT)
+    return before != (link.original_price, link.discounted_price, link.savings_amount)
+
+
+def _invalidate_products(product_ids):
+    if product_ids:
+        cache.delete_many([ACTIVE_PROMOTION_CACHE_KEY.format(pk) for pk in product_ids])
+
+
+def attach_products(promotion, product_ids, vendor):
+    """
+    Add the vendor's products to a promotion. Products that don't belong to
+    the vendor or are already in the promotion are skipped.
+    Returns the number of products added.
+    """
+    products = Product.objects.filter(pk__in=list(product_ids), vendor=vendor).exclude(
+        promotion_links__promotion=promotion
+    ).only('id', 'price')
+
+    links = []
+    for product in products:
+        link = ProductPromotion(promotion=promotion, product=product)
+        _apply_prices(link)
+        links.append(link)
+
+    now = timezone.now()
+    added = []
+    with connection.cursor() as cursor:
+        for start in range(0, len(links), ATTACH_BATCH_SIZE):
+            batch = links[start:start + ATTACH_BATCH_SIZE]
+            cursor.execute(
+                ATTACH_SQL.format(
+                    links=ProductPromotion._meta.db_table,
+                    values=', '.join(['(%s::bigint, %s::numeric, %s::numeric, %s::numeric)'] * len(batch)),
+                ),
+                [promotion.pk, now, now] + [
+                    value
+                    for link in batch
+                    for value in (link.product_id, link.original_price, link.discounted_price, link.savings_amount)
+                ],
+            )
+            added.extend(product_id for product_id, in cursor.fetchall())
+    _invalidate_products(added)
+    return len(added)
+
+
+def _reprice(links):
+    now = timezone.now()
+    changed = []
+    for link in links:
+        if _apply_prices(link):
+            link.updated_at = now
+            changed.append(link)
+    ProductPromotion.objects.bulk_update(changed, PRICE_FIELDS, batch_size=500)
+    _invalidate_products({link.product_id for link in changed})
+    return len(changed)
+
+
+def reprice_promotion(promotion):
+    """Re-price every product in a promotion (e.g. after its discount changed)"""
+    links = ProductPromotion.objects.filter(promotion=promotion).select_related('product').only(
+        'id', 'product_id', 'original_price', 'discounted_price', 'savings_amount', 'product__price'
+    )
+    for link in links:
+        link.promotion = promotion
+    return _reprice(links)
+
+
+def reprice_products(product_ids):
+    """Re-price the promotions of products whose price changed"""
+    links = ProductPromotion.objects.filter(product_id__in=list(product_ids)).select_related(
+        'product', 'promotion'
+    ).only(
+        'id', 'product_id', 'promotion_id', 'original_price', 'discounted_price', 'savings_amount',
+        'product__price', 'promotion__discount_percentage'
+    )
+    return _reprice(links)
@@ -0,0 +1,112 @@
+"""
+Promotion lifecycle scheduler
+
+Promotion statuses (SCHEDULED -> ACTIVE -> EXPIRED, PAUSED) follow the
+clock, so they are moved by a periodic job rather than on page loads.
+Each transition is one set-based UPDATE; ending-soon events are sent once
+per promotion; cached active promotions are invalidated for the products
+of whatever changed. The set-based UPDATEs send no post_save, so the
+nginx-cached pages showing those products (their product pages, the home
+page and trending) are purged here by surrogate key rather than by the
+store/signals.py receivers.
+"""
+from datetime import timedelta
+from django.core.cache import cache
+from django.db import transaction
+from django.dispatch import Signal
+from django.utils import timezone
+from mushanaicore.edge_cache import purge_now, purging_enabled
+from products.models import ACTIVE_PROMOTION_CACHE_KEY
+from .models import Promotion, ProductPromotion
+
+
+# Sent once per promotion when it has 1-3 days left (receivers get `promotion`)
+promotion_ending_soon = Signal()
+
+ENDING_SOON_MIN = timedelta(days=1)
+ENDING_SOON_MAX = timedelta(days=4)
+
+
+def _transitions(now):
+    """Target status -> promotions that should have it but don't"""
+    enabled = Promotion.objects.filter(is_active=True)
+    return {
+        'PAUSED': Promotion.objects.filter(is_active=False).exclude(status='PAUSED'),
+        'EXPIRED': enabled.filter(end_date__lt=now).exclude(status='EXPIRED'),
+        'SCHEDULED': enabled.filter(start_date__gt=now).exclude(status='SCHEDULED'),
+        'ACTIVE': enabled.filter(start_date__lte=now, end_date__gte=now).exclude(status='ACTIVE'),
+    }
+
+
+def invalidate_promotion_caches(promotion_ids):
+    """Drop cached active promotions for the products in these promotions, returning the product ids"""
+    product_ids = set(
+        ProductPromotion.objects.filter(promotion_id__in=promotion_ids).values_list('product_id', flat=True)
+    )
+    if product_ids:
+        cache.delete_many([ACTIVE_PROMOTION_CACHE_KEY.format(pk) for pk in product_ids])
+    return product_ids
+
+
+def purge_promotion_pages(product_ids):
+    """
+    Refresh the edge-cached pages showing these products' prices. Runs
+    inline rather than through purge_surrogate_keys(): the scheduler is a
+    short-lived cron process that would exit before a daemon purge thread.
+    """
+    if purging_enabled():
+        purge_now(sorted({'storefront', 'trending', *(f'product-{pk}' for pk in product_ids)}))
+
+
+def update_promotion_statuses(now=None):
+    """
+    Move promotions whose dates or active flag no longer match their status.
+    Returns {status: number of promotions moved to it}.
+    """
+    now = now or timezone.now()
+    changed = {}
+    changed_ids = []
+    with transaction.atomic():
+        for status, queryset in _transitions(now).items():
+            ids = list(queryset.values_list('pk', flat=True))
+            if ids:
+                Promotion.objects.filter(pk__in=ids).update(status=status, updated_at=now)
+                changed_ids.extend(ids)
+            changed[status] = len(ids)
+
+    if changed_ids:
+        purge_promotion_pages(invalidate_promotion_caches(changed_ids))
+    return changed
+
+
+def send_ending_soon_events(now=None):
+    """
+    Send promotion_ending_soon for active promotions with 1-3 days left that
+    have not been notified yet. Rows are claimed with SKIP LOCKED, so
+    overlapping runs never notify twice. Returns the number of events sent.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        due = list(Promotion.objects.select_for_update(skip_locked=True, of=('self',)).filter(
+            status='ACTIVE',
+            is_active=True,
+            ending_soon_notified_at__isnull=True,
+            end_date__gte=now + ENDING_SOON_MIN,
+            end_date__lt=now + ENDING_SOON_MAX,
+        ).select_related('vendor'))
+        if not due:
+            return 0
+        Promotion.objects.filter(pk__in=[p.pk for p in due]).update(ending_soon_notified_at=now)
+
+    for promotion in due:
+        promotion.ending_soon_notified_at = now
+        promotion_ending_soon.send(sender=Promotion, promotion=promotion)
+    return len(due)
+
+
+def run_promotion_schedule(now=None):
+    """Status transitions followed by ending-soon events"""
+    now = now or timezone.now()
+    changed = update_promotion_statuses(now)
+    notified = send_ending_soon_events(now)
+    return changed, notified
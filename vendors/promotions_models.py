@@ -68,6 +68,8 @@ class Promotion(models.Model):
     # Status
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='DRAFT')
     is_active = models.BooleanField(default=True, help_text='Manual toggle to activate/deactivate')
+    ending_soon_notified_at = models.DateTimeField(null=True, blank=True,
+                                                   help_text='When the ending-soon event was sent')
     
     # Display Options
     show_badge = models.BooleanField(default=True, help_text='Show promotion badge on products')
@@ -290,3 +292,15 @@ class PromotionAnalytics(models.Model):
     def __str__(self):
         return f"{self.promotion.name} - {self.date}"
 
+
+class PromotionEventBatch(models.Model):
+    """
+    A batch of buffered promotion events already written to
+    PromotionAnalytics, so a retried flush never adds the same counts twice
+    """
+    batch_id = models.CharField(max_length=64, unique=True)
+    applied_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return self.batch_id
+
@@ -0,0 +1,48 @@
+"""
+Vendor Signals
+Keep promotion prices and cached product promotions in sync
+"""
+from django.core.cache import cache
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+from products.models import ACTIVE_PROMOTION_CACHE_KEY
+from .models import ProductPromotion
+from .promotion_events import record_order_sales
+from .promotion_pricing import reprice_promotion, reprice_products
+from .promotion_scheduler import invalidate_promotion_caches
+
+
+@receiver(post_save, sender='vendors.Promotion')
+@receiver(pre_delete, sender='vendors.Promotion')
+def on_promotion_changed(sender, instance, **kwargs):
+    """Invalidate cached promotions for every product in the promotion"""
+    invalidate_promotion_caches([instance.pk])
+
+
+@receiver(post_save, sender='vendors.Promotion')
+def on_promotion_saved(sender, instance, created, **kwargs):
+    """Re-price the promotion's products in case the discount changed"""
+    if not created:
+        reprice_promotion(instance)
+
+
+@receiver(post_save, sender='products.Product')
+def on_product_saved(sender, instance, created, **kwargs):
+    """Re-price the product's promotions when its price changed"""
+    if not created and ProductPromotion.objects.filter(product=instance).exclude(
+        original_price=instance.price
+    ).exists():
+        reprice_products([instance.pk])
+
+
+@receiver([post_save, post_delete], sender='vendors.ProductPromotion')
+def on_product_promotion_changed(sender, instance, **kwargs):
+    """Invalidate the cached promotion for one product"""
+    cache.delete(ACTIVE_PROMOTION_CACHE_KEY.format(instance.product_id))
+
+
+@receiver(post_save, sender='orders.Order')
+def on_order_paid(sender, instance, **kwargs):
+    """Count promoted items as promotion sales once the order is paid"""
+    if instance.payment_status == 'PAID':
+        record_order_sales(instance)
@@ -0,0 +1,122 @@
+"""
+Test promotion event tracking
+"""
+import pytest
+from decimal import Decimal
+from django.urls import reverse
+from django.utils import timezone
+from django_redis import get_redis_connection
+from vendors import promotion_events
+from vendors.models import ProductPromotion, PromotionAnalytics
+from vendors.promotion_events import (
+    record_events,
+    flush_promotion_events,
+    FLUSH_LOCK_KEY,
+    EVENT_VIEW,
+    EVENT_CLICK,
+    EVENT_SALE,
+)
+from vendors.promotion_pricing import attach_products
+
+
+@pytest.fixture
+def promoted_product(promotion, product, vendor_user):
+    """Product in an active promotion"""
+    attach_products(promotion, [product.pk], vendor_user)
+    return product
+
+
+@pytest.mark.unit
+class TestPromotionEvents:
+    """Test Redis buffering and flushing into PromotionAnalytics"""
+
+    def test_views_are_buffered_then_flushed(self, client, promotion, promoted_product):
+        """Test browser impressions reach the database only on flush"""
+        item = f'{promotion.pk}:{promoted_product.pk}'
+        response = client.post(reverse('track_promotion_views'), {'items': [item, item]})
+        assert response.status_code == 200
+        assert not PromotionAnalytics.objects.exists()
+
+        assert flush_promotion_events() == 1
+
+        analytics = PromotionAnalytics.objects.get(promotion=promotion, date=timezone.localdate())
+        assert analytics.views == 2
+        assert analytics.unique_visitors == 1
+        promotion.refresh_from_db()
+        assert promotion.view_count == 2
+        link = ProductPromotion.objects.get(promotion=promotion, product=promoted_product)
+        assert link.view_count == 2
+
+    def test_flush_upserts_and_accumulates(self, promotion, promoted_product):
+        """Test repeated flushes add to the same daily row"""
+        record_events([(EVENT_CLICK, promotion.pk, promoted_product.pk)], visitor='u1')
+        flush_promotion_events()
+        record_events([
+            (EVENT_CLICK, promotion.pk, promoted_product.pk),
+            (EVENT_SALE, promotion.pk, promoted_product.pk, Decimal('74.99')),
+        ], visitor='u2')
+        flush_promotion_events()
+
+        analytics = PromotionAnalytics.objects.get(promotion=promotion)
+        assert (analytics.clicks, analytics.sales, analytics.revenue) == (2, 1, Decimal('74.99'))
+        assert analytics.unique_visitors == 2
+        promotion.refresh_from_db()
+        assert promotion.click_count == 2
+        assert promotion.conversion_count == 1
+        assert promotion.total_revenue == Decimal('74.99')
+
+        # Nothing buffered, nothing written
+        assert flush_promotion_events() == 0
+
+    def test_unknown_items_are_dropped(self, promotion, promoted_product, products):
+        """Test events for products outside the promotion are ignored on flush"""
+        record_events([
+            (EVENT_VIEW, promotion.pk, products[0].pk),
+            (EVENT_VIEW, promotion.pk + 1000, promoted_product.pk),
+        ])
+
+        assert flush_promotion_events() == 0
+        assert not PromotionAnalytics.objects.exists()
+
+    def test_product_detail_counts_click(self, client, promotion, promoted_product):
+        """Test opening a promoted product counts a click (posted by the page for anonymous visitors)"""
+        client.get(reverse('product_detail', args=[promoted_product.slug]))
+        client.post(reverse('product_viewed', args=[promoted_product.pk]))
+        flush_promotion_events()
+
+        assert PromotionAnalytics.objects.get(promotion=promotion).clicks == 1
+
+    def test_flush_retry_does_not_double_count(self, monkeypatch, promotion, promoted_product):
+        """Test a batch committed before the run died is not applied again on retry"""
+        record_events([(EVENT_CLICK, promotion.pk, promoted_product.pk)] * 2, visitor='u1')
+        drop_batch = promotion_events._drop_batch
+
+        def fail(redis, batch_key):
+            raise ConnectionError('Redis went away')
+
+        monkeypatch.setattr(promotion_events, '_drop_batch', fail)
+        with pytest.raises(ConnectionError):
+            flush_promotion_events()
+        monkeypatch.setattr(promotion_events, '_drop_batch', drop_batch)
+
+        flush_promotion_events()
+
+        assert PromotionAnalytics.objects.get(promotion=promotion).clicks == 2
+        assert ProductPromotion.objects.get(promotion=promotion, product=promoted_product).click_count == 2
+        promotion.refresh_from_db()
+        assert promotion.click_count == 2
+        assert flush_promotion_events() == 0
+
+    def test_overlapping_flush_skips(self, promotion, promoted_product):
+        """Test a flush started while another holds the lock leaves the buffer alone"""
+        record_events([(EVENT_VIEW, promotion.pk, promoted_product.pk)])
+        lock = get_redis_connection('default').lock(FLUSH_LOCK_KEY, timeout=60)
+        assert lock.acquire(blocking=False)
+        try:
+            assert flush_promotion_events() == 0
+            assert not PromotionAnalytics.objects.exists()
+        finally:
+            lock.release()
+
+        assert flush_promotion_events() == 1
+        assert PromotionAnalytics.objects.get(promotion=promotion).views == 1
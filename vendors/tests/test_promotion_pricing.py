@@ -0,0 +1,82 @@
+"""
+Test bulk promotion pricing
+"""
+import pytest
+from decimal import Decimal
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from products.models import Product
+from vendors.models import ProductPromotion
+from vendors.promotion_pricing import attach_products, reprice_products
+
+
+@pytest.mark.unit
+class TestPromotionPricing:
+    """Test bulk attachment and re-pricing of promotion products"""
+
+    def test_attach_products_in_bulk(self, promotion, products, vendor_user, customer_user):
+        """Test products are attached with a fixed number of queries and priced"""
+        other = Product.objects.create(
+            vendor=customer_user, name='Not mine', slug='not-mine', description='x',
+            category=products[0].category, price=Decimal('10.00'), stock_quantity=1,
+        )
+        ids = [p.pk for p in products] + [other.pk]
+
+        with CaptureQueriesContext(connection) as ctx:
+            added = attach_products(promotion, ids, vendor_user)
+        queries = [
+            q for q in ctx.captured_queries
+            if not q['sql'].startswith(('EXPLAIN', 'SAVEPOINT', 'RELEASE SAVEPOINT'))
+        ]
+
+        assert added == len(products)
+        assert len(queries) == 2  # product lookup + one INSERT ... RETURNING
+        link = ProductPromotion.objects.get(promotion=promotion, product=products[0])
+        assert link.original_price == products[0].price
+        assert link.discounted_price == (products[0].price * Decimal('0.75')).quantize(Decimal('0.01'))
+
+        # Already attached products are skipped
+        assert attach_products(promotion, ids, vendor_user) == 0
+
+    def test_attach_counts_only_new_links(self, promotion, products, vendor_user, monkeypatch):
+        """Test a product attached concurrently is not counted as added"""
+        from vendors import promotion_pricing
+
+        apply_prices = promotion_pricing._apply_prices
+
+        def attach_concurrently(link):
+            # Another request attaches the first product between our read and insert
+            if link.product_id == products[0].pk and not ProductPromotion.objects.filter(product=products[0]).exists():
+                ProductPromotion.objects.create(promotion=promotion, product=products[0])
+            return apply_prices(link)
+
+        monkeypatch.setattr(promotion_pricing, '_apply_prices', attach_concurrently)
+
+        assert attach_products(promotion, [p.pk for p in products], vendor_user) == len(products) - 1
+        assert ProductPromotion.objects.filter(promotion=promotion).count() == len(products)
+
+    def test_product_price_change_reprices(self, promotion, product, vendor_user):
+        """Test changing a product's price updates its promotion prices"""
+        attach_products(promotion, [product.pk], vendor_user)
+
+        product.price = Decimal('200.00')
+        product.save()
+
+        link = ProductPromotion.objects.get(promotion=promotion, product=product)
+        assert link.original_price == Decimal('200.00')
+        assert link.discounted_price == Decimal('150.00')
+        assert link.savings_amount == Decimal('50.00')
+        assert product.promotion_price == Decimal('150.00')
+
+    def test_discount_change_reprices(self, promotion, products, vendor_user):
+        """Test editing the discount updates every product in the promotion"""
+        attach_products(promotion, [p.pk for p in products], vendor_user)
+
+        promotion.discount_percentage = Decimal('50.00')
+        promotion.save()
+
+        for link in ProductPromotion.objects.filter(promotion=promotion).select_related('product'):
+            assert link.discounted_price == (link.product.price / 2).quantize(Decimal('0.01'))
+
+        # Prices already current, nothing to write
+        assert reprice_products([p.pk for p in products]) == 0
@@ -0,0 +1,113 @@
+"""
+Test promotion lifecycle scheduler
+"""
+import pytest
+from decimal import Decimal
+from datetime import timedelta
+from django.core.cache import cache
+from django.utils import timezone
+from mushanaicore import edge_cache
+from notifications.models import Notification
+from products.models import ACTIVE_PROMOTION_CACHE_KEY
+from vendors.models import Promotion, ProductPromotion
+from vendors.promotion_scheduler import run_promotion_schedule, update_promotion_statuses
+
+
+def make_promotion(vendor, start, end, **kwargs):
+    """Create a promotion, then force its stored status like a stale row"""
+    status = kwargs.pop('status', None)
+    promotion = Promotion.objects.create(
+        vendor=vendor,
+        name=kwargs.pop('name', 'Sale'),
+        discount_percentage=Decimal('20.00'),
+        start_date=start,
+        end_date=end,
+        **kwargs
+    )
+    if status:
+        Promotion.objects.filter(pk=promotion.pk).update(status=status)
+    return promotion
+
+
+@pytest.mark.unit
+class TestPromotionScheduler:
+    """Test status transitions, ending-soon events and cache invalidation"""
+
+    def test_transitions_by_date(self, vendor_user):
+        """Test stale statuses are moved with set-based updates"""
+        now = timezone.now()
+        starting = make_promotion(vendor_user, now - timedelta(hours=1), now + timedelta(days=10), status='SCHEDULED')
+        ended = make_promotion(vendor_user, now - timedelta(days=10), now - timedelta(hours=1), status='ACTIVE')
+        future = make_promotion(vendor_user, now + timedelta(days=1), now + timedelta(days=10))
+
+        changed = update_promotion_statuses(now)
+
+        assert changed == {'PAUSED': 0, 'EXPIRED': 1, 'SCHEDULED': 0, 'ACTIVE': 1}
+        statuses = dict(Promotion.objects.values_list('pk', 'status'))
+        assert statuses == {starting.pk: 'ACTIVE', ended.pk: 'EXPIRED', future.pk: 'SCHEDULED'}
+
+        # Nothing left to move on a second run
+        assert sum(update_promotion_statuses(now).values()) == 0
+
+    def test_ending_soon_notified_once(self, vendor_user):
+        """Test the ending-soon notification is sent exactly once"""
+        now = timezone.now()
+        promotion = make_promotion(vendor_user, now - timedelta(days=5), now + timedelta(days=2, hours=1))
+        make_promotion(vendor_user, now - timedelta(days=5), now + timedelta(days=20), name='Long sale')
+
+        assert run_promotion_schedule(now)[1] == 1
+        assert run_promotion_schedule(now)[1] == 0
+
+        notifications = Notification.objects.filter(notification_type='PROMOTION_ENDING')
+        assert notifications.count() == 1
+        assert notifications.get().recipient == vendor_user
+        promotion.refresh_from_db()
+        assert promotion.ending_soon_notified_at == now
+
+    def test_expiry_invalidates_product_promotion_cache(self, vendor_user, product):
+        """Test products stop showing a promotion once the scheduler expires it"""
+        now = timezone.now()
+        promotion = make_promotion(vendor_user, now - timedelta(days=5), now + timedelta(days=5))
+        ProductPromotion.objects.create(promotion=promotion, product=product)
+        assert product.get_active_promotion() is not None
+
+        Promotion.objects.filter(pk=promotion.pk).update(end_date=now - timedelta(minutes=1))
+        update_promotion_statuses(now)
+
+        assert product.get_active_promotion() is None
+        assert product.promotion_price == product.price
+
+    def test_scheduled_transition_purges_edge_cached_pages(self, settings, monkeypatch, vendor_user, products):
+        """Test a promotion started by the scheduler refreshes its products' pages, home and trending"""
+        settings.EDGE_CACHE_PURGE_URL = 'http://nginx:8081'
+        refreshed = []
+        monkeypatch.setattr(edge_cache, 'refresh_paths', refreshed.extend)
+        now = timezone.now()
+        promotion = make_promotion(vendor_user, now - timedelta(hours=1), now + timedelta(days=5), status='SCHEDULED')
+        ProductPromotion.objects.create(promotion=promotion, product=products[0])
+        edge_cache.pop_cached_paths(['storefront', 'trending', f'product-{products[0].pk}', f'product-{products[1].pk}'])
+        edge_cache.record_cached_path('/', ['storefront'])
+        edge_cache.record_cached_path('/trending/', ['trending'])
+        edge_cache.record_cached_path(f'/product/{products[0].slug}/', [f'product-{products[0].pk}'])
+        edge_cache.record_cached_path(f'/product/{products[1].slug}/', [f'product-{products[1].pk}'])
+
+        assert update_promotion_statuses(now)['ACTIVE'] == 1
+
+        assert sorted(refreshed) == sorted(['/', '/trending/', f'/product/{products[0].slug}/'])
+        assert edge_cache.pop_cached_paths([f'product-{products[1].pk}']) == [f'/product/{products[1].slug}/']
+
+    def test_promotion_save_only_invalidates_its_products(self, vendor_user, products):
+        """Test saving a promotion drops its products' cached promotions and nothing else"""
+        now = timezone.now()
+        promotion = make_promotion(vendor_user, now - timedelta(days=5), now + timedelta(days=5))
+        ProductPromotion.objects.create(promotion=promotion, product=products[0])
+        products[0].get_active_promotion()
+        products[1].get_active_promotion()
+        cache.set('views.decorators.cache.cache_page.home', 'page')
+
+        promotion.name = 'Summer sale'
+        promotion.save()
+
+        assert cache.get(ACTIVE_PROMOTION_CACHE_KEY.format(products[0].pk)) is None
+        assert cache.get(ACTIVE_PROMOTION_CACHE_KEY.format(products[1].pk)) is not None
+        assert cache.get('views.decorators.cache.cache_page.home') == 'page'
@@ -1,5 +1,6 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
+from mushanaicore.db_router import use_replica
 from django.contrib import messages
 from django.db.models import Count, Sum, Q, Avg, F
 from django.db.models.functions import TruncDay, TruncWeek, TruncMonth
@@ -44,15 +45,12 @@ def vendor_dashboard(request):
     active_products = product_stats['active_products'] or 0
     total_clicks = product_stats['total_clicks'] or 0
     
-    # Get cart items for vendor products (optimized with subquery)
-    abandoned_carts_count = CartItem.objects.filter(
-        product__vendor=vendor,
-        cart__is_abandoned=True
-    ).count()
-    
     # Get or create analytics
     analytics, _ = VendorAnalytics.objects.get_or_create(vendor=vendor)
     
+    # Abandoned carts are rolled up by the detect_abandoned_carts job
+    abandoned_carts_count = analytics.total_abandoned_carts
+    
     # Calculate revenue from orders
     order_items = OrderItem.objects.filter(
         vendor=vendor,
@@ -66,10 +64,9 @@ def vendor_dashboard(request):
     # Update analytics
     analytics.total_products = total_products
     analytics.active_products = active_products
-    analytics.total_abandoned_carts = abandoned_carts_count
     analytics.total_revenue = total_revenue
     analytics.total_orders = total_orders
-    analytics.save()
+    analytics.save(update_fields=['total_products', 'active_products', 'total_revenue', 'total_orders', 'last_calculated'])
     
     # Get recent reviews for vendor's products
     recent_reviews = ProductReview.objects.filter(
@@ -124,6 +121,7 @@ def vendor_dashboard(request):
 
 
 @login_required
+@use_replica
 def vendor_analytics_dashboard(request):
     """
     Advanced analytics dashboard for vendors
@@ -869,6 +867,7 @@ def vendor_receipt_detail(request, receipt_id):
 # ============================================
 
 @login_required
+@use_replica
 def vendor_accounting_dashboard(request):
     """
     Accounting module dashboard
@@ -2,6 +2,7 @@
 Vendor Promotion Management Views
 Allows vendors to create and manage product promotions
 """
+from django import forms
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
@@ -10,6 +11,7 @@ from django.utils import timezone
 from decimal import Decimal
 
 from .models import Promotion, ProductPromotion, PromotionAnalytics
+from .promotion_pricing import attach_products
 from products.models import Product
 
 
@@ -22,27 +24,23 @@ def vendor_promotions_list(request):
         messages.error(request, 'Access denied. Vendors only.')
         return redirect('home')
     
+    # Statuses are kept current by the promotion scheduler (run_promotion_scheduler)
     promotions = Promotion.objects.filter(vendor=request.user).select_related('company')
     
-    # Update statuses
-    for promo in promotions:
-        promo.update_status()
-        promo.save()
-    
     # Filter by status
     status_filter = request.GET.get('status', '')
     if status_filter:
         promotions = promotions.filter(status=status_filter)
     
     # Calculate statistics
-    stats = {
-        'total': Promotion.objects.filter(vendor=request.user).count(),
-        'active': Promotion.objects.filter(vendor=request.user, status='ACTIVE').count(),
-        'scheduled': Promotion.objects.filter(vendor=request.user, status='SCHEDULED').count(),
-        'expired': Promotion.objects.filter(vendor=request.user, status='EXPIRED').count(),
-        'total_revenue': Promotion.objects.filter(vendor=request.user).aggregate(
-            total=Sum('total_revenue'))['total'] or 0,
-    }
+    stats = Promotion.objects.filter(vendor=request.user).aggregate(
+        total=Count('id'),
+        active=Count('id', filter=Q(status='ACTIVE')),
+        scheduled=Count('id', filter=Q(status='SCHEDULED')),
+        expired=Count('id', filter=Q(status='EXPIRED')),
+        total_revenue=Sum('total_revenue'),
+    )
+    stats['total_revenue'] = stats['total_revenue'] or 0
     
     context = {
         'promotions': promotions,
@@ -79,14 +77,7 @@ def vendor_promotion_create(request):
             )
             
             # Add selected products
-            product_ids = request.POST.getlist('products')
-            if product_ids:
-                for product_id in product_ids:
-                    product = Product.objects.get(id=product_id, vendor=request.user)
-                    ProductPromotion.objects.create(
-                        promotion=promotion,
-                        product=product
-                    )
+            attach_products(promotion, request.POST.getlist('products'), request.user)
             
             messages.success(request, f'Promotion "{promotion.name}" created successfully!')
             return redirect('vendor_promotion_detail', promotion_id=promotion.id)
@@ -111,10 +102,6 @@ def vendor_promotion_detail(request, promotion_id):
     """
     promotion = get_object_or_404(Promotion, id=promotion_id, vendor=request.user)
     
-    # Update status
-    promotion.update_status()
-    promotion.save()
-    
     # Get products in promotion
     product_promotions = ProductPromotion.objects.filter(
         promotion=promotion
@@ -152,6 +139,7 @@ def vendor_promotion_edit(request, promotion_id):
     
     if request.method == 'POST':
         try:
+            previous_end_date = promotion.end_date
             promotion.name = request.POST.get('name')
             promotion.description = request.POST.get('description', '')
             promotion.style = request.POST.get('style')
@@ -162,10 +150,13 @@ def vendor_promotion_edit(request, promotion_id):
             promotion.show_countdown = request.POST.get('show_countdown') == 'on'
             promotion.featured = request.POST.get('featured') == 'on'
             promotion.terms = request.POST.get('terms', '')
+            if forms.DateTimeField().clean(promotion.end_date) != previous_end_date:
+                # New end date, so the ending-soon notification is due again
+                promotion.ending_soon_notified_at = None
             promotion.save()
             
             # Update products
-            new_product_ids = set(request.POST.getlist('products'))
+            new_product_ids = {int(pk) for pk in request.POST.getlist('products')}
             existing_product_ids = set(
                 ProductPromotion.objects.filter(promotion=promotion).values_list('product_id', flat=True)
             )
@@ -175,13 +166,7 @@ def vendor_promotion_edit(request, promotion_id):
             ProductPromotion.objects.filter(promotion=promotion, product_id__in=to_remove).delete()
             
             # Add new products
-            to_add = new_product_ids - existing_product_ids
-            for product_id in to_add:
-                product = Product.objects.get(id=product_id, vendor=request.user)
-                ProductPromotion.objects.create(
-                    promotion=promotion,
-                    product=product
-                )
+            attach_products(promotion, new_product_ids - existing_product_ids, request.user)
             
             messages.success(request, f'Promotion "{promotion.name}" updated successfully!')
             return redirect('vendor_promotion_detail', promotion_id=promotion.id)
@@ -243,19 +228,7 @@ def vendor_promotion_add_products(request, promotion_id):
     promotion = get_object_or_404(Promotion, id=promotion_id, vendor=request.user)
     
     if request.method == 'POST':
-        product_ids = request.POST.getlist('products')
-        added_count = 0
-        
-        for product_id in product_ids:
-            try:
-                product = Product.objects.get(id=product_id, vendor=request.user)
-                ProductPromotion.objects.get_or_create(
-                    promotion=promotion,
-                    product=product
-                )
-                added_count += 1
-            except Product.DoesNotExist:
-                continue
+        added_count = attach_products(promotion, request.POST.getlist('products'), request.user)
         
         messages.success(request, f'{added_count} product(s) added to promotion!')
         return redirect('vendor_promotion_detail', promotion_id=promotion.id)
@@ -319,11 +292,11 @@ def vendor_promotion_duplicate(request, promotion_id):
     )
     
     # Copy products
-    for pp in ProductPromotion.objects.filter(promotion=original):
-        ProductPromotion.objects.create(
-            promotion=duplicate,
-            product=pp.product
-        )
+    attach_products(
+        duplicate,
+        ProductPromotion.objects.filter(promotion=original).values_list('product_id', flat=True),
+        request.user
+    )
     
     messages.success(request, f'Promotion duplicated! Edit the details and activate when ready.')
     return redirect('vendor_promotion_edit', promotion_id=duplicate.id)